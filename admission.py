@@ -0,0 +1,280 @@
+"""Admission control for the chat API.
+
+Bounds the number of in-flight agent turns, queues the overflow by
+priority (interactive before batch) and applies per-client token-bucket
+limits on both requests and estimated LLM tokens. Requests that cannot be
+admitted are rejected with a Retry-After hint instead of piling up on the
+LLM and MCP backends.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        """
+        Initialize the rejection.
+
+        Args:
+            reason: Why the request was rejected
+            retry_after: Seconds after which the client may retry
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After header value (whole seconds, at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_per_second: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return math.inf
+        # Requests larger than the bucket can never fit; wait for a full bucket
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.refill_per_second)
+
+    def consume(self, amount: float):
+        """Take tokens from the bucket (may go negative for oversized requests)."""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        """Give back tokens taken for a request that was not served."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    @property
+    def is_full(self) -> bool:
+        """Whether the bucket is full and carries no state worth keeping."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """Bounded in-flight limit, priority wait queue and per-client rate limits."""
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        client_requests_per_minute: float,
+        client_request_burst: float,
+        client_tokens_per_minute: float,
+        client_token_burst: float
+    ):
+        """
+        Initialize the admission controller.
+
+        Args:
+            max_in_flight: Maximum number of concurrently executing requests
+            max_queue: Maximum number of waiting requests
+            queue_timeout: Maximum seconds a request may wait in the queue
+            client_requests_per_minute: Sustained request rate per client (0 disables)
+            client_request_burst: Request bucket size per client
+            client_tokens_per_minute: Sustained estimated-token rate per client (0 disables)
+            client_token_burst: Token bucket size per client
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_requests_per_minute = client_requests_per_minute
+        self.client_request_burst = client_request_burst
+        self.client_tokens_per_minute = client_tokens_per_minute
+        self.client_token_burst = client_token_burst
+
+        self.in_flight = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.request_buckets: Dict[str, TokenBucket] = {}
+        self.token_buckets: Dict[str, TokenBucket] = {}
+        self.avg_service_time = 1.0
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_rate_limited": 0,
+            "rejected_queue_timeout": 0
+        }
+
+    @classmethod
+    def from_config(cls, config) -> "AdmissionController":
+        """Create a controller from the Config class."""
+        return cls(
+            max_in_flight=config.ADMISSION_MAX_IN_FLIGHT,
+            max_queue=config.ADMISSION_MAX_QUEUE,
+            queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+            client_requests_per_minute=config.CLIENT_REQUESTS_PER_MINUTE,
+            client_request_burst=config.CLIENT_REQUEST_BURST,
+            client_tokens_per_minute=config.CLIENT_TOKENS_PER_MINUTE,
+            client_token_burst=config.CLIENT_TOKEN_BURST
+        )
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], client_id: str, burst: float, per_minute: float) -> TokenBucket:
+        """Get or create a client's bucket, pruning idle buckets when the table grows."""
+        bucket = buckets.get(client_id)
+        if bucket is None:
+            if len(buckets) > 10000:
+                for key in [k for k, b in buckets.items() if b.is_full]:
+                    del buckets[key]
+            bucket = TokenBucket(burst, per_minute / 60.0)
+            buckets[client_id] = bucket
+        return bucket
+
+    def _check_rate_limits(self, client_id: str, estimated_tokens: int) -> List[Tuple[TokenBucket, float]]:
+        """
+        Charge the client's request and token buckets or raise AdmissionRejected.
+
+        Returns:
+            The (bucket, amount) charges, to refund if the request is not admitted
+        """
+        buckets = []
+        if self.client_requests_per_minute > 0:
+            buckets.append((self._bucket(
+                self.request_buckets, client_id,
+                self.client_request_burst, self.client_requests_per_minute
+            ), 1))
+        if self.client_tokens_per_minute > 0:
+            buckets.append((self._bucket(
+                self.token_buckets, client_id,
+                self.client_token_burst, self.client_tokens_per_minute
+            ), estimated_tokens))
+
+        wait = max((bucket.wait_time(amount) for bucket, amount in buckets), default=0.0)
+        if wait > 0:
+            self.stats["rejected_rate_limited"] += 1
+            raise AdmissionRejected(f"Rate limit exceeded for client {client_id}", wait)
+
+        for bucket, amount in buckets:
+            bucket.consume(amount)
+        return buckets
+
+    def _estimated_wait(self) -> float:
+        """Rough time until a newly queued request would start."""
+        return self.avg_service_time * (len(self.waiters) + 1) / max(1, self.max_in_flight)
+
+    async def _acquire(self, priority: int):
+        """Take an in-flight slot, waiting in the priority queue if needed."""
+        # Drop waiters that gave up (timed out or disconnected)
+        if any(f.done() for _, _, f in self.waiters):
+            self.waiters = [w for w in self.waiters if not w[2].done()]
+            heapq.heapify(self.waiters)
+
+        if self.in_flight < self.max_in_flight and not self.waiters:
+            self.in_flight += 1
+            return
+
+        if len(self.waiters) >= self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise AdmissionRejected("Server is overloaded, queue is full", self._estimated_wait())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), future))
+        self.stats["queued"] += 1
+        try:
+            # The slot is handed over by _release, so in_flight is already counted
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over at the same moment; give it back
+                self._release()
+            future.cancel()
+            self.stats["rejected_queue_timeout"] += 1
+            raise AdmissionRejected("Timed out waiting in the queue", self._estimated_wait())
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            future.cancel()
+            raise
+
+    def _release(self):
+        """Hand the slot to the highest-priority waiter or free it."""
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, priority: str = "interactive", estimated_tokens: int = 0):
+        """
+        Admit a request for the duration of the context.
+
+        Args:
+            client_id: Identifier used for per-client rate limits
+            priority: "interactive" or "batch"
+            estimated_tokens: Estimated LLM tokens the request will use
+
+        Raises:
+            AdmissionRejected: If the client is rate limited or the queue is full
+        """
+        # Charged before queueing so a burst cannot queue past the limit, refunded if never served
+        charges = self._check_rate_limits(client_id, estimated_tokens)
+        try:
+            await self._acquire(PRIORITIES.get(priority, PRIORITIES["batch"]))
+        except (AdmissionRejected, asyncio.CancelledError):
+            for bucket, amount in charges:
+                bucket.refund(amount)
+            raise
+        self.stats["admitted"] += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.avg_service_time = 0.9 * self.avg_service_time + 0.1 * elapsed
+            self._release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return admission counters and current load."""
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for _, _, future in self.waiters if not future.done()),
+            "avg_service_time": round(self.avg_service_time, 3)
+        }
+
+
+def estimate_tokens(text: str, base_tokens: int = 0) -> int:
+    """Cheap token estimate (~4 characters per token) plus fixed prompt overhead."""
+    return base_tokens + math.ceil(len(text) / 4)
@@ -1,33 +1,89 @@
 """Main AI Agent with MCP integration."""
 import asyncio
-from typing import List, Dict, Any, Optional
-from anthropic import Anthropic
+import json
+import time
+from typing import Awaitable, Callable, List, Dict, Any, Optional
+from anthropic import AsyncAnthropic
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 
 from config import Config
-from mcp_client import MCPClient
+from conversation_store import create_store
+from llm_resilience import LLMDeadlineExceeded, ResilientLLMCaller
+from llm_transport import LLMTransport
+from model_routing import ModelRouter
+from circuit_breaker import CircuitOpenError
+from mcp_client import MCPClient, ToolTimeoutError
+from mcp_gateway import GatewayClient
 from logger import PromptLogger
+from messages import Message, ToolResultPart, to_api_messages
+from metrics import LatencyWindow
+from tool_results import is_error_result, normalize_tool_result
+from tool_scheduler import call_context
+from tool_validation import ToolValidator
+from turn_budget import TurnBudget
+
+
+DEFAULT_SESSION_ID = "default"
+
+# Observed calls needed before a tool's latency is used to decide whether it fits the budget
+TOOL_ESTIMATE_MIN_SAMPLES = 3
+
+# How often (seconds) a worker asks the gateway whether the tool catalog was reloaded
+CATALOG_CHECK_INTERVAL = 5.0
+
+# Receives progress events of a turn (tokens, tool calls); must not block
+EventCallback = Callable[[Dict[str, Any]], None]
 
 
 class MCPAgent:
     """AI Agent with MCP (Model Context Protocol) integration."""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, logger: Optional[PromptLogger] = None):
         """
         Initialize the MCP Agent.
         
         Args:
             config: Configuration object
+            logger: Prompt logger (a new one writing to ./logs by default)
         """
         self.config = config
-        self.client = Anthropic(api_key=config.ANTHROPIC_API_KEY)
-        self.mcp_client = MCPClient(config.MCP_SERVERS)
+        # One pre-warmed connection pool for every model and caller (see llm_transport.py)
+        self.transport = LLMTransport.from_config(config)
+        # Retries are handled by ResilientLLMCaller, not by the SDK
+        self.client = AsyncAnthropic(
+            api_key=config.ANTHROPIC_API_KEY,
+            base_url=config.ANTHROPIC_BASE_URL,
+            max_retries=0,
+            http_client=self.transport.client
+        )
+        self.llm = ResilientLLMCaller.from_config(config)
+        self.router = ModelRouter.from_config(config)
+        # Each model gets its own caller so hedge delays follow its own latency
+        self.llm_callers = {config.MODEL_NAME: self.llm}
+        if self.router.enabled:
+            self.llm_callers[self.router.fast_model] = ResilientLLMCaller.from_config(config)
+        if config.MCP_GATEWAY_SOCKET:
+            self.mcp_client = GatewayClient(config.MCP_GATEWAY_SOCKET)
+        else:
+            self.mcp_client = MCPClient.from_config(config)
         self.console = Console()
-        self.conversation_history: List[Dict[str, Any]] = []
+        # Active sessions only; idle ones live in the conversation store
+        self.store = create_store(config)
+        self.histories: Dict[str, List[Message]] = {}
+        # With several workers another process may have extended a session since
+        # this one cached it, so the history is re-read from the store every turn
+        self.reload_history_each_turn = config.API_WORKERS > 1
+        self.last_used: Dict[str, float] = {}
+        self.session_locks: Dict[str, asyncio.Lock] = {}
         self.available_tools: List[Dict[str, Any]] = []
-        self.logger = PromptLogger()  # Initialize prompt logger
+        self.server_configs = config.MCP_SERVERS
+        self.catalog_version: Optional[int] = None
+        self.catalog_checked = 0.0
+        self.tool_latency: Dict[str, LatencyWindow] = {}
+        self.validator = ToolValidator()
+        self.logger = logger or PromptLogger()  # Initialize prompt logger
         
     async def initialize(self):
         """Initialize the agent by connecting to MCP servers."""
@@ -36,11 +92,11 @@ class MCPAgent:
         # Show log location
         self.console.print(f"[cyan]📝 Log dosyaları: {self.logger.get_log_location()}[/cyan]")
         
-        # Connect to MCP servers
-        await self.mcp_client.connect()
+        # Connect to MCP servers while the LLM connections are warmed up
+        await asyncio.gather(self.mcp_client.connect(), self.transport.start())
         
         # Load available tools
-        self.available_tools = await self.mcp_client.list_tools()
+        await self._load_catalog()
         
         if self.available_tools:
             self.console.print(f"[green]✓ Loaded {len(self.available_tools)} tools from MCP servers[/green]")
@@ -49,9 +105,60 @@ class MCPAgent:
         else:
             self.console.print("[yellow]⚠ No MCP tools available[/yellow]")
             
+    async def _load_catalog(self):
+        """Load the tool catalog and swap it in together with its validators."""
+        tools = await self.mcp_client.list_tools()
+        # No await between the two assignments, so no turn sees a half-updated catalog
+        self.available_tools = tools
+        self.validator.load(tools)
+    
+    async def reload_servers(self, server_configs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply a new MCP server configuration without restarting the agent.
+        
+        Only new and changed servers are connected; removed and replaced
+        connections are closed after their in-flight calls. Turns that are
+        already running keep the tool list they started with.
+        
+        Args:
+            server_configs: Complete new configuration (server name -> config)
+            
+        Returns:
+            Server names by outcome and the size of the new tool catalog
+        """
+        changes = await self.mcp_client.reload(server_configs, self.config.MCP_DRAIN_TIMEOUT)
+        self.catalog_version = changes.pop("catalog_version", None)
+        await self._load_catalog()
+        self.server_configs = server_configs
+        self.console.print(
+            f"[green]✓ MCP servers reloaded: {len(self.available_tools)} tools "
+            f"(added {changes['added']}, changed {changes['changed']}, removed {changes['removed']}, "
+            f"failed {changes['failed']})[/green]"
+        )
+        return {**changes, "tools": len(self.available_tools)}
+    
+    async def sync_catalog(self):
+        """Pick up a catalog reloaded through the gateway by another worker."""
+        if not isinstance(self.mcp_client, GatewayClient):
+            return
+        now = time.monotonic()
+        if now - self.catalog_checked < CATALOG_CHECK_INTERVAL:
+            return
+        self.catalog_checked = now
+        try:
+            version = await self.mcp_client.catalog_version()
+        except Exception as e:
+            print(f"Could not check the gateway catalog version: {e}")
+            return
+        if version != self.catalog_version:
+            await self._load_catalog()
+            self.catalog_version = version
+    
     async def shutdown(self):
         """Shutdown the agent and disconnect from MCP servers."""
         await self.mcp_client.disconnect()
+        await self.transport.close()
+        self.store.close()
         self.console.print("[cyan]👋 Agent shutdown complete[/cyan]")
         
     def _convert_tools_to_anthropic_format(self) -> List[Dict[str, Any]]:
@@ -68,13 +175,199 @@ class MCPAgent:
             
         return anthropic_tools
     
-    async def _execute_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Any:
+    def find_tool(self, tool_name: str, server_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a tool in the loaded catalog.
+        
+        Args:
+            tool_name: MCP tool name, or the full "server_tool" name
+            server_name: Server to search (optional)
+            
+        Returns:
+            Tool info, or None if not found
+            
+        Raises:
+            ValueError: If the name matches tools on several servers
+        """
+        matches = [
+            tool for tool in self.available_tools
+            if (server_name is None or tool['server'] == server_name)
+            and (tool['name'] == tool_name or f"{tool['server']}_{tool['name']}" == tool_name)
+        ]
+        if len(matches) > 1:
+            servers = ", ".join(tool['server'] for tool in matches)
+            raise ValueError(f"Tool {tool_name} exists on several servers ({servers}); specify the server")
+        return matches[0] if matches else None
+    
+    async def call_tool_direct(self, tool: Dict[str, Any], arguments: Dict[str, Any]) -> Any:
+        """
+        Call an MCP tool without going through the LLM.
+        
+        Args:
+            tool: Tool info from the catalog
+            arguments: Tool arguments
+            
+        Returns:
+            Tool result (or a structured error dict)
+        """
+        return await self._execute_tool(f"{tool['server']}_{tool['name']}", arguments)
+    
+    async def summarize_tool_result(
+        self,
+        tool: Dict[str, Any],
+        arguments: Dict[str, Any],
+        result: Any,
+        instructions: Optional[str] = None
+    ) -> str:
+        """
+        Summarize a tool result with a single tool-less LLM call.
+        
+        Args:
+            tool: Tool info from the catalog
+            arguments: Arguments the tool was called with
+            result: Tool result
+            instructions: Extra instructions for the summary (optional)
+            
+        Returns:
+            Summary text
+        """
+        system_message = """You summarize results returned by travel search tools for the user.
+Highlight the most relevant options (price, time, provider) and keep the answer concise.
+Answer in the language of the instructions, or in Turkish if none are given."""
+        
+        tool_name = f"{tool['server']}_{tool['name']}"
+        # The same compact text the history keeps, not the CallToolResult repr
+        prompt = (
+            f"Tool: {tool_name}\n"
+            f"Arguments: {json.dumps(arguments, ensure_ascii=False)}\n\n"
+            f"Result:\n{self._tool_result_content(tool_name, result)}"
+        )
+        if instructions:
+            prompt += f"\n\nInstructions: {instructions}"
+        
+        messages = [Message.text("user", prompt)]
+        response = await self._call_model(self.config.MODEL_NAME, system_message, messages)
+        return "".join(block.text for block in response.content if hasattr(block, "text"))
+    
+    async def _call_model(
+        self,
+        model: str,
+        system_message: str,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        on_event: Optional[EventCallback] = None,
+        api_memo: Optional[Dict[Message, Dict[str, Any]]] = None
+    ) -> Any:
+        """
+        Send one request to a model, logging it and recording its latency and usage.
+        
+        Args:
+            model: Model name
+            system_message: System prompt
+            messages: Conversation history
+            tools: Tools in Anthropic format (optional)
+            tool_choice: Tool choice setting, e.g. {"type": "none"} (optional)
+            deadline: Seconds allowed for the call (defaults to the configured deadline)
+            on_event: Streams the response and receives its text as "token" events (optional)
+            api_memo: Messages already converted to API format in this turn (optional)
+            
+        Returns:
+            The API response
+        """
+        api_params = {
+            "model": model,
+            "max_tokens": self.config.MAX_TOKENS,
+            "temperature": self.config.TEMPERATURE,
+            "system": system_message,
+            "messages": to_api_messages(messages, api_memo)
+        }
+        if tools:
+            api_params["tools"] = tools
+            if tool_choice:
+                api_params["tool_choice"] = tool_choice
+        
+        self.logger.log_prompt(
+            system_message=system_message,
+            messages=messages,
+            model=model,
+            temperature=self.config.TEMPERATURE,
+            max_tokens=self.config.MAX_TOKENS,
+            tools=tools
+        )
+        
+        caller = self.llm_callers.get(model, self.llm)
+        if on_event is not None:
+            request = self._streaming_request(api_params, on_event)
+        else:
+            request = lambda: self.client.messages.create(**api_params)
+        started = time.monotonic()
+        try:
+            response = await caller.call(request, deadline=deadline)
+        except Exception:
+            self.router.record(model, time.monotonic() - started)
+            raise
+        latency = time.monotonic() - started
+        self.router.record(model, latency, response)
+        
+        self.logger.log_response(
+            response=response,
+            stop_reason=response.stop_reason,
+            usage={
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens
+            },
+            model=model,
+            latency_ms=latency * 1000
+        )
+        return response
+    
+    def _streaming_request(
+        self,
+        api_params: Dict[str, Any],
+        on_event: EventCallback
+    ) -> Callable[[], Awaitable[Any]]:
+        """
+        Request factory that streams the response and forwards its text deltas.
+        
+        Retries and hedged duplicates call the factory again. Only the attempt
+        that produced the first token forwards tokens; if it fails, a "reset"
+        event tells the client to drop the text it received so far.
+        """
+        owner: List[object] = []
+        
+        async def request():
+            attempt = object()
+            try:
+                async with self.client.messages.stream(**api_params) as stream:
+                    async for text in stream.text_stream:
+                        if not owner:
+                            owner.append(attempt)
+                        if owner[0] is attempt:
+                            on_event({"type": "token", "text": text})
+                    return await stream.get_final_message()
+            except BaseException:
+                if owner and owner[0] is attempt:
+                    owner.clear()
+                    on_event({"type": "reset"})
+                raise
+        
+        return request
+    
+    async def _execute_tool(
+        self,
+        tool_name: str,
+        tool_input: Dict[str, Any],
+        budget: Optional[TurnBudget] = None
+    ) -> Any:
         """
         Execute a tool call.
         
         Args:
             tool_name: Full tool name (server_toolname)
             tool_input: Tool arguments
+            budget: Turn budget; calls that cannot finish in time are skipped or cut short
             
         Returns:
             Tool execution result
@@ -83,35 +376,205 @@ class MCPAgent:
         parts = tool_name.split('_', 1)
         if len(parts) != 2:
             error_result = {"error": f"Invalid tool name format: {tool_name}"}
-            self.logger.log_tool_execution(tool_name, tool_input, error_result, success=False)
+            self.logger.log_tool_execution(
+                tool_name, tool_input, error_result, success=False, error_code="invalid_tool_name"
+            )
             return error_result
             
         server_name, actual_tool_name = parts
         
+        # Reject malformed arguments locally instead of waiting for a remote failure
+        validation_errors = self.validator.validate(tool_name, tool_input)
+        if validation_errors:
+            error_result = {
+                "error": "invalid_arguments",
+                "tool": tool_name,
+                "details": validation_errors,
+                "message": "Arguments do not match the tool's input schema; fix them and call the tool again."
+            }
+            self.logger.log_tool_execution(
+                tool_name, tool_input, error_result, success=False, error_code="invalid_arguments"
+            )
+            return error_result
+        
+        time_limit = None
+        if budget is not None:
+            if not budget.can_afford(self._expected_tool_seconds(tool_name)):
+                budget.events["skipped_tools"] += 1
+                error_result = {
+                    "error": "skipped_budget",
+                    "tool": tool_name,
+                    "retryable": False,
+                    "message": "Not enough time left in this request to run this tool; answer with the information gathered so far."
+                }
+                self.logger.log_tool_execution(
+                    tool_name, tool_input, error_result, success=False, error_code="skipped_budget"
+                )
+                return error_result
+            time_limit = budget.deadline()
+        
+        started = time.monotonic()
         try:
-            result = await self.mcp_client.call_tool(server_name, actual_tool_name, tool_input)
-            self.logger.log_tool_execution(tool_name, tool_input, result, success=True)
+            call = self.mcp_client.call_tool(server_name, actual_tool_name, tool_input)
+            if time_limit is not None:
+                result = await asyncio.wait_for(call, timeout=time_limit)
+            else:
+                result = await call
+            elapsed = time.monotonic() - started
+            self.tool_latency.setdefault(tool_name, LatencyWindow()).record(elapsed)
+            # A call that completed can still carry an error reported by the tool
+            tool_failed = is_error_result(result)
+            self.logger.log_tool_execution(
+                tool_name, tool_input, result, success=not tool_failed,
+                duration_ms=elapsed * 1000, error_code="tool_error" if tool_failed else None
+            )
             return result
+        except (ToolTimeoutError, CircuitOpenError) as e:
+            # Structured result so the model can retry or move on
+            error_result = e.to_result()
+            self.logger.log_tool_execution(
+                tool_name, tool_input, error_result, success=False,
+                duration_ms=(time.monotonic() - started) * 1000, error_code=error_result["error"]
+            )
+            return error_result
+        except asyncio.TimeoutError:
+            # Cut short by the turn budget, not a server failure
+            budget.events["interrupted_tools"] += 1
+            error_result = {
+                "error": "budget_exceeded",
+                "tool": tool_name,
+                "retryable": False,
+                "message": "The tool did not finish within this request's time budget; answer with the information gathered so far."
+            }
+            self.logger.log_tool_execution(
+                tool_name, tool_input, error_result, success=False,
+                duration_ms=(time.monotonic() - started) * 1000, error_code="budget_exceeded"
+            )
+            return error_result
         except Exception as e:
             error_result = {"error": str(e)}
-            self.logger.log_tool_execution(tool_name, tool_input, error_result, success=False)
+            self.logger.log_tool_execution(
+                tool_name, tool_input, error_result, success=False,
+                duration_ms=(time.monotonic() - started) * 1000, error_code="exception"
+            )
             return error_result
     
-    async def chat(self, user_message: str) -> str:
+    def _expected_tool_seconds(self, tool_name: str) -> float:
+        """p95 latency of a tool, or 0 until enough calls were observed."""
+        window = self.tool_latency.get(tool_name)
+        if window is None or len(window) < TOOL_ESTIMATE_MIN_SAMPLES:
+            return 0.0
+        return window.percentile(95)
+    
+    def _tool_result_content(self, tool_name: str, result: Any) -> str:
+        """Normalize a tool result into the compact text kept in the history."""
+        server_name, _, actual_tool_name = tool_name.partition("_")
+        server_config = self.server_configs.get(server_name, {})
+        fields = server_config.get("result_fields", {}).get(actual_tool_name)
+        return normalize_tool_result(result, fields, self.config.TOOL_RESULT_FORMAT)
+    
+    def _evict_idle_sessions(self):
+        """Drop idle sessions from memory; their messages are already in the store."""
+        cutoff = time.monotonic() - self.config.CONVERSATION_IDLE_SECONDS
+        for session_id in [s for s, used in self.last_used.items() if used < cutoff]:
+            lock = self.session_locks.get(session_id)
+            if lock is not None and lock.locked():
+                continue
+            self.histories.pop(session_id, None)
+            self.last_used.pop(session_id, None)
+            self.session_locks.pop(session_id, None)
+    
+    async def _get_history(self, session_id: str) -> List[Message]:
+        """Return a session's in-memory history, loading recent turns from the store if needed."""
+        history = self.histories.get(session_id)
+        if history is None or self.reload_history_each_turn:
+            history = await asyncio.to_thread(
+                self.store.load, session_id, self.config.CONVERSATION_MAX_LOADED_TURNS
+            )
+            self.histories[session_id] = history
+        self.last_used[session_id] = time.monotonic()
+        return history
+    
+    async def _append_message(self, session_id: str, history: List[Message], message: Message):
+        """Append a message to the session history and persist it."""
+        history.append(message)
+        write = asyncio.ensure_future(asyncio.to_thread(self.store.append, session_id, [message]))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # Let the write land first so the store keeps the same order as the history
+            await write
+            raise
+    
+    async def chat(
+        self,
+        user_message: str,
+        session_id: str = DEFAULT_SESSION_ID,
+        budget: Optional[TurnBudget] = None,
+        on_event: Optional[EventCallback] = None,
+        priority: str = "interactive"
+    ) -> str:
         """
         Send a message to the agent and get a response.
         
+        If the task running the turn is cancelled, the history is closed
+        with a note so the conversation stays valid for the next message.
+        
         Args:
             user_message: User's input message
+            session_id: Conversation to continue
+            budget: Wall-clock budget of the turn (a new one from Config by default);
+                its report() tells where the time went
+            on_event: Receives streamed tokens and tool progress events (optional)
+            priority: Traffic class of the turn's MCP calls ("interactive" or "batch")
+            
+        Returns:
+            Agent's response
+        """
+        budget = budget or TurnBudget.from_config(self.config)
+        await self.sync_catalog()
+        self._evict_idle_sessions()
+        lock = self.session_locks.setdefault(session_id, asyncio.Lock())
+        waiting = time.monotonic()
+        async with lock:
+            budget.record("session_lock", time.monotonic() - waiting)
+            with budget.phase("history_load"):
+                history = await self._get_history(session_id)
+            try:
+                # MCP calls of this turn are queued fairly under the session's name
+                with call_context(session_id, priority):
+                    return await self._run_turn(session_id, history, user_message, budget, on_event)
+            except asyncio.CancelledError:
+                budget.final_answer_reason = "cancelled"
+                await self._close_cancelled_turn(session_id, history)
+                raise
+            finally:
+                self.last_used[session_id] = time.monotonic()
+                self.logger.log_turn_report(session_id, budget.report())
+    
+    async def _run_turn(
+        self,
+        session_id: str,
+        history: List[Message],
+        user_message: str,
+        budget: TurnBudget,
+        on_event: Optional[EventCallback] = None
+    ) -> str:
+        """
+        Run the agent loop for one user message.
+        
+        Args:
+            session_id: Conversation identifier
+            history: The session's in-memory history (updated in place)
+            user_message: User's input message
+            budget: Wall-clock budget of the turn
+            on_event: Receives streamed tokens and tool progress events (optional)
             
         Returns:
             Agent's response
         """
         # Add user message to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        await self._append_message(session_id, history, Message.text("user", user_message))
         
         # Prepare system message
         system_message = """You are a helpful AI assistant with access to various tools through the Model Context Protocol (MCP).
@@ -125,75 +588,92 @@ Always explain what you're doing and provide clear, helpful responses."""
         
         max_iterations = 10
         iteration = 0
+        # Each iteration only converts the messages added since the previous request
+        api_memo: Dict[Message, Dict[str, Any]] = {}
+        # Tool-planning iterations go to the fast model until it fails once in this turn
+        use_fast_model = True
         
         while iteration < max_iterations:
+            # Keep the reserve for an answer from what was gathered so far
+            if budget.low:
+                budget.final_answer_reason = "budget"
+                break
             iteration += 1
+            budget.events["iterations"] = iteration
             
-            # Create API request parameters
-            api_params = {
-                "model": self.config.MODEL_NAME,
-                "max_tokens": self.config.MAX_TOKENS,
-                "temperature": self.config.TEMPERATURE,
-                "system": system_message,
-                "messages": self.conversation_history
-            }
-            
-            # Add tools if available
-            if anthropic_tools:
-                api_params["tools"] = anthropic_tools
-            
-            # Log the prompt being sent
-            self.logger.log_prompt(
-                system_message=system_message,
-                messages=self.conversation_history,
-                model=self.config.MODEL_NAME,
-                temperature=self.config.TEMPERATURE,
-                max_tokens=self.config.MAX_TOKENS,
-                tools=anthropic_tools
-            )
-            
-            # Get response from Claude
-            response = self.client.messages.create(**api_params)
+            model = self.router.planning_model(bool(anthropic_tools)) if use_fast_model else self.config.MODEL_NAME
+            escalation = None
+            try:
+                with budget.phase("llm"):
+                    response = await self._call_model(
+                        model, system_message, history, anthropic_tools,
+                        deadline=budget.deadline(), on_event=on_event, api_memo=api_memo
+                    )
+                escalation = self.router.escalation_reason(model, response)
+            except Exception as e:
+                if isinstance(e, LLMDeadlineExceeded) and budget.low:
+                    budget.final_answer_reason = "budget"
+                    break
+                if model == self.config.MODEL_NAME:
+                    raise
+                self.console.print(f"[yellow]⚠️  Fast model failed ({e}), escalating to {self.config.MODEL_NAME}[/yellow]")
+                escalation = "error"
+                use_fast_model = False
             
-            # Log the response received
-            usage_info = {
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens
-            }
-            self.logger.log_response(
-                response=response,
-                stop_reason=response.stop_reason,
-                usage=usage_info
-            )
+            # The final answer (or a failed planning step) comes from the main model
+            if escalation:
+                self.router.record_escalation(escalation)
+                if on_event:
+                    # The fast model's streamed text is discarded; the main model answers instead
+                    on_event({"type": "reset"})
+                try:
+                    with budget.phase("llm"):
+                        response = await self._call_model(
+                            self.config.MODEL_NAME, system_message, history, anthropic_tools,
+                            deadline=budget.deadline(), on_event=on_event, api_memo=api_memo
+                        )
+                except LLMDeadlineExceeded:
+                    if not budget.low:
+                        raise
+                    budget.final_answer_reason = "budget"
+                    break
             
             # Check if we need to process tool calls
             if response.stop_reason == "tool_use":
                 # Add assistant's response to history
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": response.content
-                })
+                await self._append_message(
+                    session_id, history, Message.from_sdk_content("assistant", response.content)
+                )
                 
                 # Process each tool use
                 tool_results = []
                 for content_block in response.content:
                     if content_block.type == "tool_use":
                         self.console.print(f"[yellow]🔧 Using tool: {content_block.name}[/yellow]")
+                        if on_event:
+                            on_event({"type": "tool_start", "tool": content_block.name, "input": content_block.input})
                         
-                        # Execute the tool
-                        result = await self._execute_tool(content_block.name, content_block.input)
+                        # Execute the tool (skipped or cut short if it cannot finish in time)
+                        started = time.monotonic()
+                        with budget.phase("tools"):
+                            result = await self._execute_tool(content_block.name, content_block.input, budget)
+                        is_error = is_error_result(result)
+                        if on_event:
+                            on_event({
+                                "type": "tool_end",
+                                "tool": content_block.name,
+                                "is_error": is_error,
+                                "duration_ms": round((time.monotonic() - started) * 1000, 1)
+                            })
                         
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": str(result)
-                        })
+                        tool_results.append(ToolResultPart(
+                            content_block.id,
+                            self._tool_result_content(content_block.name, result),
+                            is_error=is_error
+                        ))
                 
                 # Add tool results to history
-                self.conversation_history.append({
-                    "role": "user",
-                    "content": tool_results
-                })
+                await self._append_message(session_id, history, Message("user", tuple(tool_results)))
                 
             elif response.stop_reason == "end_turn":
                 # Extract final text response
@@ -203,26 +683,81 @@ Always explain what you're doing and provide clear, helpful responses."""
                         final_response += content_block.text
                 
                 # Add to history
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": final_response
-                })
+                await self._append_message(session_id, history, Message.text("assistant", final_response))
                 
                 return final_response
             else:
                 # Handle other stop reasons
                 final_response = f"Unexpected stop reason: {response.stop_reason}"
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": final_response
-                })
+                await self._append_message(session_id, history, Message.text("assistant", final_response))
                 return final_response
         
-        return "Maximum iterations reached. Please try rephrasing your request."
+        budget.final_answer_reason = budget.final_answer_reason or "max_iterations"
+        return await self._final_answer(session_id, history, system_message, anthropic_tools, budget, on_event)
+    
+    async def _final_answer(
+        self,
+        session_id: str,
+        history: List[Message],
+        system_message: str,
+        anthropic_tools: List[Dict[str, Any]],
+        budget: TurnBudget,
+        on_event: Optional[EventCallback] = None
+    ) -> str:
+        """
+        Ask the main model for an answer without tools once the budget or iteration limit is hit.
+        
+        Returns:
+            The partial answer (or a fixed message if even that call fails)
+        """
+        if budget.final_answer_reason == "budget":
+            note = "The time budget for this request is used up."
+            fallback = "I ran out of time before I could finish this request. Please try again or narrow it down."
+        else:
+            note = "The tool-call limit for this request is reached."
+            fallback = "Maximum iterations reached. Please try rephrasing your request."
+        system_message += (
+            f"\n\n{note} Do not call any more tools. Answer now from the information gathered so far "
+            "and briefly say what is still missing."
+        )
+        
+        final_response = ""
+        try:
+            with budget.phase("final_answer"):
+                response = await self._call_model(
+                    self.config.MODEL_NAME, system_message, history, anthropic_tools,
+                    tool_choice={"type": "none"}, deadline=budget.deadline(final=True), on_event=on_event
+                )
+            final_response = "".join(block.text for block in response.content if hasattr(block, "text"))
+        except Exception as e:
+            self.console.print(f"[red]✗ Final answer failed: {e}[/red]")
+        
+        final_response = final_response or fallback
+        await self._append_message(session_id, history, Message.text("assistant", final_response))
+        return final_response
+    
+    async def _close_cancelled_turn(self, session_id: str, history: List[Message]):
+        """Answer dangling tool calls and end a cancelled turn so the history stays valid."""
+        if not history:
+            return
+        last = history[-1]
+        if last.role == "assistant" and last.tool_uses:
+            cancelled = tuple(
+                ToolResultPart(part.id, "Cancelled by the user before the tool ran.", is_error=True)
+                for part in last.tool_uses
+            )
+            await self._append_message(session_id, history, Message("user", cancelled))
+        if history[-1].role == "user":
+            await self._append_message(
+                session_id, history, Message.text("assistant", "(The user cancelled this request.)")
+            )
     
-    def clear_history(self):
-        """Clear the conversation history."""
-        self.conversation_history.clear()
+    async def clear_history(self, session_id: str = DEFAULT_SESSION_ID):
+        """Clear the conversation history (after a turn running in the session finishes)."""
+        lock = self.session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            self.histories.pop(session_id, None)
+            await asyncio.to_thread(self.store.clear, session_id)
         self.console.print("[cyan]🗑️  Conversation history cleared[/cyan]")
 
 
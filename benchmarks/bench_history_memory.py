@@ -0,0 +1,178 @@
+"""Memory per 1,000-turn session for the different history representations.
+
+Run from the repository root:
+
+    python benchmarks/bench_history_memory.py --turns 1000
+
+Each simulated turn is a user question, an assistant tool call, a tool
+result and a final assistant answer. Variants:
+
+  sdk      assistant content kept as SDK content-block objects (old behaviour,
+           needs the anthropic package)
+  dict     plain API dicts
+  compact  messages.Message records
+
+It also times the two per-iteration costs: serializing the whole history
+for the prompt log and building the API ``messages`` parameter (for the
+compact history with the agent's per-turn memo, which already holds the
+messages of the previous iteration).
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messages import Message, TextPart, ToolResultPart, ToolUsePart, to_api_messages  # noqa: E402
+
+try:
+    from anthropic.types import TextBlock, ToolUseBlock
+except ImportError:
+    TextBlock = None
+    ToolUseBlock = None
+
+
+def turn_payload(i: int, result_size: int):
+    """Fresh strings for one turn so every variant allocates its own payload."""
+    question = f"İstanbul'dan İzmir'e {i}. gün için uçuş ara"
+    tool_input = {"origin": "IST", "destination": "ADB", "date": f"2025-11-{i % 28 + 1:02d}"}
+    result = (f"uçuş-{i}-" + "x" * result_size)[:result_size]
+    answer = f"{i}. arama için en uygun uçuş 08:30 kalkışlı, 1.250 TL."
+    return question, tool_input, result, answer
+
+
+def build_sdk(turns: int, result_size: int):
+    history = []
+    for i in range(turns):
+        question, tool_input, result, answer = turn_payload(i, result_size)
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": [
+            TextBlock(type="text", text="Arıyorum."),
+            ToolUseBlock(type="tool_use", id=f"toolu_{i:08d}", name="enuygun_flight_search", input=tool_input)
+        ]})
+        history.append({"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"toolu_{i:08d}", "content": result}
+        ]})
+        history.append({"role": "assistant", "content": answer})
+    return history
+
+
+def build_dict(turns: int, result_size: int):
+    history = []
+    for i in range(turns):
+        question, tool_input, result, answer = turn_payload(i, result_size)
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": [
+            {"type": "text", "text": "Arıyorum."},
+            {"type": "tool_use", "id": f"toolu_{i:08d}", "name": "enuygun_flight_search", "input": tool_input}
+        ]})
+        history.append({"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"toolu_{i:08d}", "content": result}
+        ]})
+        history.append({"role": "assistant", "content": answer})
+    return history
+
+
+def build_compact(turns: int, result_size: int):
+    history = []
+    for i in range(turns):
+        question, tool_input, result, answer = turn_payload(i, result_size)
+        history.append(Message.text("user", question))
+        history.append(Message("assistant", (
+            TextPart("Arıyorum."),
+            ToolUsePart(f"toolu_{i:08d}", "enuygun_flight_search", tool_input)
+        )))
+        history.append(Message("user", (ToolResultPart(f"toolu_{i:08d}", result),)))
+        history.append(Message.text("assistant", answer))
+    return history
+
+
+def measure(builder, turns: int, result_size: int) -> int:
+    """Bytes still allocated after building the history."""
+    gc.collect()
+    tracemalloc.start()
+    history = builder(turns, result_size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return current
+
+
+def serialize_legacy(history) -> str:
+    """What PromptLogger did for every prompt before: walk and dump everything."""
+    def walk(content):
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return [walk(item) for item in content]
+        if isinstance(content, dict):
+            return {k: walk(v) for k, v in content.items()}
+        if hasattr(content, "model_dump"):
+            return content.model_dump()
+        return str(content)
+    return json.dumps([{"role": m["role"], "content": walk(m["content"])} for m in history], ensure_ascii=False)
+
+
+def serialize_compact(history) -> str:
+    return "[" + ", ".join(message.to_json() for message in history) + "]"
+
+
+def api_compact(history):
+    """One agent iteration: the memo holds everything but the last tool call and result."""
+    memo = {}
+    to_api_messages(history[:-2], memo)
+    started = time.perf_counter()
+    to_api_messages(history, memo)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--result-size", type=int, default=2000, help="Characters per tool result")
+    args = parser.parse_args()
+
+    question, _, result, answer = turn_payload(0, args.result_size)
+    payload = args.turns * sum(sys.getsizeof(text) for text in (question, result, answer))
+    variants = [("dict", build_dict), ("compact", build_compact)]
+    if TextBlock is not None:
+        variants.insert(0, ("sdk", build_sdk))
+    else:
+        print("(anthropic not installed, skipping the 'sdk' variant)")
+
+    print(f"{args.turns} turns, {args.result_size}-char tool results, ~{payload / 1024:.0f} KiB of text payload\n")
+    print(f"{'variant':<14}{'total KiB':>12}{'overhead KiB':>14}{'bytes/msg':>12}")
+    for name, builder in variants:
+        total = measure(builder, args.turns, args.result_size)
+        overhead = max(0, total - payload)
+        print(f"{name:<14}{total / 1024:>12.0f}{overhead / 1024:>14.0f}{overhead / (args.turns * 4):>12.0f}")
+
+    legacy_history = build_sdk(args.turns, args.result_size) if TextBlock else build_dict(args.turns, args.result_size)
+    compact_history = build_compact(args.turns, args.result_size)
+    print("\nPer-iteration cost for the full history (ms):")
+    print(f"{'':<14}{'prompt log':>12}{'API params':>12}")
+    rows = (
+        ("legacy", serialize_legacy, lambda h: [dict(m) for m in h], legacy_history),
+        ("compact", serialize_compact, api_compact, compact_history),
+    )
+    for name, log_func, api_func, history in rows:
+        timings = []
+        started = time.perf_counter()
+        for _ in range(5):
+            log_func(history)
+        timings.append((time.perf_counter() - started) / 5 * 1000)
+        if api_func is api_compact:
+            timings.append(sum(api_func(history) for _ in range(5)) / 5 * 1000)
+        else:
+            started = time.perf_counter()
+            for _ in range(5):
+                api_func(history)
+            timings.append((time.perf_counter() - started) / 5 * 1000)
+        print(f"{name:<14}{timings[0]:>12.1f}{timings[1]:>12.1f}")
+
+if __name__ == "__main__":
+    main()
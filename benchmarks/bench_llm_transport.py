@@ -0,0 +1,124 @@
+"""First-token latency with the SDK's default HTTP client vs. LLMTransport.
+
+Run from the repository root:
+
+    python benchmarks/bench_llm_transport.py
+    python benchmarks/bench_llm_transport.py --requests 10 --idle-seconds 8 --connect-delay-ms 150
+
+Starts loadtest.fake_anthropic in-process with a per-connection setup
+delay standing in for DNS + TCP + TLS, then sends streamed requests with
+idle gaps between them (like a user reading an answer before the next
+question) and measures the time to the first text token:
+
+  default  AsyncAnthropic's own client (idle connections expire after 5 s)
+  shared   the agent's LLMTransport: longer keep-alive and a startup warm-up
+
+The server's connection counter shows how many handshakes each variant paid.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anthropic import AsyncAnthropic  # noqa: E402
+
+from llm_transport import LLMTransport  # noqa: E402
+from loadtest.fake_anthropic import FakeAnthropicState, serve  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+
+async def first_token_seconds(client: AsyncAnthropic) -> float:
+    """Time until the first streamed text token (the whole stream is read)."""
+    started = time.perf_counter()
+    first = None
+    async with client.messages.stream(
+        model="fake-model",
+        max_tokens=256,
+        messages=[{"role": "user", "content": "İstanbul'dan İzmir'e uçuş ara"}]
+    ) as stream:
+        async for _ in stream.text_stream:
+            if first is None:
+                first = time.perf_counter() - started
+    return first if first is not None else time.perf_counter() - started
+
+
+async def run_variant(name: str, base_url: str, state: FakeAnthropicState, args) -> dict:
+    # Connections opened by the warm-up count too
+    connections_before = state.connections
+    transport = None
+    if name == "shared":
+        transport = LLMTransport(base_url=base_url, api_key="bench", keepalive_expiry=args.keepalive_expiry)
+        if transport.client is None:
+            raise SystemExit("httpx is required for the shared variant")
+        await transport.start()
+        client = AsyncAnthropic(api_key="bench", base_url=base_url, max_retries=0, http_client=transport.client)
+    else:
+        client = AsyncAnthropic(api_key="bench", base_url=base_url, max_retries=0)
+
+    samples = []
+    try:
+        for i in range(args.requests):
+            if i:
+                await asyncio.sleep(args.idle_seconds)
+            samples.append(await first_token_seconds(client))
+    finally:
+        if transport is not None:
+            await transport.close()
+        else:
+            await client.close()
+    return {
+        "name": name,
+        "first_ms": samples[0] * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "connections": state.connections - connections_before,
+        "transport": transport.get_stats() if transport else None
+    }
+
+
+async def main_async(args):
+    state = FakeAnthropicState(
+        [], latency_ms=args.latency_ms, jitter_ms=0.0, output_tokens=50, connect_delay_ms=args.connect_delay_ms
+    )
+    server = serve("127.0.0.1", args.port, state)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = [await run_variant(name, base_url, state, args) for name in ("default", "shared")]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(
+        f"{args.requests} streamed requests, {args.idle_seconds:g} s idle between them, "
+        f"{args.connect_delay_ms:g} ms connection setup, {args.latency_ms:g} ms server latency\n"
+    )
+    print(f"{'variant':<10}{'first ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'connections':>13}")
+    for r in results:
+        print(f"{r['name']:<10}{r['first_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['connections']:>13}")
+    stats = results[1]["transport"]
+    print(
+        f"\nshared transport: {stats['requests']} requests, {stats['warmups']} warm-ups "
+        f"({stats['warmup_connections']} connections opened), "
+        f"reuse ratio {stats['reuse_ratio']}, HTTP versions {stats['http_versions']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=6)
+    parser.add_argument("--idle-seconds", type=float, default=6.0, help="Pause between requests")
+    parser.add_argument("--connect-delay-ms", type=float, default=100.0, help="Simulated connection setup")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Server latency before the first token")
+    parser.add_argument("--keepalive-expiry", type=float, default=60.0, help="Keep-alive of the shared transport")
+    parser.add_argument("--port", type=int, default=9150)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""p95 tool latency per tool: JSONL parsing vs. the columnar export.
+
+Run from the repository root:
+
+    python benchmarks/bench_log_export.py --turns 5000
+    python benchmarks/bench_log_export.py --turns 5000 --format arrow
+
+Writes a synthetic session log (every turn is a prompt carrying the
+growing conversation history, a tool-use response, a tool execution and
+a final response, like the agent writes them), then times:
+
+  jsonl    parsing every line and computing the percentiles in Python
+  export   the one-off conversion with log_export.LogExporter
+  query    the same aggregate with log_export.LogQuery
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_export import LogExporter, LogQuery  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+TOOLS = ("enuygun_flight_search", "enuygun_hotel_search", "enuygun_bus_search")
+
+
+def write_log(path: Path, turns: int, history_turns: int, result_size: int):
+    """Write a synthetic session log; prompts carry up to history_turns earlier turns."""
+    rng = random.Random(0)
+    timestamp = datetime.now() - timedelta(days=1)
+    history = []
+    with open(path, "w", encoding="utf-8") as f:
+        def write(entry):
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        for i in range(turns):
+            tool = rng.choice(TOOLS)
+            result = ("{'flights': [" + "x" * result_size)[:result_size] + "]}"
+            history = history[-4 * history_turns:] + [{"role": "user", "content": f"{i}. gün için uçuş ara"}]
+            for step in range(2):
+                timestamp += timedelta(seconds=1)
+                write({
+                    "timestamp": timestamp.isoformat(), "type": "prompt", "model": "claude-3-5-sonnet-20241022",
+                    "temperature": 0.7, "max_tokens": 4096, "system_message": "Sen bir seyahat asistanısın.",
+                    "tools_count": 12, "messages": history
+                })
+                write({
+                    "timestamp": timestamp.isoformat(), "type": "response",
+                    "stop_reason": "tool_use" if step == 0 else "end_turn",
+                    "content": [{"type": "text", "text": "Arıyorum."}],
+                    "usage": {"input_tokens": 1500 + 40 * len(history), "output_tokens": 120},
+                    "model": "claude-3-5-sonnet-20241022", "latency_ms": rng.uniform(400, 2500)
+                })
+                if step == 0:
+                    write({
+                        "timestamp": timestamp.isoformat(), "type": "tool_execution", "tool_name": tool,
+                        "tool_input": {"origin": "IST", "destination": "ADB"}, "result": result,
+                        "success": rng.random() > 0.05, "duration_ms": rng.lognormvariate(6.5, 0.6)
+                    })
+                    history = history + [
+                        {"role": "assistant", "content": [{"type": "tool_use", "id": f"t{i}", "name": tool, "input": {}}]},
+                        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": f"t{i}", "content": result}]}
+                    ]
+            history.append({"role": "assistant", "content": "En uygun uçuş 08:30 kalkışlı."})
+
+
+def p95_from_jsonl(path: Path):
+    """The aggregate as it had to be done before: parse every line."""
+    durations = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["type"] == "tool_execution" and entry.get("duration_ms") is not None:
+                durations[entry["tool_name"]].append(entry["duration_ms"])
+    return {tool: percentile(values, 95) for tool, values in durations.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--history-turns", type=int, default=5, help="Earlier turns kept in each logged prompt")
+    parser.add_argument("--result-size", type=int, default=2000, help="Characters per tool result")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per aggregate (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp) / "logs"
+        log_dir.mkdir()
+        log_path = log_dir / "session_20250101_000000.jsonl"
+        write_log(log_path, args.turns, args.history_turns, args.result_size)
+        log_mib = log_path.stat().st_size / 2 ** 20
+
+        started = time.perf_counter()
+        LogExporter(str(log_dir), file_format=args.format).export()
+        export_s = time.perf_counter() - started
+        out_dir = log_dir / "columnar"
+        columnar_mib = sum(p.stat().st_size for p in out_dir.rglob("*") if p.is_file()) / 2 ** 20
+
+        jsonl_s = min(_timed(p95_from_jsonl, log_path) for _ in range(args.repeat))
+        query = LogQuery(str(out_dir))
+        query_s = min(_timed(query.tool_latency) for _ in range(args.repeat))
+
+    print(f"{args.turns} turns, {log_mib:.1f} MiB of JSONL -> {columnar_mib:.2f} MiB of {args.format}\n")
+    print(f"{'variant':<10}{'ms':>12}")
+    print(f"{'jsonl':<10}{jsonl_s * 1000:>12.1f}")
+    print(f"{'export':<10}{export_s * 1000:>12.1f}   (once per new log line)")
+    print(f"{'query':<10}{query_s * 1000:>12.1f}   ({jsonl_s / query_s:.0f}x faster than jsonl)")
+
+
+def _timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Per-call latency of the native streamable HTTP transport vs the mcp-remote bridge.
+
+Run from the repository root (the bridge variant needs Node.js / npx):
+
+    python benchmarks/bench_mcp_transport.py --calls 200
+    python benchmarks/bench_mcp_transport.py --calls 200 --records 50 --skip-bridge
+
+A local HTTP MCP test server (loadtest.fake_mcp_server with zero tool
+latency) is started once. The same MCPClient then connects to it with:
+
+  http    native streamable HTTP transport with a pooled keep-alive client
+  bridge  stdio to ``npx -y mcp-remote <url>``, which relays to the same server
+  stdio   the test server spawned directly over stdio (no network, reference)
+
+and times connect + initialize and sequential ``flight_search`` calls.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_client import MCPClient  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+ARGUMENTS = {"origin": "IST", "destination": "ADB", "departure_date": "2025-11-20"}
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    """Block until the test server accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Test server did not start on port {port}")
+
+
+async def measure(label: str, server_config: Dict[str, Any], calls: int) -> Dict[str, Any]:
+    """Connect with one transport and time sequential tool calls."""
+    client = MCPClient({"bench": {**server_config, "timeout": 60}})
+    started = time.perf_counter()
+    await client.connect()
+    connect_ms = (time.perf_counter() - started) * 1000
+    if "bench" not in client.sessions:
+        await client.disconnect()
+        return {"label": label, "error": "connection failed"}
+
+    # Warm-up: first calls pay for lazy imports and connection setup
+    for _ in range(5):
+        await client.call_tool("bench", "flight_search", ARGUMENTS)
+
+    latencies = []
+    for _ in range(calls):
+        call_started = time.perf_counter()
+        await client.call_tool("bench", "flight_search", ARGUMENTS)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    await client.disconnect()
+
+    return {
+        "label": label,
+        "connect_ms": connect_ms,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": sum(latencies) / len(latencies)
+    }
+
+
+async def run(args):
+    url = f"http://127.0.0.1:{args.port}/mcp"
+    fake_server = [
+        sys.executable, "-m", "loadtest.fake_mcp_server",
+        "--latency-ms", "0", "--jitter-ms", "0", "--records", str(args.records)
+    ]
+    variants = [("http", {"transport": "streamable_http", "url": url})]
+    if not args.skip_bridge:
+        variants.append(("bridge", {"command": "npx", "args": ["-y", "mcp-remote", url, "--allow-http"]}))
+    variants.append(("stdio", {"command": fake_server[0], "args": fake_server[1:]}))
+
+    server = subprocess.Popen(
+        fake_server + ["--transport", "streamable-http", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(args.port)
+        results = [await measure(label, config, args.calls) for label, config in variants]
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.calls} sequential calls, {args.records} records per result")
+    print(f"{'transport':<10}{'connect ms':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['label']:<10}  {result['error']}")
+            continue
+        print(
+            f"{result['label']:<10}{result['connect_ms']:>12.1f}{result['p50']:>10.2f}"
+            f"{result['p95']:>10.2f}{result['p99']:>10.2f}{result['mean']:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--records", type=int, default=20, help="Records per tool result")
+    parser.add_argument("--port", type=int, default=9250)
+    parser.add_argument("--skip-bridge", action="store_true", help="Do not run the npx mcp-remote variant")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
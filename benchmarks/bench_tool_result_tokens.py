@@ -0,0 +1,145 @@
+"""Token reduction of tool-result normalization on recorded tool outputs.
+
+Run from the repository root:
+
+    python benchmarks/bench_tool_result_tokens.py logs/session_*.jsonl
+    python benchmarks/bench_tool_result_tokens.py --synthetic 40
+    python benchmarks/bench_tool_result_tokens.py logs/session_*.jsonl --count-tokens
+
+Every ``tool_execution`` entry in the session logs holds ``str(result)``,
+which is exactly what used to be added to the history. Each one is run
+through tool_results.normalize_tool_result in the "json" and "table"
+modes and the sizes are compared per tool. Tokens are estimated as
+characters / 4 unless ``--count-tokens`` is given, which asks the
+Anthropic token counting endpoint (needs ANTHROPIC_API_KEY).
+
+``--synthetic N`` builds Enuygun-like flight and hotel results with N
+records each, for when no logs are at hand.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tool_results import normalize_tool_result  # noqa: E402
+
+MODES = ("json", "table")
+
+
+def load_results(paths: List[str]) -> List[Tuple[str, str]]:
+    """(tool_name, recorded result) pairs from session logs."""
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("type") == "tool_execution" and entry.get("success", True):
+                    results.append((entry["tool_name"], entry["result"]))
+    return results
+
+
+def synthetic_results(records: int) -> List[Tuple[str, str]]:
+    """Recorded-looking reprs of flight and hotel search results."""
+    flights = {
+        "searchId": "a1b2c3",
+        "currency": "TRY",
+        "flights": [
+            {
+                "airline": ["Pegasus", "AJet", "Türk Hava Yolları"][i % 3],
+                "flightNumber": f"PC{2000 + i}",
+                "origin": "SAW",
+                "destination": "ADB",
+                "departure_time": f"2025-11-20T{6 + i % 16:02d}:{i * 7 % 60:02d}:00",
+                "arrival_time": f"2025-11-20T{7 + i % 16:02d}:{(i * 7 + 15) % 60:02d}:00",
+                "stops": 0,
+                "baggage": "15 kg",
+                "price": {"amount": 1199 + i * 37, "currency": "TRY"},
+                "bookingUrl": f"https://www.enuygun.com/ucak-bileti/rezervasyon/{i}"
+            }
+            for i in range(records)
+        ]
+    }
+    hotels = {
+        "city": "İzmir",
+        "hotels": [
+            {
+                "name": f"Otel {i}",
+                "stars": 3 + i % 3,
+                "district": ["Alsancak", "Konak", "Karşıyaka"][i % 3],
+                "rating": round(7.5 + (i % 20) / 10, 1),
+                "board": "Oda Kahvaltı",
+                "price": {"amount": 2400 + i * 55, "currency": "TRY"},
+                "url": f"https://www.enuygun.com/otel/{i}"
+            }
+            for i in range(records)
+        ]
+    }
+    results = []
+    for tool_name, payload in (("enuygun_flight_search", flights), ("enuygun_hotel_search", hotels)):
+        text = json.dumps(payload, ensure_ascii=False, indent=2)
+        results.append((tool_name, f"meta=None content=[TextContent(type='text', text={text!r}, annotations=None, meta=None)] structuredContent=None isError=False"))
+    return results
+
+
+def token_counter(exact: bool):
+    """Return a function estimating (or counting) the tokens of a text."""
+    if not exact:
+        return lambda text: len(text) / 4
+
+    from anthropic import Anthropic
+    from config import Config
+
+    client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+
+    def count(text: str) -> int:
+        response = client.messages.count_tokens(
+            model=Config.MODEL_NAME,
+            messages=[{"role": "user", "content": text}]
+        )
+        return response.input_tokens
+
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sessions", nargs="*", help="session_*.jsonl files")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Use synthetic results with N records")
+    parser.add_argument("--count-tokens", action="store_true", help="Count tokens with the API instead of chars/4")
+    args = parser.parse_args()
+
+    results = load_results(args.sessions)
+    if args.synthetic:
+        results += synthetic_results(args.synthetic)
+    if not results:
+        parser.error("no tool results found; pass session logs or --synthetic N")
+
+    count = token_counter(args.count_tokens)
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for tool_name, recorded in results:
+        row = totals[tool_name]
+        row["calls"] += 1
+        row["raw"] += count(normalize_tool_result(recorded, mode="raw"))
+        for mode in MODES:
+            row[mode] += count(normalize_tool_result(recorded, mode=mode))
+
+    unit = "tokens" if args.count_tokens else "~tokens"
+    print(f"{'tool':<32}{'calls':>6}{'raw ' + unit:>14}{'json':>10}{'table':>10}{'saved':>8}")
+    grand = defaultdict(float)
+    for tool_name, row in sorted(totals.items()):
+        for key, value in row.items():
+            grand[key] += value
+        saved = 1 - row["table"] / row["raw"] if row["raw"] else 0.0
+        print(f"{tool_name:<32}{int(row['calls']):>6}{row['raw']:>14.0f}{row['json']:>10.0f}{row['table']:>10.0f}{saved:>8.1%}")
+    saved = 1 - grand["table"] / grand["raw"] if grand["raw"] else 0.0
+    print(f"{'total':<32}{int(grand['calls']):>6}{grand['raw']:>14.0f}{grand['json']:>10.0f}{grand['table']:>10.0f}{saved:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
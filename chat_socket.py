@@ -0,0 +1,186 @@
+"""WebSocket chat transport.
+
+One socket is bound to one conversation for its whole lifetime, so a
+multi-turn session pays for the connection once and gets updates pushed
+as they happen. The client sends JSON messages:
+
+    {"type": "message", "message": "...", "id": "m1", "priority": "interactive", "clear_history": false}
+    {"type": "cancel"}
+    {"type": "ping"}
+
+Follow-up messages are queued and run in order after the current turn;
+"cancel" stops the current turn. The server pushes events, each turn's
+events carrying the client's message "id":
+
+    session     {"session_id"} once after connecting
+    turn_start  the turn left the queue and passed admission
+    token       {"text"} streamed answer text (a preview; "done" is authoritative)
+    reset       drop the tokens streamed since turn_start or the last tool_end (the model call is
+                being retried, or the fast model's answer is replaced by the main model's)
+    tool_start  {"tool", "input"}
+    tool_end    {"tool", "is_error", "duration_ms"}
+    done        {"response", "timings"}
+    cancelled   the turn was cancelled; the history records it
+    error       {"status", "message"} and, for 429, "retry_after"
+    heartbeat   sent when nothing else was sent for a while
+    pong        answer to "ping"
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from admission import AdmissionController, AdmissionRejected, estimate_tokens
+from turn_budget import TurnBudget
+
+
+class ChatSocket:
+    """Serve one WebSocket connection bound to one conversation."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        agent: Any,
+        admission: AdmissionController,
+        config: Any,
+        client_id: str,
+        session_id: str
+    ):
+        """
+        Initialize the connection handler (the socket must already be accepted).
+
+        Args:
+            websocket: Accepted WebSocket
+            agent: MCPAgent that runs the turns
+            admission: Admission controller shared with /chat
+            config: Configuration class
+            client_id: Caller identity for rate limiting
+            session_id: Conversation bound to this socket
+        """
+        self.websocket = websocket
+        self.agent = agent
+        self.admission = admission
+        self.config = config
+        self.client_id = client_id
+        self.session_id = session_id
+        self.incoming: asyncio.Queue = asyncio.Queue(maxsize=config.WS_MAX_QUEUED_MESSAGES)
+        self.outgoing: asyncio.Queue = asyncio.Queue()
+        self.current: Optional[asyncio.Task] = None
+
+    def emit(self, event: Dict[str, Any]):
+        """Queue an event for the client."""
+        self.outgoing.put_nowait(event)
+
+    async def run(self):
+        """Serve the connection until the client disconnects."""
+        self.emit({"type": "session", "session_id": self.session_id})
+        sender = asyncio.create_task(self._send_loop())
+        worker = asyncio.create_task(self._turn_loop())
+        try:
+            await self._receive_loop()
+        finally:
+            # Cancelling the worker cancels a running turn, which closes it in the history
+            worker.cancel()
+            sender.cancel()
+            await asyncio.gather(worker, sender, return_exceptions=True)
+
+    async def _receive_loop(self):
+        """Read client messages until the socket closes."""
+        while True:
+            try:
+                data = await self.websocket.receive_json()
+            except WebSocketDisconnect:
+                return
+            except (ValueError, KeyError):
+                # Invalid JSON, or a binary frame
+                self.emit({"type": "error", "status": 400, "message": "Messages must be JSON objects"})
+                continue
+            if not isinstance(data, dict):
+                self.emit({"type": "error", "status": 400, "message": "Messages must be JSON objects"})
+                continue
+
+            kind = data.get("type")
+            if kind == "message":
+                self._enqueue(data)
+            elif kind == "cancel":
+                if self.current is not None and not self.current.done():
+                    self.current.cancel()
+            elif kind == "ping":
+                self.emit({"type": "pong"})
+            else:
+                self.emit({"type": "error", "status": 400, "message": f"Unknown message type: {kind}"})
+
+    def _enqueue(self, data: Dict[str, Any]):
+        """Queue a chat message, or tell the client why it was refused."""
+        message = data.get("message")
+        if not isinstance(message, str) or not message.strip():
+            self.emit({"type": "error", "id": data.get("id"), "status": 400, "message": "'message' must be a non-empty string"})
+            return
+        if data.get("priority", "interactive") not in ("interactive", "batch"):
+            self.emit({"type": "error", "id": data.get("id"), "status": 400, "message": "'priority' must be interactive or batch"})
+            return
+        try:
+            self.incoming.put_nowait(data)
+        except asyncio.QueueFull:
+            self.emit({"type": "error", "id": data.get("id"), "status": 429, "message": "Too many queued messages on this connection"})
+
+    async def _turn_loop(self):
+        """Run queued messages one turn at a time."""
+        while True:
+            request = await self.incoming.get()
+            turn = asyncio.create_task(self._turn(request))
+            self.current = turn
+            try:
+                # wait() does not raise when only the turn was cancelled by the client
+                await asyncio.wait({turn})
+            finally:
+                if not turn.done():
+                    # The connection is closing; let the turn record its cancellation
+                    turn.cancel()
+                    await asyncio.wait({turn})
+                self.current = None
+
+    async def _turn(self, request: Dict[str, Any]):
+        """Run one turn and push its events."""
+        turn_id = request.get("id")
+
+        def emit(event: Dict[str, Any]):
+            self.emit({**event, "id": turn_id})
+
+        # Like /chat, the budget starts when the turn is picked up, so admission counts against it
+        budget = TurnBudget.from_config(self.config)
+        message = request["message"]
+        try:
+            waiting = time.monotonic()
+            async with self.admission.admit(
+                self.client_id,
+                request.get("priority", "interactive"),
+                estimate_tokens(message, self.config.ADMISSION_BASE_TOKENS)
+            ):
+                budget.record("admission", time.monotonic() - waiting)
+                if request.get("clear_history"):
+                    await self.agent.clear_history(self.session_id)
+                emit({"type": "turn_start"})
+                response = await self.agent.chat(
+                    message, self.session_id, budget=budget, on_event=emit,
+                    priority=request.get("priority", "interactive")
+                )
+                emit({"type": "done", "response": response, "timings": budget.report()})
+        except AdmissionRejected as e:
+            emit({"type": "error", "status": 429, "message": e.reason, "retry_after": e.retry_after_header})
+        except asyncio.CancelledError:
+            emit({"type": "cancelled"})
+            raise
+        except Exception as e:
+            print(f"WebSocket chat error: {e}")
+            emit({"type": "error", "status": 500, "message": str(e)})
+
+    async def _send_loop(self):
+        """Send queued events, and a heartbeat whenever the connection was quiet."""
+        while True:
+            try:
+                event = await asyncio.wait_for(self.outgoing.get(), timeout=self.config.WS_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                event = {"type": "heartbeat"}
+            await self.websocket.send_json(event)
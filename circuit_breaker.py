@@ -0,0 +1,115 @@
+"""Circuit breaker for MCP servers whose calls keep timing out."""
+import time
+from typing import Any, Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the server's circuit is open."""
+
+    def __init__(self, server_name: str, retry_after: float):
+        """
+        Initialize the error.
+
+        Args:
+            server_name: Server whose circuit is open
+            retry_after: Seconds until the circuit allows a trial call
+        """
+        super().__init__(
+            f"Server {server_name} is unavailable after repeated timeouts; "
+            f"retry in {retry_after:.0f}s"
+        )
+        self.server_name = server_name
+        self.retry_after = retry_after
+
+    def to_result(self) -> Dict[str, Any]:
+        """Structured result returned to the model instead of a tool output."""
+        return {
+            "error": "circuit_open",
+            "server": self.server_name,
+            "retry_after_seconds": round(self.retry_after, 1),
+            "retryable": False,
+            "message": str(self)
+        }
+
+
+class CircuitBreaker:
+    """
+    Three-state circuit breaker (closed, open, half-open).
+
+    The circuit opens after `failure_threshold` consecutive failures and
+    rejects calls for `reset_timeout` seconds. After that a single trial
+    call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Name of the protected server
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_progress = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or a trial call is already running)
+        """
+        if self.state == self.CLOSED:
+            return
+
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == self.OPEN and elapsed >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN and not self.trial_in_progress:
+            self.trial_in_progress = True
+            return
+
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self):
+        """Record a call that completed in time."""
+        self.consecutive_failures = 0
+        self.trial_in_progress = False
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        """Record a call that timed out."""
+        self.consecutive_failures += 1
+        self.trial_in_progress = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_aborted(self):
+        """Record a call that was cancelled before its outcome was known."""
+        self.trial_in_progress = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the breaker state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
@@ -1,4 +1,5 @@
 """Configuration settings for the MCP AI Agent."""
+import json
 import os
 from dotenv import load_dotenv
 
@@ -6,21 +7,70 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def load_servers_file(path: str) -> dict:
+    """Load MCP server configurations from a JSON file (server name -> config)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
 class Config:
     """Configuration class for agent settings."""
     
     # Anthropic API settings
     ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+    # Alternative API endpoint, e.g. the load-test stand-in (python -m loadtest.fake_anthropic)
+    ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")
     MODEL_NAME = os.getenv("MODEL_NAME", "claude-3-5-sonnet-20241022")
+    # Faster model for tool-planning iterations (see model_routing.py); empty disables routing
+    FAST_MODEL_NAME = os.getenv("FAST_MODEL_NAME", "claude-3-5-haiku-20241022")
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4096"))
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
     
+    # Wall-clock budget of one chat turn (see turn_budget.py); 0 disables it.
+    # The reserve is kept for a final tool-less answer from what was gathered.
+    TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", "90"))
+    TURN_FINAL_ANSWER_RESERVE = float(os.getenv("TURN_FINAL_ANSWER_RESERVE", "15"))
+    
+    # LLM call resilience (see llm_resilience.py)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+    LLM_REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", "120"))
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+    
+    # Shared HTTP connection pool of the LLM client (see llm_transport.py).
+    # HTTP/2 is used only if the h2 package is installed. Warm-up opens
+    # connections at startup and, if LLM_REWARM_AFTER_IDLE > 0, after that many
+    # idle seconds (keep it below the keep-alive expiry); 0 connections disables it.
+    LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+    LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+    LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+    LLM_WARMUP_CONNECTIONS = int(os.getenv("LLM_WARMUP_CONNECTIONS", "1"))
+    LLM_REWARM_AFTER_IDLE = float(os.getenv("LLM_REWARM_AFTER_IDLE", "0"))
+    
     # MCP Server configurations
     MCP_SERVERS = {
         # Enuygun - Seyahat aramaları (uçak, otel, otobüs, araba)
         "enuygun": {
+            # Doğrudan streamable HTTP bağlantısı (npx mcp-remote köprüsüne gerek yok).
+            # Kurulu mcp paketi bu transport'u sağlamıyorsa aşağıdaki köprü komutu kullanılır.
+            "transport": "streamable_http",
+            "url": "https://mcp.enuygun.com/mcp",
             "command": "npx",
-            "args": ["-y", "mcp-remote", "https://mcp.enuygun.com/mcp"]
+            "args": ["-y", "mcp-remote", "https://mcp.enuygun.com/mcp"],
+            # Çağrı zaman aşımları (saniye)
+            "timeout": 45,
+            "tool_timeouts": {
+                "flight_search": 60,
+                "hotel_search": 60
+            },
+            # Tablo olarak gösterilecek alanlar (isteğe bağlı, noktalı yollar), örn.
+            # "flight_search": ["airline", "departure_time", "arrival_time", "price.amount"]
+            "result_fields": {}
         }
         
         # İsterseniz diğer sunucuları da ekleyebilirsiniz:
@@ -30,6 +80,75 @@ class Config:
         # }
     }
     
+    # JSON file that replaces MCP_SERVERS when set (e.g. loadtest/servers.json).
+    # Needed for hot reload: POST /servers/reload re-reads it without a restart.
+    MCP_SERVERS_FILE = os.getenv("MCP_SERVERS_FILE")
+    if MCP_SERVERS_FILE:
+        MCP_SERVERS = load_servers_file(MCP_SERVERS_FILE)
+    
+    # Conversation storage (see conversation_store.py): "sqlite" or "memory"
+    CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "sqlite")
+    CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.sqlite3")
+    CONVERSATION_IDLE_SECONDS = float(os.getenv("CONVERSATION_IDLE_SECONDS", "600"))
+    CONVERSATION_MAX_LOADED_TURNS = int(os.getenv("CONVERSATION_MAX_LOADED_TURNS", "50"))
+    
+    # Default MCP call deadline and circuit breaker settings
+    MCP_DEFAULT_TIMEOUT = float(os.getenv("MCP_DEFAULT_TIMEOUT", "60"))
+    MCP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("MCP_CIRCUIT_FAILURE_THRESHOLD", "3"))
+    MCP_CIRCUIT_RESET_TIMEOUT = float(os.getenv("MCP_CIRCUIT_RESET_TIMEOUT", "30"))
+    
+    # Fair scheduling of calls per MCP server (see tool_scheduler.py): concurrent
+    # requests per server (a server config may set "max_outstanding") and the
+    # calls each interactive / batch session gets per round-robin round
+    MCP_MAX_OUTSTANDING = int(os.getenv("MCP_MAX_OUTSTANDING", "8"))
+    MCP_WEIGHT_INTERACTIVE = float(os.getenv("MCP_WEIGHT_INTERACTIVE", "4"))
+    MCP_WEIGHT_BATCH = float(os.getenv("MCP_WEIGHT_BATCH", "1"))
+    
+    # On a hot reload, seconds a replaced or removed server gets to finish its in-flight calls
+    MCP_DRAIN_TIMEOUT = float(os.getenv("MCP_DRAIN_TIMEOUT", "120"))
+    
+    # Connection pool of HTTP-transport MCP servers (per server)
+    MCP_HTTP_MAX_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_CONNECTIONS", "10"))
+    MCP_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MCP_HTTP_KEEPALIVE_EXPIRY", "120"))
+    
+    # Lifetime of cached MCP resources on servers that do not send change notifications
+    MCP_RESOURCE_CACHE_TTL = float(os.getenv("MCP_RESOURCE_CACHE_TTL", "300"))
+    
+    # How tool results enter the history (see tool_results.py):
+    # "table" (record lists as compact tables), "json" (minified JSON) or "raw" (str(result))
+    TOOL_RESULT_FORMAT = os.getenv("TOOL_RESULT_FORMAT", "table")
+    
+    # Shared MCP gateway (see mcp_gateway.py). When set, API workers talk to
+    # the gateway over this Unix socket instead of spawning their own servers.
+    MCP_GATEWAY_SOCKET = os.getenv("MCP_GATEWAY_SOCKET")
+    
+    # API server settings
+    API_HOST = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    
+    # WebSocket chat (see chat_socket.py): heartbeat after this many quiet seconds,
+    # and follow-up messages a connection may queue behind the running turn
+    WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "15"))
+    WS_MAX_QUEUED_MESSAGES = int(os.getenv("WS_MAX_QUEUED_MESSAGES", "8"))
+    
+    # Admission control for /chat (see admission.py)
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+    ADMISSION_BASE_TOKENS = int(os.getenv("ADMISSION_BASE_TOKENS", "1500"))
+    
+    # Per-client token buckets (0 disables the limit). Clients are identified by
+    # their address; the X-Client-ID header is only trusted from these proxy
+    # addresses (comma-separated), since any other caller could rotate it
+    CLIENT_ID_TRUSTED_PROXIES = {
+        address.strip() for address in os.getenv("CLIENT_ID_TRUSTED_PROXIES", "").split(",") if address.strip()
+    }
+    CLIENT_REQUESTS_PER_MINUTE = float(os.getenv("CLIENT_REQUESTS_PER_MINUTE", "30"))
+    CLIENT_REQUEST_BURST = float(os.getenv("CLIENT_REQUEST_BURST", "10"))
+    CLIENT_TOKENS_PER_MINUTE = float(os.getenv("CLIENT_TOKENS_PER_MINUTE", "60000"))
+    CLIENT_TOKEN_BURST = float(os.getenv("CLIENT_TOKEN_BURST", "20000"))
+    
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
@@ -38,4 +157,9 @@ class Config:
                 "ANTHROPIC_API_KEY is required. "
                 "Please set it in your .env file or environment variables."
             )
+        if cls.API_WORKERS > 1 and not cls.MCP_GATEWAY_SOCKET:
+            raise ValueError(
+                "API_WORKERS > 1 requires MCP_GATEWAY_SOCKET. "
+                "Start 'python mcp_gateway.py' and point the workers at its socket."
+            )
 
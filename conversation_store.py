@@ -0,0 +1,174 @@
+"""Pluggable storage for conversation histories.
+
+The agent keeps only active sessions in memory. Every message is appended
+to the store as soon as it is produced, so a restart loses nothing, and
+idle sessions can be dropped from RAM and lazily reloaded (most recent
+turns only) when they become active again.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from messages import Message
+
+
+def _recent_turns(messages: List[Message], max_turns: Optional[int]) -> List[Message]:
+    """Cut a history down to its last `max_turns` turns."""
+    if not max_turns:
+        return list(messages)
+    starts = [i for i, message in enumerate(messages) if message.is_turn_start]
+    if len(starts) <= max_turns:
+        return list(messages)
+    return list(messages[starts[-max_turns]:])
+
+
+class ConversationStore(ABC):
+    """Interface for conversation stores."""
+
+    @abstractmethod
+    def load(self, session_id: str, max_turns: Optional[int] = None) -> List[Message]:
+        """
+        Load a session's history.
+
+        Args:
+            session_id: Conversation identifier
+            max_turns: Only load the most recent turns (None loads everything)
+
+        Returns:
+            List of messages
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[Message]):
+        """Append messages to a session."""
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        """Delete all messages of a session."""
+
+    def close(self):
+        """Release resources held by the store."""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store; histories are lost on restart."""
+
+    def __init__(self):
+        """Initialize the in-memory store."""
+        self.histories: Dict[str, List[Message]] = {}
+
+    def load(self, session_id: str, max_turns: Optional[int] = None) -> List[Message]:
+        return _recent_turns(self.histories.get(session_id, []), max_turns)
+
+    def append(self, session_id: str, messages: List[Message]):
+        self.histories.setdefault(session_id, []).extend(messages)
+
+    def clear(self, session_id: str):
+        self.histories.pop(session_id, None)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite store that appends messages incrementally, one row per message."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the SQLite store.
+
+        Args:
+            path: Database file path
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        # Used from worker threads via asyncio.to_thread; access is serialized by the lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    turn_start INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS messages_turns
+                ON messages (session_id, turn_start, seq)
+                """
+            )
+
+    def load(self, session_id: str, max_turns: Optional[int] = None) -> List[Message]:
+        with self.lock:
+            start_seq = 0
+            if max_turns:
+                row = self.conn.execute(
+                    """
+                    SELECT MIN(seq) FROM (
+                        SELECT seq FROM messages
+                        WHERE session_id = ? AND turn_start = 1
+                        ORDER BY seq DESC LIMIT ?
+                    )
+                    """,
+                    (session_id, max_turns)
+                ).fetchone()
+                if row and row[0] is not None:
+                    start_seq = row[0]
+            rows = self.conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                (session_id, start_seq)
+            ).fetchall()
+        return [Message.from_json(role, content) for role, content in rows]
+
+    def append(self, session_id: str, messages: List[Message]):
+        if not messages:
+            return
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) FROM messages WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            next_seq = row[0] + 1
+            self.conn.executemany(
+                """
+                INSERT INTO messages (session_id, seq, role, content, turn_start, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        session_id,
+                        next_seq + i,
+                        message.role,
+                        message.content_json(),
+                        int(message.is_turn_start),
+                        now
+                    )
+                    for i, message in enumerate(messages)
+                ]
+            )
+
+    def clear(self, session_id: str):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def create_store(config) -> ConversationStore:
+    """Create the conversation store selected by Config.CONVERSATION_STORE."""
+    if config.CONVERSATION_STORE == "sqlite":
+        return SQLiteConversationStore(config.CONVERSATION_DB_PATH)
+    if config.CONVERSATION_STORE == "memory":
+        return InMemoryConversationStore()
+    raise ValueError(f"Unknown conversation store: {config.CONVERSATION_STORE}")
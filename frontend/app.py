@@ -7,6 +7,8 @@ import openai
 from typing import Dict, Any
 import re
 
+from plan_cache import PlanCache
+
 # API endpoint
 API_URL = "http://localhost:8000/chat"
 
@@ -90,21 +92,21 @@ SADECE JSON yanıtı ver, başka bir şey yazma."""
         # Hata durumunda basit bir yanıt dön
         return travel_info, "Bir hata oluştu. Lütfen tekrar deneyin.", False
 
-def get_travel_recommendations(travel_info: Dict[str, Any]) -> str:
+def generate_travel_plan(destination_city: str, duration: int) -> str:
     """
-    Get travel recommendations from OpenAI.
+    Generate a travel plan with OpenAI (no caching, raises on error).
     
     Args:
-        travel_info: Travel information dictionary
+        destination_city: Destination city
+        duration: Length of stay in days
         
     Returns:
-        Travel recommendations
+        Travel plan text
     """
-    try:
-        prompt = f"""Lütfen aşağıdaki seyahat bilgileri için detaylı bir gezi planı oluştur:
+    prompt = f"""Lütfen aşağıdaki seyahat bilgileri için detaylı bir gezi planı oluştur:
 
-- Gidilecek Şehir: {travel_info['destination_city']}
-- Kalış Süresi: {travel_info['duration']} gün
+- Gidilecek Şehir: {destination_city}
+- Kalış Süresi: {duration} gün
 
 Lütfen şunları içeren bir plan hazırla:
 1. Günlük gezilecek yerler ve aktiviteler
@@ -113,15 +115,37 @@ Lütfen şunları içeren bir plan hazırla:
 4. Tahmini bütçe
 """
 
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "Sen profesyonel bir seyahat danışmanısın. Türkçe yanıt ver."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+    response = client.chat.completions.create(
+        model="gpt-4-turbo-preview",
+        messages=[
+            {"role": "system", "content": "Sen profesyonel bir seyahat danışmanısın. Türkçe yanıt ver."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    
+    return response.choices[0].message.content
+
+@st.cache_resource
+def get_plan_cache() -> PlanCache:
+    """Return the plan cache shared by all Streamlit sessions of this process."""
+    return PlanCache()
+
+def get_travel_recommendations(travel_info: Dict[str, Any]) -> str:
+    """
+    Get travel recommendations from the plan cache or OpenAI.
+    
+    Args:
+        travel_info: Travel information dictionary
         
-        return response.choices[0].message.content
+    Returns:
+        Travel recommendations
+    """
+    try:
+        return get_plan_cache().get_or_create(
+            travel_info['destination_city'],
+            travel_info['duration'],
+            generate_travel_plan
+        )
         
     except Exception as e:
         st.error(f"OpenAI API hatası: {str(e)}")
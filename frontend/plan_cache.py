@@ -0,0 +1,326 @@
+"""Persistent SQLite cache for generated travel plans.
+
+Plans only depend on the destination city and the trip duration, so the
+same itinerary can be served to every user who asks for it.  The cache is
+a local SQLite file, which makes it shared between Streamlit sessions and
+between processes running on the same machine.
+
+Warm-up (pre-generate plans for the most requested destinations):
+
+    python plan_cache.py warm --top 10 --durations 2 3 5 7
+"""
+import argparse
+import math
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+# Varsayılan ayarlar (ortam değişkenleri ile değiştirilebilir)
+PLAN_CACHE_PATH = os.getenv(
+    "PLAN_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_cache.sqlite3")
+)
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "500"))
+
+# Henüz istatistik yokken ısındırma için kullanılan popüler şehirler
+DEFAULT_POPULAR_DESTINATIONS = [
+    "İstanbul", "Antalya", "İzmir", "Ankara", "Muğla",
+    "Bodrum", "Trabzon", "Nevşehir", "Bursa", "Gaziantep"
+]
+DEFAULT_WARM_DURATIONS = [2, 3, 5, 7]
+
+
+def normalize_destination(city: str) -> str:
+    """
+    Normalize a destination name for use as a cache key.
+
+    Diacritics are stripped after NFKD and the dotless "ı" is folded to "i",
+    so "İstanbul", "Istanbul", "ISTANBUL" and "Nevşehir"/"Nevsehir" share a key.
+    """
+    text = unicodedata.normalize("NFKD", str(city)).strip()
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.replace("ı", "i").lower()
+    return " ".join(text.split())
+
+
+# A number, or a range whose upper bound counts ("2-3"), followed by an optional unit word
+_DURATION_PART = re.compile(r"(\d+(?:[.,]\d+)?)(?:\s*[-–]\s*(\d+(?:[.,]\d+)?))?\s*([^\W\d_]*)")
+# Unit word prefixes, so suffixed forms ("haftalık", "günlük", "gecelik") match too
+_DURATION_UNITS = (
+    ("gün", 1), ("gun", 1), ("gece", 1), ("day", 1), ("night", 1),
+    ("hafta", 7), ("week", 7)
+)
+
+
+def _unit_days(unit: str) -> int:
+    """Days per unit word; a number without a unit counts as days."""
+    if not unit:
+        return 1
+    for prefix, days in _DURATION_UNITS:
+        if unit.startswith(prefix):
+            return days
+    raise ValueError(f"Unknown duration unit: {unit!r}")
+
+
+def normalize_duration(duration) -> int:
+    """
+    Normalize a duration value ("3", 3, "3 gün", "2-3 gün", "2 haftalık", "1 hafta 2 gün") to an integer day count.
+
+    Raises:
+        ValueError: If the duration is not a positive number of days or has an unknown unit
+    """
+    if isinstance(duration, int) and not isinstance(duration, bool):
+        if duration < 1:
+            raise ValueError(f"Invalid duration: {duration!r}")
+        return duration
+    days = 0.0
+    for low, high, unit in _DURATION_PART.findall(str(duration).lower()):
+        days += float((high or low).replace(",", ".")) * _unit_days(unit)
+    if days <= 0:
+        raise ValueError(f"Invalid duration: {duration!r}")
+    # Part days ("3.5") need a plan for the whole last day
+    return math.ceil(days)
+
+
+class PlanCache:
+    """SQLite-backed plan cache with TTL and size limits."""
+
+    def __init__(
+        self,
+        path: str = PLAN_CACHE_PATH,
+        ttl_seconds: int = PLAN_CACHE_TTL_SECONDS,
+        max_entries: int = PLAN_CACHE_MAX_ENTRIES
+    ):
+        """
+        Initialize the plan cache.
+
+        Args:
+            path: SQLite database file
+            ttl_seconds: How long a stored plan stays valid
+            max_entries: Maximum number of stored plans (least recently used are evicted)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS plans (
+                    destination TEXT NOT NULL,
+                    duration INTEGER NOT NULL,
+                    display_name TEXT NOT NULL,
+                    plan TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (destination, duration)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS popularity (
+                    destination TEXT PRIMARY KEY,
+                    display_name TEXT NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; WAL mode lets processes read while one writes."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, destination: str, duration) -> Optional[str]:
+        """
+        Return a cached plan, or None if it is missing or expired.
+
+        Every lookup also counts towards the destination's popularity,
+        which drives the warm-up command.
+        """
+        key = normalize_destination(destination)
+        days = normalize_duration(duration)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO popularity (destination, display_name, requests) VALUES (?, ?, 1)
+                ON CONFLICT(destination) DO UPDATE SET requests = requests + 1
+                """,
+                (key, str(destination).strip())
+            )
+            row = conn.execute(
+                "SELECT plan, created_at FROM plans WHERE destination = ? AND duration = ?",
+                (key, days)
+            ).fetchone()
+            if row is None:
+                return None
+
+            plan, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute(
+                    "DELETE FROM plans WHERE destination = ? AND duration = ?",
+                    (key, days)
+                )
+                return None
+
+            conn.execute(
+                "UPDATE plans SET last_access = ? WHERE destination = ? AND duration = ?",
+                (now, key, days)
+            )
+            return plan
+
+    def put(self, destination: str, duration, plan: str):
+        """Store a plan and evict the least recently used entries beyond the size limit."""
+        key = normalize_destination(destination)
+        days = normalize_duration(duration)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO plans
+                    (destination, duration, display_name, plan, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, days, str(destination).strip(), plan, now, now)
+            )
+            conn.execute("DELETE FROM plans WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """
+                DELETE FROM plans WHERE rowid IN (
+                    SELECT rowid FROM plans ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def get_or_create(self, destination: str, duration, generate: Callable[[str, Any], str]) -> str:
+        """
+        Return a cached plan or generate, store and return a new one.
+
+        Durations that cannot be normalized are not cached; the plan is
+        generated for the duration as given.
+        """
+        try:
+            days = normalize_duration(duration)
+        except ValueError:
+            return generate(destination, duration)
+        plan = self.get(destination, days)
+        if plan is None:
+            plan = generate(destination, days)
+            if plan:
+                self.put(destination, days, plan)
+        return plan
+
+    def top_destinations(self, limit: int) -> List[str]:
+        """Return display names of the most requested destinations."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT display_name FROM popularity ORDER BY requests DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def is_fresh(self, destination: str, duration) -> bool:
+        """Check whether a non-expired plan exists without touching popularity stats."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT created_at FROM plans WHERE destination = ? AND duration = ?",
+                (normalize_destination(destination), normalize_duration(duration))
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    def warm_up(
+        self,
+        generate: Callable[[str, int], str],
+        top_n: int = 10,
+        durations: Iterable[int] = DEFAULT_WARM_DURATIONS,
+        destinations: Optional[List[str]] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Pre-generate plans for the top-N destinations.
+
+        Destinations come from recorded popularity and are topped up from
+        DEFAULT_POPULAR_DESTINATIONS. Plans that are still fresh are skipped.
+
+        Returns:
+            List of (destination, duration) pairs that were generated
+        """
+        if destinations is None:
+            destinations = self.top_destinations(top_n)
+            known = {normalize_destination(d) for d in destinations}
+            for city in DEFAULT_POPULAR_DESTINATIONS:
+                if len(destinations) >= top_n:
+                    break
+                if normalize_destination(city) not in known:
+                    destinations.append(city)
+                    known.add(normalize_destination(city))
+
+        generated = []
+        for city in destinations[:top_n]:
+            for days in durations:
+                if self.is_fresh(city, days):
+                    continue
+                plan = generate(city, days)
+                if plan:
+                    self.put(city, days, plan)
+                    generated.append((city, days))
+        return generated
+
+    def stats(self) -> dict:
+        """Return basic cache statistics."""
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            requests = conn.execute("SELECT COALESCE(SUM(requests), 0) FROM popularity").fetchone()[0]
+        return {"entries": entries, "requests": requests, "path": self.path}
+
+
+def main():
+    """Command line interface for the plan cache."""
+    parser = argparse.ArgumentParser(description="Travel plan cache utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm = subparsers.add_parser("warm", help="Pre-generate plans for popular destinations")
+    warm.add_argument("--top", type=int, default=10, help="Number of destinations")
+    warm.add_argument("--durations", type=int, nargs="+", default=DEFAULT_WARM_DURATIONS)
+    warm.add_argument("--destinations", nargs="+", help="Explicit destination list")
+
+    subparsers.add_parser("stats", help="Show cache statistics")
+
+    args = parser.parse_args()
+    cache = PlanCache()
+
+    if args.command == "warm":
+        # app.py içindeki üretici fonksiyonu kullan (OpenAI istemcisi orada)
+        from app import generate_travel_plan
+
+        generated = cache.warm_up(
+            generate_travel_plan,
+            top_n=args.top,
+            durations=args.durations,
+            destinations=args.destinations
+        )
+        for city, days in generated:
+            print(f"✓ {city} - {days} gün")
+        print(f"{len(generated)} plan oluşturuldu.")
+    elif args.command == "stats":
+        for key, value in cache.stats().items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Retry, hedging and deadline policy for LLM calls.
+
+Wraps a single ``messages.create`` call so that retryable upstream errors
+are retried with jittered exponential backoff, a slow response can be
+hedged with a duplicate request after a p95-based delay (the loser is
+cancelled), and the whole call respects a per-request deadline.
+"""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import anthropic
+
+from metrics import LatencyWindow
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when an LLM call cannot finish within its deadline."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an LLM error is transient and worth retrying."""
+    if isinstance(error, (anthropic.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Server-provided Retry-After delay in seconds, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientLLMCaller:
+    """Execute LLM calls with retries, optional hedging and a deadline."""
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        deadline: float = 120.0,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 2.0,
+        hedge_min_samples: int = 20
+    ):
+        """
+        Initialize the caller.
+
+        Args:
+            max_retries: Retries after the first attempt for retryable errors
+            backoff_base: Base delay for exponential backoff (seconds)
+            backoff_max: Upper bound of a single backoff delay (seconds)
+            deadline: Default deadline for one call including retries (seconds)
+            hedge_enabled: Send a duplicate request when the first one is slow
+            hedge_percentile: Latency percentile used as the hedge delay
+            hedge_min_delay: Lower bound (and warm-up value) of the hedge delay
+            hedge_min_samples: Samples needed before the percentile is trusted
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+
+        self.attempt_latency = LatencyWindow()
+        self.call_latency = LatencyWindow()
+        self.stats = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "deadline_exceeded": 0,
+            "failures": 0
+        }
+
+    @classmethod
+    def from_config(cls, config) -> "ResilientLLMCaller":
+        """Create a caller from the Config class."""
+        return cls(
+            max_retries=config.LLM_MAX_RETRIES,
+            backoff_base=config.LLM_BACKOFF_BASE,
+            backoff_max=config.LLM_BACKOFF_MAX,
+            deadline=config.LLM_REQUEST_DEADLINE,
+            hedge_enabled=config.LLM_HEDGE_ENABLED,
+            hedge_percentile=config.LLM_HEDGE_PERCENTILE,
+            hedge_min_delay=config.LLM_HEDGE_MIN_DELAY
+        )
+
+    def hedge_delay(self) -> float:
+        """Delay before a hedged duplicate is sent."""
+        if len(self.attempt_latency) < self.hedge_min_samples:
+            return self.hedge_min_delay
+        return max(self.hedge_min_delay, self.attempt_latency.percentile(self.hedge_percentile))
+
+    def _backoff(self, retry: int, error: BaseException) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** retry)))
+        server_delay = _retry_after(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        return delay
+
+    async def _timed_attempt(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Run one request and record its latency on success."""
+        self.stats["attempts"] += 1
+        started = time.monotonic()
+        result = await request()
+        self.attempt_latency.record(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, request: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        """One logical attempt, hedged with a duplicate request if it runs slow."""
+        primary = asyncio.create_task(self._timed_attempt(request))
+        delay = self.hedge_delay()
+        if not self.hedge_enabled or delay >= timeout:
+            try:
+                return await asyncio.wait_for(primary, timeout=timeout)
+            except asyncio.TimeoutError:
+                raise LLMDeadlineExceeded(f"LLM call exceeded deadline of {timeout:.1f}s")
+
+        started = time.monotonic()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self.stats["hedges"] += 1
+        hedge = asyncio.create_task(self._timed_attempt(request))
+        pending = {primary, hedge}
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise LLMDeadlineExceeded(f"LLM call exceeded deadline of {timeout:.1f}s")
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            # Cancel the loser (or both on deadline/cancellation)
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    async def call(self, request: Callable[[], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+        """
+        Execute an LLM request with retries, hedging and a deadline.
+
+        Args:
+            request: Zero-argument coroutine factory performing one API call
+            deadline: Seconds allowed for the whole call (defaults to the configured deadline)
+
+        Returns:
+            The API response
+
+        Raises:
+            LLMDeadlineExceeded: If the deadline passes before a response arrives
+        """
+        self.stats["calls"] += 1
+        budget = self.deadline if deadline is None else min(deadline, self.deadline)
+        started = time.monotonic()
+        retry = 0
+
+        while True:
+            remaining = budget - (time.monotonic() - started)
+            try:
+                if remaining <= 0:
+                    raise LLMDeadlineExceeded(f"LLM call exceeded deadline of {budget:.1f}s")
+                response = await self._attempt(request, remaining)
+                self.call_latency.record(time.monotonic() - started)
+                return response
+            except LLMDeadlineExceeded:
+                self.stats["deadline_exceeded"] += 1
+                raise
+            except Exception as e:
+                if retry >= self.max_retries or not is_retryable(e):
+                    self.stats["failures"] += 1
+                    raise
+
+                delay = self._backoff(retry, e)
+                if time.monotonic() - started + delay >= budget:
+                    self.stats["failures"] += 1
+                    raise
+                retry += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counters and latency percentiles."""
+        return {
+            **self.stats,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "attempt_latency": self.attempt_latency.summary(),
+            "call_latency": self.call_latency.summary()
+        }
@@ -0,0 +1,215 @@
+"""Shared, pre-warmed HTTP transport of the LLM client.
+
+The Anthropic SDK's default client keeps idle connections for only a few
+seconds, so after a quiet moment the next request pays for DNS, TCP and
+TLS setup before the first token. LLMTransport owns the httpx client
+that AsyncAnthropic uses for every model and caller of the process, with:
+
+  - pool limits and a longer keep-alive expiry,
+  - HTTP/2 when the ``h2`` package is installed (one multiplexed
+    connection instead of one per concurrent request),
+  - an optional warm-up at startup and after idle periods, which opens
+    the connections before a user request needs them,
+  - connection reuse statistics, collected through httpcore's ``trace``
+    request extension (a request that did not connect reused a connection).
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from metrics import LatencyWindow
+
+try:
+    import httpx
+except ImportError:
+    print("Warning: httpx not installed, the LLM client uses the SDK's default transport. Install with: pip install httpx")
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+# Endpoint used to open connections; any answer (even 401) leaves a warm connection behind
+WARMUP_PATH = "/v1/models"
+# Request extension marking warm-up traffic, which is kept out of the statistics and idle tracking
+WARMUP_EXTENSION = "llm_transport_warmup"
+
+
+class LLMTransport:
+    """Connection pool of the LLM client, with warm-up and reuse statistics."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        connect_timeout: float = 10.0,
+        request_timeout: float = 600.0,
+        http2: bool = True,
+        warmup_connections: int = 1,
+        rewarm_after_idle: float = 0.0
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            base_url: API base URL (the public API by default)
+            api_key: API key sent with warm-up requests
+            max_connections: Maximum open connections
+            max_keepalive_connections: Idle connections kept in the pool
+            keepalive_expiry: Seconds an idle connection is kept
+            connect_timeout: Seconds allowed for connection setup
+            request_timeout: Default request timeout (the SDK sets its own per request)
+            http2: Use HTTP/2 when the h2 package is installed
+            warmup_connections: Connections opened by a warm-up (0 disables warm-up)
+            rewarm_after_idle: Warm up again after this many idle seconds (0 disables);
+                keep it below keepalive_expiry so the pool never runs empty
+        """
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.api_key = api_key
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.warmup_connections = warmup_connections
+        self.rewarm_after_idle = rewarm_after_idle
+        self.last_activity = time.monotonic()
+        self.idle_task: Optional[asyncio.Task] = None
+        self.connect_time = LatencyWindow()
+        self.stats = {
+            "requests": 0, "new_connections": 0, "reused_connections": 0,
+            "warmups": 0, "warmup_failures": 0, "warmup_connections": 0
+        }
+        self.http_versions: Dict[str, int] = {}
+
+        self.client = None
+        if httpx is not None:
+            self.client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry
+                ),
+                timeout=httpx.Timeout(request_timeout, connect=connect_timeout),
+                follow_redirects=True,
+                event_hooks={"request": [self._on_request], "response": [self._on_response]}
+            )
+
+    @classmethod
+    def from_config(cls, config: Any) -> "LLMTransport":
+        """Build a transport from the Config class."""
+        return cls(
+            base_url=config.ANTHROPIC_BASE_URL,
+            api_key=config.ANTHROPIC_API_KEY,
+            max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.LLM_HTTP_KEEPALIVE_EXPIRY,
+            connect_timeout=config.LLM_HTTP_CONNECT_TIMEOUT,
+            request_timeout=config.LLM_REQUEST_DEADLINE,
+            http2=config.LLM_HTTP2,
+            warmup_connections=config.LLM_WARMUP_CONNECTIONS,
+            rewarm_after_idle=config.LLM_REWARM_AFTER_IDLE
+        )
+
+    async def _on_request(self, request: "httpx.Request"):
+        """Attach a tracer that notes whether this request had to open a connection."""
+        if not request.extensions.get(WARMUP_EXTENSION):
+            self.last_activity = time.monotonic()
+        previous = request.extensions.get("trace")
+        state = {"connected": False, "started": None}
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.started":
+                state["started"] = time.monotonic()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                state["connected"] = True
+                state["connect_seconds"] = time.monotonic() - state["started"]
+            if previous is not None:
+                await previous(event_name, info)
+
+        request.extensions["trace"] = trace
+        request.extensions["llm_transport"] = state
+
+    async def _on_response(self, response: "httpx.Response"):
+        """Count the request as reusing or opening a connection."""
+        state = response.request.extensions.get("llm_transport")
+        if state is None:
+            return
+        if response.request.extensions.get(WARMUP_EXTENSION):
+            # Warm-ups only count the connections they opened
+            if state["connected"]:
+                self.stats["warmup_connections"] += 1
+            return
+        self.last_activity = time.monotonic()
+        self.stats["requests"] += 1
+        if state["connected"]:
+            self.stats["new_connections"] += 1
+            self.connect_time.record(state["connect_seconds"])
+        else:
+            self.stats["reused_connections"] += 1
+        version = response.http_version
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+
+    async def warm_up(self) -> bool:
+        """
+        Open connections ahead of the first model call.
+
+        Returns:
+            Whether every warm-up request got an answer (failures are not fatal)
+        """
+        if self.client is None or self.warmup_connections <= 0:
+            return False
+        headers = {"anthropic-version": "2023-06-01"}
+        if self.api_key:
+            headers["x-api-key"] = self.api_key
+
+        async def touch():
+            # Reading the (small) body returns the connection to the pool
+            response = await self.client.get(
+                self.base_url + WARMUP_PATH, headers=headers, extensions={WARMUP_EXTENSION: True}
+            )
+            await response.aread()
+
+        self.stats["warmups"] += 1
+        results = await asyncio.gather(*(touch() for _ in range(self.warmup_connections)), return_exceptions=True)
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        self.stats["warmup_failures"] += failed
+        return failed == 0
+
+    async def start(self):
+        """Warm up at startup and start the idle re-warm loop if configured."""
+        await self.warm_up()
+        if self.client is not None and self.rewarm_after_idle > 0 and self.idle_task is None:
+            self.idle_task = asyncio.create_task(self._rewarm_when_idle())
+
+    async def _rewarm_when_idle(self):
+        """Warm up again whenever no request was made for rewarm_after_idle seconds."""
+        while True:
+            idle = time.monotonic() - self.last_activity
+            if idle >= self.rewarm_after_idle:
+                await self.warm_up()
+                idle = 0.0
+            await asyncio.sleep(self.rewarm_after_idle - idle)
+
+    async def close(self):
+        """Stop the re-warm loop and close all connections."""
+        if self.idle_task is not None:
+            self.idle_task.cancel()
+            await asyncio.gather(self.idle_task, return_exceptions=True)
+            self.idle_task = None
+        if self.client is not None:
+            await self.client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request, connection reuse and connect-time statistics."""
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "reuse_ratio": round(self.stats["reused_connections"] / requests, 3) if requests else None,
+            "http2": self.http2,
+            "http_versions": dict(self.http_versions),
+            "connect_time": self.connect_time.summary()
+        }
@@ -0,0 +1 @@
+"""Load-testing tools: fake Anthropic API, fake MCP server and a load generator."""
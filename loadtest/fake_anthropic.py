@@ -0,0 +1,248 @@
+"""Fake Anthropic Messages API for load tests.
+
+Answers ``POST /v1/messages`` like the real API, without a key or network
+access. Each turn follows a script: while fewer tool results than
+scripted tool calls follow the last plain-text user message, the server
+answers with the next ``tool_use``; after that it returns ``end_turn``
+with a fixed text. Latency (mean + jitter) and output token counts are
+configurable; input tokens are estimated from the request size. Requests
+with ``"stream": true`` get the same message as server-sent events.
+Connections are kept alive; ``--connect-delay-ms`` adds the cost of a
+TLS handshake to every new connection, so connection reuse shows up in
+the measured latency.
+
+    python -m loadtest.fake_anthropic --port 9100 --latency-ms 800 --jitter-ms 200
+    python -m loadtest.fake_anthropic --script loadtest/scripts/flight_and_hotel.json
+
+A script is a JSON list of tool calls, e.g.
+``[{"name": "enuygun_flight_search", "input": {"origin": "IST"}}]``.
+Point the agent at the server with ``ANTHROPIC_BASE_URL=http://127.0.0.1:9100``.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SCRIPT = [
+    {
+        "name": "enuygun_flight_search",
+        "input": {"origin": "IST", "destination": "ADB", "departure_date": "2025-11-20", "adults": 1}
+    }
+]
+
+
+class FakeAnthropicState:
+    """Script and latency settings shared by all request handlers."""
+
+    def __init__(
+        self,
+        script: List[Dict[str, Any]],
+        latency_ms: float = 500.0,
+        jitter_ms: float = 100.0,
+        output_tokens: int = 200,
+        final_text: str = "İşte bulduğum seçenekler.",
+        connect_delay_ms: float = 0.0
+    ):
+        self.script = script
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.output_tokens = output_tokens
+        self.final_text = final_text
+        self.connect_delay_ms = connect_delay_ms
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def delay(self) -> float:
+        """Simulated latency of one request (seconds)."""
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+    @staticmethod
+    def _tool_results_in_turn(messages: List[Dict[str, Any]]) -> int:
+        """Tool results sent since the last plain-text user message."""
+        count = 0
+        for message in reversed(messages):
+            content = message.get("content")
+            if message.get("role") == "user" and isinstance(content, str):
+                break
+            if message.get("role") == "user":
+                count += sum(1 for block in content if block.get("type") == "tool_result")
+        return count
+
+    def respond(self, request: Dict[str, Any], raw_size: int) -> Dict[str, Any]:
+        """Build the response for a Messages API request."""
+        with self.lock:
+            self.requests += 1
+
+        step = self._tool_results_in_turn(request.get("messages") or [])
+        tool_names = {tool.get("name") for tool in request.get("tools") or []}
+        wants_tools = (request.get("tool_choice") or {}).get("type") != "none"
+        next_call: Optional[Dict[str, Any]] = None
+        if wants_tools and step < len(self.script) and self.script[step]["name"] in tool_names:
+            next_call = self.script[step]
+
+        if next_call is not None:
+            content = [{
+                "type": "tool_use",
+                "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                "name": next_call["name"],
+                "input": next_call.get("input", {})
+            }]
+            stop_reason = "tool_use"
+        else:
+            content = [{"type": "text", "text": self.final_text}]
+            stop_reason = "end_turn"
+
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "fake-model"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": raw_size // 4, "output_tokens": self.output_tokens}
+        }
+
+
+def stream_events(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Split a message into the server-sent events of a streamed response."""
+    events = [{
+        "type": "message_start",
+        "message": {
+            **message,
+            "content": [],
+            "stop_reason": None,
+            "usage": {"input_tokens": message["usage"]["input_tokens"], "output_tokens": 1}
+        }
+    }]
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "text":
+            events.append({"type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""}})
+            for word in re.findall(r"\S+\s*", block["text"]):
+                events.append({"type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": word}})
+        else:
+            events.append({"type": "content_block_start", "index": index, "content_block": {**block, "input": {}}})
+            events.append({
+                "type": "content_block_delta",
+                "index": index,
+                "delta": {"type": "input_json_delta", "partial_json": json.dumps(block["input"], ensure_ascii=False)}
+            })
+        events.append({"type": "content_block_stop", "index": index})
+    events.append({
+        "type": "message_delta",
+        "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+        "usage": {"output_tokens": message["usage"]["output_tokens"]}
+    })
+    events.append({"type": "message_stop"})
+    return events
+
+
+def make_handler(state: FakeAnthropicState):
+    """Request handler class bound to a state object."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+            # Stands in for the handshake of a new TLS connection
+            time.sleep(state.connect_delay_ms / 1000)
+
+        def _send_json(self, status: int, body: Dict[str, Any]):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("request-id", f"req_{uuid.uuid4().hex[:24]}")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_stream(self, message: Dict[str, Any]):
+            # Chunked encoding keeps the connection reusable without a Content-Length
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("request-id", f"req_{uuid.uuid4().hex[:24]}")
+            self.end_headers()
+            for event in stream_events(message):
+                data = f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if self.path.split("?")[0] != "/v1/messages":
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+                return
+            try:
+                request = json.loads(raw)
+            except ValueError:
+                self._send_json(400, {"type": "error", "error": {"type": "invalid_request_error", "message": "Invalid JSON"}})
+                return
+            time.sleep(state.delay())
+            message = state.respond(request, len(raw))
+            if request.get("stream"):
+                self._send_stream(message)
+            else:
+                self._send_json(200, message)
+
+        def do_GET(self):
+            if self.path.split("?")[0] == "/v1/models":
+                self._send_json(200, {"data": [{"type": "model", "id": "fake-model"}], "has_more": False})
+                return
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+    return Handler
+
+
+def serve(host: str, port: int, state: FakeAnthropicState) -> ThreadingHTTPServer:
+    """Create the HTTP server (call serve_forever() on it)."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Standard deviation of the latency")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Reported output tokens per response")
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0, help="Setup delay of every new connection")
+    parser.add_argument("--script", help="JSON file with the tool calls of each turn")
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+
+    state = FakeAnthropicState(
+        script, args.latency_ms, args.jitter_ms, args.output_tokens, connect_delay_ms=args.connect_delay_ms
+    )
+    server = serve(args.host, args.port, state)
+    print(f"✓ Fake Anthropic API on http://{args.host}:{args.port} ({len(script)} tool calls per turn)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Fake travel MCP server for load tests.
+
+Exposes ``flight_search`` and ``hotel_search`` tools shaped like the
+Enuygun ones, with configurable latency and result size, so the agent
+can be load-tested without mcp.enuygun.com. It speaks stdio by default,
+or streamable HTTP / SSE with ``--transport`` (served at
+``http://HOST:PORT/mcp`` and ``/sse``). Add it to ``MCP_SERVERS``
+through a servers file (see config.MCP_SERVERS_FILE):
+
+    {
+      "enuygun": {
+        "command": "python",
+        "args": ["-m", "loadtest.fake_mcp_server", "--latency-ms", "1500", "--records", "30"]
+      }
+    }
+"""
+import argparse
+import asyncio
+import random
+from typing import Any, Dict, List
+
+from mcp.server.fastmcp import FastMCP
+
+
+class FakeTravelBackend:
+    """Generates search results after a simulated delay."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, records: int, padding: int):
+        """
+        Initialize the backend.
+
+        Args:
+            latency_ms: Mean tool latency
+            jitter_ms: Standard deviation of the tool latency
+            records: Records per search result
+            padding: Extra characters per record, to simulate larger payloads
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.records = records
+        self.padding = "x" * padding
+
+    async def wait(self):
+        await asyncio.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+
+    def flights(self, origin: str, destination: str, departure_date: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "airline": ["Pegasus", "AJet", "Türk Hava Yolları"][i % 3],
+                "flightNumber": f"PC{2000 + i}",
+                "origin": origin,
+                "destination": destination,
+                "departure_time": f"{departure_date}T{6 + i % 16:02d}:{i * 7 % 60:02d}:00",
+                "price": {"amount": 1199 + i * 37, "currency": "TRY"},
+                "notes": self.padding
+            }
+            for i in range(self.records)
+        ]
+
+    def hotels(self, city: str, check_in: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": f"{city} Otel {i}",
+                "stars": 3 + i % 3,
+                "check_in": check_in,
+                "price": {"amount": 2400 + i * 55, "currency": "TRY"},
+                "notes": self.padding
+            }
+            for i in range(self.records)
+        ]
+
+
+def create_server(backend: FakeTravelBackend, host: str = "127.0.0.1", port: int = 9200) -> FastMCP:
+    """Build the MCP server with its tools (host/port only matter for HTTP transports)."""
+    server = FastMCP("fake-enuygun", host=host, port=port)
+
+    @server.tool()
+    async def flight_search(origin: str, destination: str, departure_date: str, adults: int = 1) -> Dict[str, Any]:
+        """Search one-way flights."""
+        await backend.wait()
+        return {"currency": "TRY", "flights": backend.flights(origin, destination, departure_date)}
+
+    @server.tool()
+    async def hotel_search(city: str, check_in: str, nights: int = 1) -> Dict[str, Any]:
+        """Search hotels in a city."""
+        await backend.wait()
+        return {"city": city, "hotels": backend.hotels(city, check_in)}
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake travel MCP server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http", "sse"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address for HTTP transports")
+    parser.add_argument("--port", type=int, default=9200, help="Listen port for HTTP transports")
+    parser.add_argument("--latency-ms", type=float, default=1000.0, help="Mean tool latency")
+    parser.add_argument("--jitter-ms", type=float, default=250.0, help="Standard deviation of the tool latency")
+    parser.add_argument("--records", type=int, default=20, help="Records per result")
+    parser.add_argument("--padding", type=int, default=0, help="Extra characters per record")
+    args = parser.parse_args()
+
+    backend = FakeTravelBackend(args.latency_ms, args.jitter_ms, args.records, args.padding)
+    create_server(backend, args.host, args.port).run(args.transport)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Closed- and open-loop load generator for the API in main.py.
+
+Closed loop: ``--concurrency`` virtual users send a request, wait for the
+answer and send the next one. It measures the throughput the service can
+sustain. Open loop: requests arrive at ``--rate`` per second (Poisson or
+constant) whether or not earlier ones finished. Latency is measured from
+the scheduled send time, so queueing inside the service is not hidden
+(no coordinated omission).
+
+    python -m loadtest.load_generator --endpoint chat --mode closed --concurrency 8 --duration 60
+    python -m loadtest.load_generator --endpoint tools --mode open --rate 20 --duration 60 \\
+        --json-out results/new.json --compare results/baseline.json
+
+Each virtual user (or, in open loop, each of ``--sessions`` sessions) sends
+its own X-Client-ID so per-client rate limits do not distort the test. The
+API only honours the header from trusted addresses, so start it with
+``CLIENT_ID_TRUSTED_PROXIES=127.0.0.1`` for local runs.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from metrics import percentile
+
+
+class LoadResults:
+    """Latencies and outcomes of a load test."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.dropped = 0
+        self.started = time.monotonic()
+        self.finished = self.started
+
+    def record(self, status: str, latency: float):
+        self.statuses[status] += 1
+        if status == "200":
+            self.latencies.append(latency)
+
+    def report(self, label: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize the run."""
+        duration = max(self.finished - self.started, 1e-9)
+        ok = self.statuses.get("200", 0)
+        latencies = self.latencies
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "label": label,
+            **settings,
+            "duration_s": round(duration, 2),
+            "requests": sum(self.statuses.values()),
+            "ok": ok,
+            "statuses": dict(self.statuses),
+            "dropped": self.dropped,
+            "throughput_rps": round(ok / duration, 2),
+            "latency_ms": {
+                "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "p99": ms(percentile(latencies, 99)),
+                "max": ms(max(latencies)) if latencies else None
+            }
+        }
+
+
+def build_request(args, user: int, sequence: int) -> Tuple[str, str, Dict[str, Any], Dict[str, str]]:
+    """(method, path, JSON body, headers) of one request."""
+    headers = {"X-Client-ID": f"loadtest-{user}"}
+    if args.endpoint == "chat":
+        body = {"message": args.message, "session_id": f"loadtest-{user}", "priority": args.priority}
+        # Start a fresh conversation now and then so histories stay realistic
+        if args.turns_per_session and sequence % args.turns_per_session == 0:
+            body["clear_history"] = True
+        return "POST", "/chat", body, headers
+    if args.endpoint == "tools":
+        body = {"tool": args.tool, "arguments": json.loads(args.arguments)}
+        return "POST", "/tools/call", body, headers
+    return "GET", "/resources", None, headers
+
+
+async def send(client: httpx.AsyncClient, args, user: int, sequence: int) -> str:
+    """Send one request and return its status (or the exception name)."""
+    method, path, body, headers = build_request(args, user, sequence)
+    try:
+        response = await client.request(method, path, json=body, headers=headers)
+        return str(response.status_code)
+    except httpx.HTTPError as e:
+        return type(e).__name__
+
+
+async def run_closed_loop(client: httpx.AsyncClient, args, results: LoadResults, deadline: float):
+    """Each virtual user sends its next request as soon as the previous one finishes."""
+    remaining = itertools.count() if args.requests is None else iter(range(args.requests))
+
+    async def user_loop(user: int):
+        sequence = 0
+        while time.monotonic() < deadline and next(remaining, None) is not None:
+            started = time.monotonic()
+            status = await send(client, args, user, sequence)
+            if started >= results.started:
+                results.record(status, time.monotonic() - started)
+            sequence += 1
+
+    await asyncio.gather(*(user_loop(user) for user in range(args.concurrency)))
+
+
+async def run_open_loop(client: httpx.AsyncClient, args, results: LoadResults, deadline: float):
+    """Requests arrive on a fixed schedule, independent of response times."""
+    outstanding = set()
+    sequences = Counter()
+    next_send = time.monotonic()
+
+    async def timed(user: int, sequence: int, scheduled: float):
+        status = await send(client, args, user, sequence)
+        if scheduled >= results.started:
+            results.record(status, time.monotonic() - scheduled)
+
+    while next_send < deadline:
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(outstanding) >= args.max_outstanding:
+            results.dropped += 1
+        else:
+            user = random.randrange(args.sessions)
+            task = asyncio.create_task(timed(user, sequences[user], next_send))
+            sequences[user] += 1
+            outstanding.add(task)
+            task.add_done_callback(outstanding.discard)
+        next_send += random.expovariate(args.rate) if args.arrival == "poisson" else 1.0 / args.rate
+
+    if outstanding:
+        await asyncio.wait(outstanding)
+
+
+async def run(args) -> Dict[str, Any]:
+    """Run the warm-up and the measured load test."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        results = LoadResults()
+        # Samples sent before `started` (the warm-up) are not recorded
+        results.started = time.monotonic() + args.warmup
+        deadline = results.started + args.duration
+        if args.mode == "closed":
+            await run_closed_loop(client, args, results, deadline)
+        else:
+            await run_open_loop(client, args, results, deadline)
+        results.finished = time.monotonic()
+
+    settings = {"endpoint": args.endpoint, "mode": args.mode}
+    if args.mode == "closed":
+        settings["concurrency"] = args.concurrency
+    else:
+        settings["rate"] = args.rate
+        settings["arrival"] = args.arrival
+    return results.report(args.label, settings)
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """Print a report, optionally next to a baseline."""
+    rows = [
+        ("throughput (req/s)", report["throughput_rps"], (baseline or {}).get("throughput_rps")),
+        *[
+            (f"{key} (ms)", report["latency_ms"][key], (baseline or {}).get("latency_ms", {}).get(key))
+            for key in ("mean", "p50", "p95", "p99", "max")
+        ]
+    ]
+    print(f"\n{report['label']}: {report['endpoint']} {report['mode']} loop, {report['requests']} requests "
+          f"in {report['duration_s']} s, statuses {report['statuses']}, dropped {report['dropped']}")
+    header = f"{'':<20}{'current':>12}"
+    if baseline:
+        header += f"{baseline['label']:>12}{'change':>10}"
+    print(header)
+    for name, current, previous in rows:
+        line = f"{name:<20}{_fmt(current):>12}"
+        if baseline:
+            change = ""
+            if current is not None and previous:
+                change = f"{(current - previous) / previous:+.1%}"
+            line += f"{_fmt(previous):>12}{change:>10}"
+        print(line)
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--endpoint", choices=["chat", "tools", "resources"], default="chat")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=4, help="Virtual users (closed loop)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests (closed loop)")
+    parser.add_argument("--rate", type=float, default=5.0, help="Arrivals per second (open loop)")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--sessions", type=int, default=50, help="Distinct sessions/clients (open loop)")
+    parser.add_argument("--max-outstanding", type=int, default=1000,
+                        help="Drop arrivals beyond this many in-flight requests (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before the test")
+    parser.add_argument("--timeout", type=float, default=180.0, help="Per-request timeout")
+    parser.add_argument("--message", default="İstanbul'dan İzmir'e 20 Kasım için uçuş ve otel bul")
+    parser.add_argument("--priority", choices=["interactive", "batch"], default="interactive")
+    parser.add_argument("--turns-per-session", type=int, default=5, help="Clear the history every N turns (0 never)")
+    parser.add_argument("--tool", default="enuygun_flight_search", help="Tool for --endpoint tools")
+    parser.add_argument("--arguments", default='{"origin": "IST", "destination": "ADB", "departure_date": "2025-11-20"}')
+    parser.add_argument("--label", default="current", help="Name of this run in reports")
+    parser.add_argument("--json-out", help="Write the report to this file")
+    parser.add_argument("--compare", help="Baseline report (from --json-out) to compare with")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""Columnar export of session logs.
+
+PromptLogger writes every prompt, response and tool execution to
+``logs/session_*.jsonl`` segments, which are the only record of latency,
+token usage and tool behavior. Answering "p95 tool latency per tool last
+week" from them means parsing every JSON line, including the full prompt
+histories. This module compacts the segments into typed columnar files
+(Parquet, or Arrow IPC) with one table each for prompts, responses and
+tool executions, keeping only the scalar fields that analytics need, so
+aggregates scan a few narrow columns instead.
+
+Exports are incremental: a manifest records how far each segment has
+been read, and every run only converts the complete lines appended since
+(written as a new part file), so it can run from cron while the API is
+still writing to its segment.
+
+Usage:
+
+    python log_export.py export                          # logs/ -> logs/columnar/
+    python log_export.py export --format arrow --out logs/arrow
+    python log_export.py query tool-latency --since 7d
+    python log_export.py query models --since 2025-10-01 --json
+    python log_export.py query daily
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    print("Warning: pyarrow not installed, session logs cannot be exported. Install with: pip install pyarrow")
+    pa = None
+
+MANIFEST_VERSION = 1
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+def _schemas() -> Dict[str, "pa.Schema"]:
+    """Column types of the exported tables."""
+    common = [("timestamp", pa.timestamp("us")), ("segment", pa.string())]
+    return {
+        "prompts": pa.schema(common + [
+            ("model", pa.string()),
+            ("temperature", pa.float32()),
+            ("max_tokens", pa.int32()),
+            ("tools_count", pa.int32()),
+            ("message_count", pa.int32()),
+            ("system_chars", pa.int32())
+        ]),
+        "responses": pa.schema(common + [
+            ("model", pa.string()),
+            ("stop_reason", pa.string()),
+            ("latency_ms", pa.float64()),
+            ("input_tokens", pa.int64()),
+            ("output_tokens", pa.int64()),
+            ("text_chars", pa.int32()),
+            ("tool_uses", pa.int32())
+        ]),
+        "tool_executions": pa.schema(common + [
+            ("tool_name", pa.string()),
+            ("server", pa.string()),
+            ("success", pa.bool_()),
+            ("error", pa.string()),
+            ("duration_ms", pa.float64()),
+            ("result_chars", pa.int32())
+        ])
+    }
+
+
+def _prompt_row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "model": entry.get("model"),
+        "temperature": entry.get("temperature"),
+        "max_tokens": entry.get("max_tokens"),
+        "tools_count": entry.get("tools_count"),
+        "message_count": len(entry.get("messages") or []),
+        "system_chars": len(entry.get("system_message") or "")
+    }
+
+
+def _response_row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    usage = entry.get("usage") or {}
+    content = entry.get("content") or []
+    return {
+        "model": entry.get("model"),
+        "stop_reason": entry.get("stop_reason"),
+        "latency_ms": entry.get("latency_ms"),
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens"),
+        "text_chars": sum(len(block.get("text", "")) for block in content if block.get("type") == "text"),
+        "tool_uses": sum(1 for block in content if block.get("type") == "tool_use")
+    }
+
+
+def _tool_row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    tool_name = entry.get("tool_name") or ""
+    result = entry.get("result") or ""
+    success = bool(entry.get("success", True))
+    # Logs written before error codes were recorded only have the success flag
+    error = None if success else entry.get("error_code") or "error"
+    return {
+        "tool_name": tool_name,
+        "server": tool_name.split("_", 1)[0] if "_" in tool_name else None,
+        "success": success,
+        "error": error,
+        # Logs written before tool durations were recorded have none
+        "duration_ms": entry.get("duration_ms"),
+        "result_chars": len(result)
+    }
+
+
+# Log entry type -> (table, row extractor); other entry types are not exported
+EXTRACTORS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "prompt": ("prompts", _prompt_row),
+    "response": ("responses", _response_row),
+    "tool_execution": ("tool_executions", _tool_row)
+}
+
+
+def read_segment(path: Path, offset: int = 0) -> Tuple[Dict[str, List[Dict[str, Any]]], int, int]:
+    """
+    Convert the complete lines of a segment after a byte offset into table rows.
+
+    A trailing line without a newline is still being written and is left
+    for the next run.
+
+    Args:
+        path: session_*.jsonl file
+        offset: Byte offset where the previous export stopped
+
+    Returns:
+        (rows by table, new offset, number of unreadable lines skipped)
+    """
+    rows: Dict[str, List[Dict[str, Any]]] = {table: [] for table, _ in EXTRACTORS.values()}
+    skipped = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            table, extract = EXTRACTORS.get(entry.get("type"), (None, None))
+            if table is None:
+                continue
+            row = extract(entry)
+            row["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            skipped += 1
+            continue
+        row["segment"] = path.name
+        rows[table].append(row)
+    return rows, offset + end, skipped
+
+
+class LogExporter:
+    """Incremental JSONL -> columnar exporter with a manifest of exported byte ranges."""
+
+    def __init__(self, log_dir: str = "logs", out_dir: Optional[str] = None, file_format: str = "parquet"):
+        """
+        Initialize the exporter.
+
+        Args:
+            log_dir: Directory with session_*.jsonl files
+            out_dir: Output directory (defaults to <log_dir>/columnar)
+            file_format: "parquet" or "arrow" (Arrow IPC)
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for log export. Install with: pip install pyarrow")
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format: {file_format} (expected one of {', '.join(FORMATS)})")
+        self.log_dir = Path(log_dir)
+        self.out_dir = Path(out_dir) if out_dir else self.log_dir / "columnar"
+        self.file_format = file_format
+        self.schemas = _schemas()
+        self.manifest_path = self.out_dir / "manifest.json"
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Read the manifest, refusing to mix formats in one output directory."""
+        if not self.manifest_path.exists():
+            return {"version": MANIFEST_VERSION, "format": self.file_format, "segments": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != self.file_format:
+            raise ValueError(
+                f"{self.out_dir} holds {manifest.get('format')} files; "
+                f"use another output directory for {self.file_format}"
+            )
+        return manifest
+
+    def _save_manifest(self):
+        """Write the manifest atomically, after the part files it points to."""
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _write_part(self, table_name: str, path: Path, rows: List[Dict[str, Any]]):
+        """Write rows as one part file, atomically so readers never see half a file."""
+        table = pa.Table.from_pylist(rows, schema=self.schemas[table_name])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        if self.file_format == "parquet":
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            feather.write_feather(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+
+    def _remove_parts(self, state: Dict[str, Any]):
+        """Delete a segment's part files (before re-exporting it from the start)."""
+        for relative in state.get("parts", []):
+            (self.out_dir / relative).unlink(missing_ok=True)
+
+    def export(self) -> Dict[str, Any]:
+        """
+        Export everything appended to the session logs since the last run.
+
+        Returns:
+            Segments touched, rows written per table and unreadable lines skipped
+        """
+        summary = {"segments": 0, "rows": {table: 0 for table in self.schemas}, "skipped_lines": 0}
+        segments = self.manifest["segments"]
+        for path in sorted(self.log_dir.glob("session_*.jsonl")):
+            stat = path.stat()
+            state = segments.get(path.name)
+            if state is not None and stat.st_size < state["offset"]:
+                # The file was truncated or replaced: start over
+                self._remove_parts(state)
+                state = None
+            if state is None:
+                state = {"offset": 0, "parts": [], "rows": {table: 0 for table in self.schemas}}
+            if stat.st_size == state["offset"]:
+                continue
+
+            rows, offset, skipped = read_segment(path, state["offset"])
+            if offset == state["offset"]:
+                # Only a partial line so far
+                continue
+            part = len(state["parts"])
+            for table_name, table_rows in rows.items():
+                if not table_rows:
+                    continue
+                relative = f"{table_name}/{path.stem}-{part:04d}{FORMATS[self.file_format]}"
+                self._write_part(table_name, self.out_dir / relative, table_rows)
+                state["parts"].append(relative)
+                state["rows"][table_name] += len(table_rows)
+                summary["rows"][table_name] += len(table_rows)
+            state["offset"] = offset
+            segments[path.name] = state
+            summary["segments"] += 1
+            summary["skipped_lines"] += skipped
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._save_manifest()
+        return summary
+
+
+def parse_since(value: Optional[str]) -> Optional[datetime]:
+    """Parse --since: a relative age such as "7d", "12h", "30m", or an ISO date/time."""
+    if not value:
+        return None
+    match = re.fullmatch(r"(\d+)([dhm])", value)
+    if match:
+        unit = {"d": "days", "h": "hours", "m": "minutes"}[match.group(2)]
+        return datetime.now() - timedelta(**{unit: int(match.group(1))})
+    return datetime.fromisoformat(value)
+
+
+class LogQuery:
+    """Common aggregates over an export directory."""
+
+    def __init__(self, out_dir: str):
+        """
+        Initialize the query helper.
+
+        Args:
+            out_dir: Directory written by LogExporter
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for log queries. Install with: pip install pyarrow")
+        self.out_dir = Path(out_dir)
+        manifest_path = self.out_dir / "manifest.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No export found in {self.out_dir}; run 'python log_export.py export' first")
+        with open(manifest_path, encoding="utf-8") as f:
+            self.file_format = json.load(f)["format"]
+        self.schemas = _schemas()
+
+    def scan(self, table_name: str, columns: List[str], since: Optional[datetime] = None) -> "pa.Table":
+        """Read only the given columns of a table, optionally from a point in time on."""
+        directory = self.out_dir / table_name
+        if not directory.exists():
+            return self.schemas[table_name].empty_table().select(columns)
+        dataset = ds.dataset(
+            directory,
+            schema=self.schemas[table_name],
+            format="parquet" if self.file_format == "parquet" else "ipc"
+        )
+        row_filter = None
+        if since is not None:
+            row_filter = ds.field("timestamp") >= pa.scalar(since, type=pa.timestamp("us"))
+        return dataset.to_table(columns=columns, filter=row_filter)
+
+    def tool_latency(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Calls, error rate and duration percentiles per tool."""
+        table = self.scan("tool_executions", ["tool_name", "success", "duration_ms"], since)
+        table = table.append_column("failed", pc.invert(table["success"]).cast(pa.int64()))
+        grouped = table.group_by("tool_name").aggregate([
+            ("tool_name", "count"),
+            ("failed", "sum"),
+            ("duration_ms", "tdigest", pc.TDigestOptions(q=QUANTILES))
+        ])
+        rows = []
+        for row in grouped.to_pylist():
+            calls = row["tool_name_count"]
+            rows.append({
+                "tool": row["tool_name"],
+                "calls": calls,
+                "error_rate": round(row["failed_sum"] / calls, 3) if calls else 0.0,
+                **_quantile_fields(row["duration_ms_tdigest"])
+            })
+        return sorted(rows, key=lambda r: r["calls"], reverse=True)
+
+    def models(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Responses, token totals and latency percentiles per model."""
+        table = self.scan("responses", ["model", "latency_ms", "input_tokens", "output_tokens"], since)
+        grouped = table.group_by("model").aggregate([
+            ("model", "count"),
+            ("input_tokens", "sum"),
+            ("output_tokens", "sum"),
+            ("latency_ms", "tdigest", pc.TDigestOptions(q=QUANTILES))
+        ])
+        rows = []
+        for row in grouped.to_pylist():
+            rows.append({
+                "model": row["model"],
+                "responses": row["model_count"],
+                "input_tokens": row["input_tokens_sum"] or 0,
+                "output_tokens": row["output_tokens_sum"] or 0,
+                **_quantile_fields(row["latency_ms_tdigest"])
+            })
+        return sorted(rows, key=lambda r: r["responses"], reverse=True)
+
+    def daily(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Responses, tokens and tool calls per day."""
+        responses = self.scan("responses", ["timestamp", "input_tokens", "output_tokens"], since)
+        responses = responses.append_column("day", pc.strftime(responses["timestamp"], format="%Y-%m-%d"))
+        per_day = {
+            row["day"]: {
+                "day": row["day"],
+                "responses": row["day_count"],
+                "input_tokens": row["input_tokens_sum"] or 0,
+                "output_tokens": row["output_tokens_sum"] or 0,
+                "tool_calls": 0
+            }
+            for row in responses.group_by("day").aggregate([
+                ("day", "count"), ("input_tokens", "sum"), ("output_tokens", "sum")
+            ]).to_pylist()
+        }
+        tools = self.scan("tool_executions", ["timestamp"], since)
+        tools = tools.append_column("day", pc.strftime(tools["timestamp"], format="%Y-%m-%d"))
+        for row in tools.group_by("day").aggregate([("day", "count")]).to_pylist():
+            per_day.setdefault(row["day"], {
+                "day": row["day"], "responses": 0, "input_tokens": 0, "output_tokens": 0, "tool_calls": 0
+            })["tool_calls"] = row["day_count"]
+        return [per_day[day] for day in sorted(per_day)]
+
+
+def _quantile_fields(values: Optional[List[float]]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 columns from a t-digest result (None when no durations were recorded)."""
+    values = values or []
+    return {
+        f"p{int(q * 100)}_ms": (round(values[i], 1) if i < len(values) and values[i] == values[i] else None)
+        for i, q in enumerate(QUANTILES)
+    }
+
+
+QUERIES = {
+    "tool-latency": ("Araç gecikmeleri", LogQuery.tool_latency),
+    "models": ("Model kullanımı", LogQuery.models),
+    "daily": ("Günlük kullanım", LogQuery.daily)
+}
+
+
+def print_rows(title: str, rows: List[Dict[str, Any]]):
+    """Print query results as a table."""
+    console = Console()
+    if not rows:
+        console.print(f"[yellow]{title}: kayıt yok[/yellow]")
+        return
+    table = Table(title=title)
+    for column in rows[0]:
+        table.add_column(column, justify="left" if isinstance(rows[0][column], str) else "right")
+    for row in rows:
+        table.add_row(*("-" if value is None else str(value) for value in row.values()))
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export session logs to columnar files and query them")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subcommands.add_parser("export", help="Export new log lines")
+    export_parser.add_argument("--logs", default="logs", help="Directory with session_*.jsonl files")
+    export_parser.add_argument("--out", help="Output directory (default: <logs>/columnar)")
+    export_parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+
+    query_parser = subcommands.add_parser("query", help="Run a common aggregate")
+    query_parser.add_argument("query", choices=list(QUERIES))
+    query_parser.add_argument("--out", default=os.path.join("logs", "columnar"), help="Export directory")
+    query_parser.add_argument("--since", help='Only rows newer than this, e.g. "7d", "12h" or "2025-10-01"')
+    query_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "export":
+            summary = LogExporter(args.logs, args.out, args.format).export()
+            print(json.dumps(summary, ensure_ascii=False))
+        else:
+            title, run = QUERIES[args.query]
+            rows = run(LogQuery(args.out), parse_since(args.since))
+            if args.json:
+                print(json.dumps(rows, ensure_ascii=False, indent=2))
+            else:
+                print_rows(title, rows)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
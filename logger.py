@@ -3,11 +3,13 @@ import os
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from rich.console import Console
 from rich.panel import Panel
 from rich.syntax import Syntax
 
+from tool_scheduler import current_call
+
 
 class PromptLogger:
     """Logger for LLM prompts and responses."""
@@ -28,10 +30,19 @@ class PromptLogger:
         self.session_file = self.log_dir / f"session_{timestamp}.jsonl"
         self.text_log_file = self.log_dir / f"session_{timestamp}.txt"
         
-    def _serialize_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _session_id(session_id: Optional[str]) -> str:
+        """Session an entry belongs to; concurrent sessions interleave in one log file."""
+        return session_id or current_call()[0]
+    
+    def _serialize_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         """Convert messages to JSON-serializable format."""
         serialized = []
         for msg in messages:
+            if hasattr(msg, "content_to_api"):
+                # Compact Message records are already in API format
+                serialized.append({"role": msg.role, "content": msg.content_to_api()})
+                continue
             serialized_msg = {
                 "role": msg.get("role", ""),
                 "content": self._serialize_content(msg.get("content"))
@@ -39,6 +50,21 @@ class PromptLogger:
             serialized.append(serialized_msg)
         return serialized
     
+    def _messages_json(self, messages: List[Any]) -> str:
+        """Serialize messages to a JSON array, reusing memoized message JSON when available."""
+        if all(hasattr(msg, "to_json") for msg in messages):
+            return "[" + ", ".join(msg.to_json() for msg in messages) + "]"
+        return json.dumps(self._serialize_messages(messages), ensure_ascii=False)
+    
+    def _content_text(self, msg: Any) -> str:
+        """Content of a message for the text log."""
+        if hasattr(msg, "content_json"):
+            return msg.content if msg.is_text else msg.content_json()
+        content = self._serialize_content(msg.get("content"))
+        if isinstance(content, str):
+            return content
+        return json.dumps(content, ensure_ascii=False, indent=2)
+    
     def _serialize_content(self, content: Any) -> Any:
         """Convert content to JSON-serializable format."""
         if isinstance(content, str):
@@ -66,7 +92,8 @@ class PromptLogger:
         model: str,
         temperature: float,
         max_tokens: int,
-        tools: List[Dict[str, Any]] = None
+        tools: List[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
     ):
         """
         Log the prompt sent to LLM.
@@ -78,26 +105,25 @@ class PromptLogger:
             temperature: Temperature setting
             max_tokens: Max tokens setting
             tools: Available tools (optional)
+            session_id: Conversation identifier (defaults to the current call context)
         """
         timestamp = datetime.now().isoformat()
         
-        # Serialize messages to JSON-compatible format
-        serialized_messages = self._serialize_messages(messages)
-        
         log_entry = {
             "timestamp": timestamp,
             "type": "prompt",
+            "session_id": self._session_id(session_id),
             "model": model,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "system_message": system_message,
-            "messages": serialized_messages,
             "tools_count": len(tools) if tools else 0
         }
         
-        # Write to JSONL file
+        # Write to JSONL file (messages are spliced in pre-serialized)
+        entry_json = json.dumps(log_entry, ensure_ascii=False)
         with open(self.session_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+            f.write(entry_json[:-1] + ', "messages": ' + self._messages_json(messages) + "}\n")
         
         # Write to text log file
         with open(self.text_log_file, "a", encoding="utf-8") as f:
@@ -110,12 +136,10 @@ class PromptLogger:
             f.write(f"Tools Available: {len(tools) if tools else 0}\n\n")
             f.write(f"System Message:\n{system_message}\n\n")
             f.write(f"Conversation History:\n")
-            for i, msg in enumerate(serialized_messages):
-                f.write(f"  [{i+1}] {msg['role'].upper()}:\n")
-                if isinstance(msg['content'], str):
-                    f.write(f"    {msg['content']}\n")
-                else:
-                    f.write(f"    {json.dumps(msg['content'], ensure_ascii=False, indent=2)}\n")
+            for i, msg in enumerate(messages):
+                role = msg.role if hasattr(msg, "role") else msg.get("role", "")
+                f.write(f"  [{i+1}] {role.upper()}:\n")
+                f.write(f"    {self._content_text(msg)}\n")
             f.write("\n")
         
         # Console output
@@ -134,7 +158,10 @@ class PromptLogger:
         self,
         response: Any,
         stop_reason: str,
-        usage: Dict[str, int] = None
+        usage: Dict[str, int] = None,
+        model: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        session_id: Optional[str] = None
     ):
         """
         Log the response received from LLM.
@@ -143,6 +170,9 @@ class PromptLogger:
             response: LLM response object
             stop_reason: Why the response stopped
             usage: Token usage information
+            model: Model that produced the response
+            latency_ms: Request latency in milliseconds
+            session_id: Conversation identifier (defaults to the current call context)
         """
         timestamp = datetime.now().isoformat()
         
@@ -174,10 +204,15 @@ class PromptLogger:
         log_entry = {
             "timestamp": timestamp,
             "type": "response",
+            "session_id": self._session_id(session_id),
             "stop_reason": stop_reason,
             "content": content_blocks,
             "usage": usage if usage else {}
         }
+        if model:
+            log_entry["model"] = model
+        if latency_ms is not None:
+            log_entry["latency_ms"] = round(latency_ms, 1)
         
         # Write to JSONL file
         with open(self.session_file, "a", encoding="utf-8") as f:
@@ -189,6 +224,10 @@ class PromptLogger:
             f.write(f"RESPONSE - {timestamp}\n")
             f.write(f"{'-'*80}\n")
             f.write(f"Stop Reason: {stop_reason}\n")
+            if model:
+                f.write(f"Model: {model}\n")
+            if latency_ms is not None:
+                f.write(f"Latency: {latency_ms:.0f} ms\n")
             if usage:
                 f.write(f"Usage: {json.dumps(usage, ensure_ascii=False)}\n")
             f.write(f"\nContent:\n")
@@ -213,6 +252,12 @@ class PromptLogger:
                 f"  • Toplam: {usage.get('input_tokens', 0) + usage.get('output_tokens', 0)}"
             )
         
+        model_text = ""
+        if model:
+            model_text = f"\n[yellow]Model:[/yellow] {model}"
+            if latency_ms is not None:
+                model_text += f" ({latency_ms:.0f} ms)"
+        
         tool_text = ""
         if tool_uses:
             tool_text = f"\n[yellow]Kullanılan Araçlar:[/yellow] {', '.join([t['name'] for t in tool_uses])}"
@@ -220,6 +265,7 @@ class PromptLogger:
         self.console.print(Panel(
             f"[bold green]📥 YANIT ALINDI[/bold green]\n\n"
             f"[yellow]Duruş Nedeni:[/yellow] {stop_reason}"
+            f"{model_text}"
             f"{tool_text}"
             f"{usage_text}",
             title="🤖 LLM Yanıtı",
@@ -238,7 +284,10 @@ class PromptLogger:
         tool_name: str,
         tool_input: Dict[str, Any],
         result: Any,
-        success: bool = True
+        success: bool = True,
+        duration_ms: Optional[float] = None,
+        session_id: Optional[str] = None,
+        error_code: Optional[str] = None
     ):
         """
         Log tool execution.
@@ -248,17 +297,25 @@ class PromptLogger:
             tool_input: Tool input parameters
             result: Tool execution result
             success: Whether execution was successful
+            duration_ms: Call duration in milliseconds (None if the tool was not called)
+            session_id: Conversation identifier (defaults to the current call context)
+            error_code: Why the call failed, e.g. "timeout" or "tool_error" (only logged for failures)
         """
         timestamp = datetime.now().isoformat()
         
         log_entry = {
             "timestamp": timestamp,
             "type": "tool_execution",
+            "session_id": self._session_id(session_id),
             "tool_name": tool_name,
             "tool_input": tool_input,
             "result": str(result),
             "success": success
         }
+        if not success:
+            log_entry["error_code"] = error_code or "error"
+        if duration_ms is not None:
+            log_entry["duration_ms"] = round(duration_ms, 1)
         
         # Write to JSONL file
         with open(self.session_file, "a", encoding="utf-8") as f:
@@ -271,6 +328,8 @@ class PromptLogger:
             f.write(f"{'~'*80}\n")
             f.write(f"Tool: {tool_name}\n")
             f.write(f"Success: {success}\n")
+            if duration_ms is not None:
+                f.write(f"Duration: {duration_ms:.0f} ms\n")
             f.write(f"Input: {json.dumps(tool_input, ensure_ascii=False, indent=2)}\n")
             f.write(f"Result: {str(result)[:500]}...\n\n")  # Limit result length
         
@@ -279,6 +338,31 @@ class PromptLogger:
         color = "green" if success else "red"
         self.console.print(f"[{color}]{status} Araç Çalıştırıldı: {tool_name}[/{color}]")
     
+    def log_turn_report(self, session_id: str, report: Dict[str, Any]):
+        """
+        Log where a turn spent its time budget.
+        
+        Args:
+            session_id: Conversation identifier
+            report: TurnBudget.report() output
+        """
+        timestamp = datetime.now().isoformat()
+        log_entry = {
+            "timestamp": timestamp,
+            "type": "turn_report",
+            "session_id": session_id,
+            **report
+        }
+        
+        with open(self.session_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+        
+        phases = ", ".join(f"{name} {entry['ms']:.0f} ms" for name, entry in report["phases"].items())
+        with open(self.text_log_file, "a", encoding="utf-8") as f:
+            f.write(f"TURN REPORT - {timestamp}: {report['elapsed_ms']:.0f} ms ({phases})\n\n")
+        
+        self.console.print(f"[cyan]⏱️  Tur süresi: {report['elapsed_ms']:.0f} ms ({phases})[/cyan]")
+    
     def get_log_location(self) -> str:
         """Get the location of log files."""
         return str(self.log_dir.absolute())
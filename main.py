@@ -1,18 +1,34 @@
 """FastAPI application for MCP AI Agent."""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket
+from fastapi.requests import HTTPConnection
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Literal, Optional
 from contextlib import asynccontextmanager
+import math
+import time
 import uvicorn
 import signal
 import sys
+import uuid
 
-from agent import MCPAgent
-from config import Config
+from admission import AdmissionController, AdmissionRejected, estimate_tokens
+from agent import DEFAULT_SESSION_ID, MCPAgent
+from chat_socket import ChatSocket
+from circuit_breaker import CircuitOpenError
+from config import Config, load_servers_file
+from mcp_client import ToolTimeoutError, to_jsonable
+from resource_cache import etag_matches
+from tool_results import is_error_result
+from tool_scheduler import call_context
+from turn_budget import TurnBudget
 
 # Global agent instance
 agent = None
 
+# Admission control shared by all chat requests of this worker
+admission = AdmissionController.from_config(Config)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI app."""
@@ -53,35 +69,160 @@ class ChatRequest(BaseModel):
     """Chat request model."""
     message: str
     clear_history: Optional[bool] = False
+    session_id: str = DEFAULT_SESSION_ID
+    priority: Literal["interactive", "batch"] = "interactive"
 
 class ChatResponse(BaseModel):
     """Chat response model."""
     response: str
+    timings: Optional[Dict[str, Any]] = None
+
+def get_client_id(http_request: HTTPConnection) -> str:
+    """Identify the caller for rate limiting (client address, or X-Client-ID set by a trusted proxy)."""
+    peer = http_request.client.host if http_request.client else "unknown"
+    # The header is client-controlled; only a trusted proxy may vouch for it
+    if peer in Config.CLIENT_ID_TRUSTED_PROXIES:
+        client_id = http_request.headers.get("X-Client-ID")
+        if client_id:
+            return client_id
+    return peer
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Chat with the AI agent.
     
     Args:
         request: ChatRequest object containing the message and clear_history flag
+        http_request: Raw HTTP request, used to identify the client
         
     Returns:
         ChatResponse object containing the agent's response
     """
+    # The turn budget starts when the request arrives, so queueing counts against it
+    budget = TurnBudget.from_config(Config)
     try:
-        if request.clear_history:
-            agent.clear_history()
-            
-        response = await agent.chat(request.message)
-        return ChatResponse(response=response)
+        waiting = time.monotonic()
+        async with admission.admit(
+            get_client_id(http_request),
+            request.priority,
+            estimate_tokens(request.message, Config.ADMISSION_BASE_TOKENS)
+        ):
+            budget.record("admission", time.monotonic() - waiting)
+            if request.clear_history:
+                await agent.clear_history(request.session_id)
+                
+            response = await agent.chat(
+                request.message, request.session_id, budget=budget, priority=request.priority
+            )
+            return ChatResponse(response=response, timings=budget.report())
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": e.retry_after_header}
+        )
     except Exception as e:
         import traceback
         error_detail = f"Error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
         print(f"Chat endpoint error: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Chat over a WebSocket bound to one conversation (see chat_socket.py for the protocol).
+    
+    Args:
+        websocket: Incoming WebSocket connection
+        session_id: Conversation to continue (query parameter; a new one by default)
+    """
+    await websocket.accept()
+    connection = ChatSocket(
+        websocket,
+        agent,
+        admission,
+        Config,
+        get_client_id(websocket),
+        session_id or uuid.uuid4().hex
+    )
+    await connection.run()
+
+class ToolCallRequest(BaseModel):
+    """Direct tool call request model."""
+    tool: str
+    arguments: Dict[str, Any] = {}
+    server: Optional[str] = None
+    summarize: bool = False
+    summary_instructions: Optional[str] = None
+
+class ToolCallResponse(BaseModel):
+    """Direct tool call response model."""
+    server: str
+    tool: str
+    result: Any
+    is_error: bool
+    summary: Optional[str] = None
+
+@app.post("/tools/call", response_model=ToolCallResponse)
+async def call_tool(request: ToolCallRequest, http_request: Request):
+    """
+    Call an MCP tool directly with structured arguments, bypassing the agent loop.
+    
+    Args:
+        request: ToolCallRequest with the tool name, JSON arguments and summarize flag
+        http_request: Raw HTTP request, used to identify the client
+        
+    Returns:
+        ToolCallResponse with the raw tool result and an optional LLM summary
+    """
+    await agent.sync_catalog()
+    try:
+        tool = agent.find_tool(request.tool, request.server)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if tool is None:
+        raise HTTPException(status_code=404, detail=f"Tool {request.tool} not found")
+    
+    errors = agent.validator.validate(f"{tool['server']}_{tool['name']}", request.arguments)
+    if errors:
+        raise HTTPException(status_code=422, detail={"message": "Invalid tool arguments", "errors": errors})
+    
+    # Only the optional summary uses the LLM; charge its prompt to the client's budget
+    estimated = estimate_tokens(str(request.arguments), Config.ADMISSION_BASE_TOKENS) if request.summarize else 0
+    try:
+        client_id = get_client_id(http_request)
+        async with admission.admit(client_id, "interactive", estimated):
+            with call_context(client_id):
+                result = await agent.call_tool_direct(tool, request.arguments)
+            is_error = is_error_result(result)
+            
+            summary = None
+            if request.summarize and not is_error:
+                summary = await agent.summarize_tool_result(
+                    tool, request.arguments, result, request.summary_instructions
+                )
+            
+            return ToolCallResponse(
+                server=tool["server"],
+                tool=tool["name"],
+                result=to_jsonable(result),
+                is_error=is_error,
+                summary=summary
+            )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": e.retry_after_header}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Tool call endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/tools")
 async def list_tools():
     """
@@ -90,8 +231,106 @@ async def list_tools():
     Returns:
         List of available tools
     """
+    await agent.sync_catalog()
     return {"tools": agent.available_tools}
 
+@app.post("/servers/reload")
+async def reload_servers():
+    """
+    Re-read MCP_SERVERS_FILE and apply it without a restart.
+    
+    Only new and changed servers are connected; removed ones are closed
+    after their in-flight calls, and unchanged ones are not touched.
+    
+    Returns:
+        Server names by outcome and the size of the new tool catalog
+    """
+    # Server configs start processes, so they only come from the operator's file, never the request
+    if not Config.MCP_SERVERS_FILE:
+        raise HTTPException(status_code=409, detail="Hot reload needs MCP_SERVERS_FILE; the built-in MCP_SERVERS cannot change at runtime")
+    try:
+        server_configs = load_servers_file(Config.MCP_SERVERS_FILE)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Cannot read {Config.MCP_SERVERS_FILE}: {e}")
+    if not isinstance(server_configs, dict):
+        raise HTTPException(status_code=400, detail=f"{Config.MCP_SERVERS_FILE} must map server names to configs")
+    return await agent.reload_servers(server_configs)
+
+def conditional_response(content: Dict[str, Any], etag: str, http_request: Request) -> Response:
+    """JSON response with an ETag, or 304 if the client already has this version."""
+    # no-cache: clients may store the payload but must revalidate it every time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(http_request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content, headers=headers)
+
+@app.get("/resources")
+async def list_resources(http_request: Request):
+    """
+    List MCP resources of all servers (cached, supports If-None-Match).
+    
+    Returns:
+        List of available resources
+    """
+    result = await agent.mcp_client.get_resources()
+    return conditional_response({"resources": result["value"]}, result["etag"], http_request)
+
+@app.get("/resources/{server_name}")
+async def read_resource(server_name: str, uri: str, http_request: Request):
+    """
+    Read an MCP resource (cached, supports If-None-Match).
+    
+    Args:
+        server_name: Server that owns the resource
+        uri: Resource URI (query parameter)
+        http_request: Raw HTTP request, used for conditional requests
+        
+    Returns:
+        The resource contents
+    """
+    try:
+        result = await agent.mcp_client.get_resource(server_name, uri)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ToolTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    except Exception as e:
+        print(f"Resource read error: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    return conditional_response(
+        {"server": server_name, "uri": uri, "result": result["value"]},
+        result["etag"],
+        http_request
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime statistics of the API and agent.
+    
+    Returns:
+        Counters grouped by component
+    """
+    stats = {"admission": admission.get_stats()}
+    if agent:
+        stats["llm"] = agent.llm.get_stats()
+        if agent.router.enabled:
+            # Tool-planning iterations have their own caller (retries, hedges, latency)
+            stats["llm_fast"] = agent.llm_callers[agent.router.fast_model].get_stats()
+        stats["llm_transport"] = agent.transport.get_stats()
+        stats["models"] = agent.router.get_stats()
+        stats["mcp"] = agent.mcp_client.get_stats()
+        stats["validation"] = agent.validator.get_stats()
+        if hasattr(agent.mcp_client, "resource_cache"):
+            stats["resources"] = agent.mcp_client.resource_cache.get_stats()
+    return stats
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -105,7 +344,16 @@ def signal_handler(sig, frame):
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     try:
-        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+        if Config.API_WORKERS > 1:
+            # Multiple workers share MCP sessions through the gateway process
+            uvicorn.run(
+                "main:app",
+                host=Config.API_HOST,
+                port=Config.API_PORT,
+                workers=Config.API_WORKERS
+            )
+        else:
+            uvicorn.run("main:app", host=Config.API_HOST, port=Config.API_PORT, reload=True)
     except KeyboardInterrupt:
         print("\nServer stopped.")
 
@@ -1,65 +1,580 @@
 """MCP Client for connecting to MCP servers."""
 import asyncio
-from typing import Any, Dict, List, Optional
-from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from contextlib import AsyncExitStack, contextmanager
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from resource_cache import ResourceCache, compute_etag
+from tool_scheduler import FairScheduler
 
 try:
     from mcp import ClientSession, StdioServerParameters
+    from mcp import types as mcp_types
     from mcp.client.stdio import stdio_client
 except ImportError:
     print("Warning: MCP library not installed. Install with: pip install mcp")
     ClientSession = None
     StdioServerParameters = None
+    mcp_types = None
     stdio_client = None
 
+# The HTTP transports are imported separately so a missing one never disables stdio servers
+try:
+    from mcp.client.sse import sse_client
+except ImportError:
+    sse_client = None
+
+try:
+    # Takes an httpx client factory (mcp 1.x)
+    from mcp.client.streamable_http import streamablehttp_client
+except ImportError:
+    streamablehttp_client = None
+
+try:
+    # Newer name, which takes a ready httpx client instead
+    from mcp.client.streamable_http import streamable_http_client
+except ImportError:
+    streamable_http_client = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Transports selectable per server with the "transport" config key
+TRANSPORTS = ("stdio", "streamable_http", "sse")
+
+
+def transport_available(transport: str) -> bool:
+    """Whether the installed mcp package provides a transport."""
+    if transport == "stdio":
+        return stdio_client is not None
+    if transport == "streamable_http":
+        return (streamablehttp_client is not None or streamable_http_client is not None) and httpx is not None
+    if transport == "sse":
+        return sse_client is not None
+    return False
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert MCP result objects to JSON-compatible values."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", by_alias=True, exclude_none=True)
+    if isinstance(value, list):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when an MCP call misses its deadline."""
+    
+    def __init__(self, server_name: str, tool_name: str, timeout: float):
+        """
+        Initialize the error.
+        
+        Args:
+            server_name: Name of the server
+            tool_name: Tool name or resource URI that timed out
+            timeout: Deadline that was exceeded (seconds)
+        """
+        super().__init__(f"{tool_name} on {server_name} timed out after {timeout:g}s")
+        self.server_name = server_name
+        self.tool_name = tool_name
+        self.timeout = timeout
+    
+    def to_result(self) -> Dict[str, Any]:
+        """Structured result returned to the model instead of a tool output."""
+        return {
+            "error": "timeout",
+            "server": self.server_name,
+            "tool": self.tool_name,
+            "timeout_seconds": self.timeout,
+            "retryable": True,
+            "message": f"{self}. You may retry with narrower parameters or continue without this result."
+        }
+
+
+class ServerConnection:
+    """
+    One MCP server session, owned by its own task.
+    
+    The transport and session context managers are entered and exited in
+    the same task (their anyio cancel scopes require it), so a single server
+    can be started or closed at any time without touching the others.
+    """
+    
+    def __init__(self, server_name: str, config: Dict[str, Any]):
+        """
+        Initialize the connection (call start() to open it).
+        
+        Args:
+            server_name: Name of the server
+            config: Server config the connection was opened with
+        """
+        self.server_name = server_name
+        self.config = config
+        self.session: Optional[ClientSession] = None
+        self.resource_capabilities: Any = None
+        self.in_flight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.stop_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+    
+    async def start(self, open_session: Callable[[AsyncExitStack], Awaitable[Tuple[ClientSession, Any]]]):
+        """
+        Open the session in the connection's task and wait until it is initialized.
+        
+        Args:
+            open_session: Opens transport and session on the given exit stack, returns (session, initialize result)
+        """
+        ready = asyncio.get_running_loop().create_future()
+        self.task = asyncio.create_task(self._run(open_session, ready))
+        init_result = await ready
+        self.resource_capabilities = init_result.capabilities.resources
+    
+    async def _run(self, open_session, ready: asyncio.Future):
+        """Keep the session open until close() is called."""
+        try:
+            async with AsyncExitStack() as stack:
+                self.session, init_result = await open_session(stack)
+                ready.set_result(init_result)
+                await self.stop_event.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"Connection to {self.server_name} closed with an error: {e}")
+        finally:
+            self.session = None
+    
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a call as in flight while the block runs."""
+        self.in_flight += 1
+        self.idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self.idle.set()
+    
+    async def close(self, drain_timeout: float = 0.0):
+        """
+        Close the session, first waiting for in-flight calls to finish.
+        
+        Args:
+            drain_timeout: Seconds to wait for in-flight calls before closing anyway
+        """
+        if drain_timeout > 0 and self.in_flight:
+            try:
+                await asyncio.wait_for(self.idle.wait(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"Closing {self.server_name} with {self.in_flight} calls still in flight")
+        self.stop_event.set()
+        if self.task is not None:
+            # asyncio.wait does not cancel the task if this close() is cancelled
+            await asyncio.wait({self.task})
+
 
 class MCPClient:
     """Client for interacting with MCP servers."""
     
-    def __init__(self, server_configs: Dict[str, Dict[str, Any]]):
+    def __init__(
+        self,
+        server_configs: Dict[str, Dict[str, Any]],
+        default_timeout: float = 60.0,
+        circuit_failure_threshold: int = 3,
+        circuit_reset_timeout: float = 30.0,
+        resource_cache_ttl: float = 300.0,
+        http_max_connections: int = 10,
+        http_keepalive_expiry: float = 120.0,
+        max_outstanding: int = 8,
+        scheduler_weights: Optional[Dict[str, float]] = None
+    ):
         """
         Initialize MCP client with server configurations.
         
+        Server configs may set ``timeout`` (seconds, applies to every call on
+        the server) and ``tool_timeouts`` (tool name -> seconds). ``transport``
+        selects "stdio" (default: ``command``/``args``/``env``) or a native
+        HTTP transport, "streamable_http" or "sse" (``url``, optional ``headers``).
+        An HTTP server that also sets ``command`` is started over stdio with
+        it when the installed mcp package lacks the HTTP transport.
+        ``max_outstanding`` overrides the concurrent request bound of a server.
+        
         Args:
             server_configs: Dictionary of server name -> server config
+            default_timeout: Deadline for servers without a configured timeout
+            circuit_failure_threshold: Consecutive timeouts that open a server's circuit
+            circuit_reset_timeout: Seconds an open circuit fails fast before a trial call
+            resource_cache_ttl: Lifetime of cached resources on servers without change notifications
+            http_max_connections: Connection pool size of each HTTP server
+            http_keepalive_expiry: Seconds an idle pooled HTTP connection is kept open
+            max_outstanding: Concurrent requests per server; further calls wait in fair queues
+            scheduler_weights: Calls per round-robin round by traffic class (see tool_scheduler.py)
         """
         self.server_configs = server_configs
-        self.sessions: Dict[str, ClientSession] = {}
-        self.exit_stack = AsyncExitStack()
+        self.connections: Dict[str, ServerConnection] = {}
+        # Replaced or removed connections that are finishing their in-flight calls
+        self.draining: Dict[asyncio.Task, ServerConnection] = {}
+        self.reload_lock = asyncio.Lock()
+        self.default_timeout = default_timeout
+        self.circuit_failure_threshold = circuit_failure_threshold
+        self.circuit_reset_timeout = circuit_reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        for name in server_configs:
+            self._breaker_for(name)
+        self.timeouts: Dict[str, int] = {name: 0 for name in server_configs}
+        self.resource_cache = ResourceCache(resource_cache_ttl)
+        self.subscriptions: Set[Tuple[str, str]] = set()
+        self.http_max_connections = http_max_connections
+        self.http_keepalive_expiry = http_keepalive_expiry
+        self.max_outstanding = max_outstanding
+        self.scheduler_weights = scheduler_weights or {"interactive": 4.0, "batch": 1.0}
+        self.schedulers: Dict[str, FairScheduler] = {}
+    
+    @classmethod
+    def from_config(cls, config) -> "MCPClient":
+        """Create a client from the Config class."""
+        return cls(
+            config.MCP_SERVERS,
+            default_timeout=config.MCP_DEFAULT_TIMEOUT,
+            circuit_failure_threshold=config.MCP_CIRCUIT_FAILURE_THRESHOLD,
+            circuit_reset_timeout=config.MCP_CIRCUIT_RESET_TIMEOUT,
+            resource_cache_ttl=config.MCP_RESOURCE_CACHE_TTL,
+            http_max_connections=config.MCP_HTTP_MAX_CONNECTIONS,
+            http_keepalive_expiry=config.MCP_HTTP_KEEPALIVE_EXPIRY,
+            max_outstanding=config.MCP_MAX_OUTSTANDING,
+            scheduler_weights={
+                "interactive": config.MCP_WEIGHT_INTERACTIVE,
+                "batch": config.MCP_WEIGHT_BATCH
+            }
+        )
+    
+    @property
+    def sessions(self) -> Dict[str, ClientSession]:
+        """Sessions that take new calls, by server name."""
+        return {
+            name: connection.session
+            for name, connection in self.connections.items()
+            if connection.session is not None
+        }
+    
+    def get_timeout(self, server_name: str, tool_name: Optional[str] = None) -> float:
+        """Deadline for a call: per-tool setting, then per-server, then the default."""
+        server_config = self.server_configs.get(server_name, {})
+        if tool_name and tool_name in server_config.get("tool_timeouts", {}):
+            return float(server_config["tool_timeouts"][tool_name])
+        return float(server_config.get("timeout", self.default_timeout))
+    
+    def _breaker_for(self, server_name: str) -> CircuitBreaker:
+        """The server's circuit breaker, created with the configured thresholds if missing."""
+        breaker = self.breakers.get(server_name)
+        if breaker is None:
+            breaker = CircuitBreaker(server_name, self.circuit_failure_threshold, self.circuit_reset_timeout)
+            self.breakers[server_name] = breaker
+        return breaker
+    
+    def _scheduler(self, server_name: str) -> FairScheduler:
+        """The server's fair scheduler (kept across reloads of the server)."""
+        scheduler = self.schedulers.get(server_name)
+        if scheduler is None:
+            max_outstanding = self.server_configs.get(server_name, {}).get("max_outstanding", self.max_outstanding)
+            scheduler = FairScheduler(server_name, int(max_outstanding), self.scheduler_weights)
+            self.schedulers[server_name] = scheduler
+        return scheduler
+    
+    async def _call_with_deadline(
+        self,
+        server_name: str,
+        label: str,
+        timeout: float,
+        call: Callable[[ClientSession], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run a session call under a deadline and the server's circuit breaker.
+        
+        On timeout the pending request is cancelled; the session stays usable
+        because the MCP SDK drops the response stream of a cancelled request.
+        The call counts as in flight on its connection, so a reload drains it
+        before closing that connection. It waits for a slot of the server's
+        fair scheduler first; the deadline only covers the server call itself.
+        """
+        connection = self.connections.get(server_name)
+        if connection is None or connection.session is None:
+            raise ValueError(f"Server {server_name} not connected")
+        breaker = self._breaker_for(server_name)
+        breaker.before_call()
+        try:
+            with connection.track():
+                async with self._scheduler(server_name).slot():
+                    result = await asyncio.wait_for(call(connection.session), timeout=timeout)
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            self.timeouts[server_name] = self.timeouts.get(server_name, 0) + 1
+            raise ToolTimeoutError(server_name, label, timeout)
+        except asyncio.CancelledError:
+            breaker.record_aborted()
+            raise
+        except Exception:
+            # The server answered, so it is alive even if the call failed
+            breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-server timeout counts, circuit breaker states and in-flight calls."""
+        return {
+            name: {
+                **breaker.get_stats(),
+                "timeouts": self.timeouts.get(name, 0),
+                "in_flight": self.connections[name].in_flight if name in self.connections else 0,
+                **({"scheduler": self.schedulers[name].get_stats()} if name in self.schedulers else {})
+            }
+            for name, breaker in self.breakers.items()
+        }
         
     async def connect(self):
         """Connect to all configured MCP servers."""
         if not self.server_configs:
             print("No MCP servers configured.")
             return
+        
+        connections = await asyncio.gather(*(
+            self._open_connection(server_name, config)
+            for server_name, config in self.server_configs.items()
+        ))
+        for connection in connections:
+            if connection is not None:
+                self._activate(connection)
+    
+    async def reload(self, server_configs: Dict[str, Dict[str, Any]], drain_timeout: float = 120.0) -> Dict[str, List[str]]:
+        """
+        Apply a new server configuration without restarting unchanged servers.
+        
+        New and changed servers are connected first; a changed server keeps
+        serving on its old connection until the new one is ready, and keeps
+        the old one if the new connection fails. Replaced and removed
+        connections stop taking new calls at once and are closed in the
+        background after their in-flight calls finish.
+        
+        Args:
+            server_configs: Complete new configuration (server name -> config)
+            drain_timeout: Seconds to wait for in-flight calls before closing a connection anyway
             
-        for server_name, config in self.server_configs.items():
-            try:
-                server_params = StdioServerParameters(
-                    command=config["command"],
-                    args=config.get("args", []),
-                    env=config.get("env")
+        Returns:
+            Server names by outcome: "added", "changed", "removed", "unchanged" and "failed"
+        """
+        async with self.reload_lock:
+            old_configs = self.server_configs
+            added = [name for name in server_configs if name not in old_configs]
+            removed = [name for name in old_configs if name not in server_configs]
+            changed = [
+                name for name in server_configs
+                if name in old_configs and server_configs[name] != old_configs[name]
+            ]
+            # Unchanged servers that failed to connect before get another attempt
+            retried = [
+                name for name in server_configs
+                if name in old_configs and name not in changed and name not in self.connections
+            ]
+            
+            to_start = added + changed + retried
+            connections = await asyncio.gather(*(
+                self._open_connection(name, server_configs[name]) for name in to_start
+            ))
+            
+            configs = dict(server_configs)
+            retiring = []
+            failed = []
+            for name, connection in zip(to_start, connections):
+                if connection is None:
+                    failed.append(name)
+                    if name in self.connections:
+                        # Still served by the old connection, so keep its config
+                        configs[name] = self.connections[name].config
+                    continue
+                previous = self._activate(connection)
+                if previous is not None:
+                    retiring.append(previous)
+            for name in removed:
+                connection = self.connections.pop(name, None)
+                if connection is not None:
+                    retiring.append(connection)
+                self.breakers.pop(name, None)
+                self.timeouts.pop(name, None)
+                self.schedulers.pop(name, None)
+                self._forget_resources(name)
+            self.server_configs = configs
+        
+        for connection in retiring:
+            task = asyncio.create_task(connection.close(drain_timeout))
+            self.draining[task] = connection
+            task.add_done_callback(lambda done: self.draining.pop(done, None))
+        
+        return {
+            "added": [name for name in added if name not in failed],
+            "changed": [name for name in changed if name not in failed],
+            "removed": removed,
+            "unchanged": [name for name in server_configs if name not in to_start],
+            "failed": failed
+        }
+    
+    async def _open_connection(self, server_name: str, config: Dict[str, Any]) -> Optional[ServerConnection]:
+        """Open and initialize a connection to one server (None if it fails)."""
+        connection = ServerConnection(server_name, config)
+        try:
+            await connection.start(lambda stack: self._open_session(stack, server_name, config))
+        except Exception as e:
+            print(f"✗ Failed to connect to {server_name}: {e}")
+            return None
+        print(f"✓ Connected to MCP server: {server_name} ({config.get('transport', 'stdio')})")
+        return connection
+    
+    def _activate(self, connection: ServerConnection) -> Optional[ServerConnection]:
+        """Route new calls for a server to a connection; returns the connection it replaces."""
+        server_name = connection.server_name
+        previous = self.connections.get(server_name)
+        self.connections[server_name] = connection
+        # A new connection starts with a closed circuit and no cached resources
+        self.breakers.pop(server_name, None)
+        self._breaker_for(server_name)
+        self.timeouts.setdefault(server_name, 0)
+        # Queued calls keep their place; only the bound follows the new config
+        if server_name in self.schedulers:
+            self.schedulers[server_name].set_max_outstanding(
+                int(connection.config.get("max_outstanding", self.max_outstanding))
+            )
+        self._forget_resources(server_name)
+        return previous
+    
+    def _forget_resources(self, server_name: str):
+        """Drop cached resources and subscriptions of a server."""
+        self.resource_cache.invalidate_server(server_name)
+        self.subscriptions = {key for key in self.subscriptions if key[0] != server_name}
+    
+    async def _open_session(
+        self,
+        stack: AsyncExitStack,
+        server_name: str,
+        config: Dict[str, Any]
+    ) -> Tuple[ClientSession, Any]:
+        """Open a server's transport and session on an exit stack and initialize the session."""
+        read, write = await self._open_transport(stack, server_name, config)
+        session = await stack.enter_async_context(
+            ClientSession(read, write, message_handler=self._notification_handler(server_name))
+        )
+        init_result = await session.initialize()
+        return session, init_result
+    
+    async def _open_transport(
+        self,
+        stack: AsyncExitStack,
+        server_name: str,
+        config: Dict[str, Any]
+    ) -> Tuple[Any, Any]:
+        """Open a server's transport on an exit stack and return its (read, write) streams."""
+        transport = config.get("transport", "stdio")
+        if transport in TRANSPORTS and transport != "stdio" and not transport_available(transport):
+            if not config.get("command"):
+                raise RuntimeError(
+                    f"MCP transport {transport} is not available in the installed mcp package "
+                    f"and {server_name} has no 'command' to fall back to"
                 )
-                
-                stdio_transport = await self.exit_stack.enter_async_context(
-                    stdio_client(server_params)
+            # e.g. the npx mcp-remote bridge configured next to the URL
+            print(f"⚠ MCP transport {transport} is not available; starting {server_name} over stdio instead")
+            transport = "stdio"
+        if transport == "stdio":
+            server_params = StdioServerParameters(
+                command=config["command"],
+                args=config.get("args", []),
+                env=config.get("env")
+            )
+            read, write = await stack.enter_async_context(stdio_client(server_params))
+            return read, write
+        
+        # Long tool calls may answer on the POST itself, so the HTTP read timeout must outlast them
+        server_timeout = float(config.get("timeout", self.default_timeout))
+        http_timeout = max([server_timeout, *config.get("tool_timeouts", {}).values()]) + 5
+        if transport == "streamable_http":
+            if streamablehttp_client is not None:
+                streams = await stack.enter_async_context(
+                    streamablehttp_client(
+                        config["url"],
+                        headers=config.get("headers"),
+                        timeout=http_timeout,
+                        httpx_client_factory=self._http_client_factory
+                    )
                 )
-                read, write = stdio_transport
-                session = await self.exit_stack.enter_async_context(
-                    ClientSession(read, write)
+            else:
+                http_client = await stack.enter_async_context(
+                    self._http_client_factory(
+                        headers=config.get("headers"),
+                        timeout=httpx.Timeout(30.0, read=http_timeout)
+                    )
                 )
-                
-                await session.initialize()
-                self.sessions[server_name] = session
-                print(f"✓ Connected to MCP server: {server_name}")
-                
-            except Exception as e:
-                print(f"✗ Failed to connect to {server_name}: {e}")
+                streams = await stack.enter_async_context(
+                    streamable_http_client(config["url"], http_client=http_client)
+                )
+            # Some versions also yield a session-id getter
+            return streams[0], streams[1]
+        if transport == "sse":
+            read, write = await stack.enter_async_context(
+                sse_client(config["url"], headers=config.get("headers"), timeout=http_timeout)
+            )
+            return read, write
+        raise ValueError(f"Unknown MCP transport for {server_name}: {transport} (expected one of {TRANSPORTS})")
+    
+    def _http_client_factory(self, headers=None, timeout=None, auth=None) -> "httpx.AsyncClient":
+        """Keep-alive HTTP client used by a streamable HTTP session for its whole lifetime."""
+        return httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout if timeout is not None else httpx.Timeout(30.0, read=300.0),
+            auth=auth,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.http_max_connections,
+                max_keepalive_connections=self.http_max_connections,
+                keepalive_expiry=self.http_keepalive_expiry
+            )
+        )
     
     async def disconnect(self):
-        """Disconnect from all MCP servers."""
-        await self.exit_stack.aclose()
-        self.sessions.clear()
+        """Disconnect from all MCP servers, including connections that are still draining."""
+        # Stop waiting for in-flight calls; every connection is closed right away below
+        connections = list(self.connections.values()) + list(self.draining.values())
+        for task in list(self.draining):
+            task.cancel()
+        self.connections.clear()
+        await asyncio.gather(*(connection.close() for connection in connections))
+        self.subscriptions.clear()
+        for server_name in self.server_configs:
+            self.resource_cache.invalidate_server(server_name)
+    
+    def _notification_handler(self, server_name: str):
+        """Build the session message handler that invalidates cached resources."""
+        async def handle(message: Any):
+            if mcp_types is None:
+                return
+            notification = getattr(message, "root", message)
+            if isinstance(notification, mcp_types.ResourceUpdatedNotification):
+                self.resource_cache.invalidate((server_name, str(notification.params.uri)), notification=True)
+            elif isinstance(notification, mcp_types.ResourceListChangedNotification):
+                self.resource_cache.invalidate((server_name, None), notification=True)
+        return handle
+    
+    def _supports(self, server_name: str, *features: str) -> bool:
+        """Whether a server advertised a resources capability (any of the given field spellings)."""
+        connection = self.connections.get(server_name)
+        capabilities = connection.resource_capabilities if connection is not None else None
+        return capabilities is not None and any(getattr(capabilities, feature, False) for feature in features)
         
     async def list_tools(self) -> List[Dict[str, Any]]:
         """List all available tools from connected servers."""
@@ -96,10 +611,16 @@ class MCPClient:
         if server_name not in self.sessions:
             raise ValueError(f"Server {server_name} not connected")
             
-        session = self.sessions[server_name]
         try:
-            result = await session.call_tool(tool_name, arguments)
+            result = await self._call_with_deadline(
+                server_name,
+                tool_name,
+                self.get_timeout(server_name, tool_name),
+                lambda session: session.call_tool(tool_name, arguments)
+            )
             return result
+        except (ToolTimeoutError, CircuitOpenError):
+            raise
         except Exception as e:
             raise Exception(f"Error calling tool {tool_name}: {e}")
     
@@ -111,19 +632,23 @@ class MCPClient:
             try:
                 response = await session.list_resources()
                 for resource in response.resources:
-                    resource_info = {
-                        "server": server_name,
-                        "uri": resource.uri,
-                        "name": resource.name,
-                        "description": resource.description,
-                        "mimeType": resource.mimeType
-                    }
-                    all_resources.append(resource_info)
+                    all_resources.append(self._resource_info(server_name, resource))
             except Exception as e:
                 print(f"Error listing resources from {server_name}: {e}")
                 
         return all_resources
     
+    @staticmethod
+    def _resource_info(server_name: str, resource: Any) -> Dict[str, Any]:
+        """Catalog entry for a resource."""
+        return {
+            "server": server_name,
+            "uri": resource.uri,
+            "name": resource.name,
+            "description": resource.description,
+            "mimeType": resource.mimeType
+        }
+    
     async def read_resource(self, server_name: str, uri: str) -> Any:
         """
         Read a resource from a specific MCP server.
@@ -138,11 +663,97 @@ class MCPClient:
         if server_name not in self.sessions:
             raise ValueError(f"Server {server_name} not connected")
             
-        session = self.sessions[server_name]
         try:
-            result = await session.read_resource(uri)
+            result = await self._call_with_deadline(
+                server_name,
+                str(uri),
+                self.get_timeout(server_name),
+                lambda session: session.read_resource(uri)
+            )
             return result
+        except (ToolTimeoutError, CircuitOpenError):
+            raise
         except Exception as e:
             raise Exception(f"Error reading resource {uri}: {e}")
-
-
+    
+    async def get_resources(self) -> Dict[str, Any]:
+        """
+        List resources of all servers through the resource cache.
+        
+        Returns:
+            {"value": resource infos, "etag": ETag of the whole list, "cached": served without a round trip}
+        """
+        resources = []
+        etags = []
+        cached = True
+        for server_name in list(self.sessions):
+            try:
+                entry, hit = await self.resource_cache.get_or_load(
+                    (server_name, None),
+                    lambda server_name=server_name: self._load_resource_list(server_name)
+                )
+            except Exception as e:
+                print(f"Error listing resources from {server_name}: {e}")
+                continue
+            resources.extend(entry.value)
+            etags.append(entry.etag)
+            cached = cached and hit
+        return {"value": resources, "etag": compute_etag(etags), "cached": cached}
+    
+    async def _load_resource_list(self, server_name: str) -> Tuple[Any, bool]:
+        """Fetch a server's resource list for the cache."""
+        response = await self._call_with_deadline(
+            server_name,
+            "resources/list",
+            self.get_timeout(server_name),
+            lambda session: session.list_resources()
+        )
+        resources = [self._resource_info(server_name, resource) for resource in response.resources]
+        return to_jsonable(resources), self._supports(server_name, "listChanged", "list_changed")
+    
+    async def get_resource(self, server_name: str, uri: str) -> Dict[str, Any]:
+        """
+        Read a resource through the resource cache.
+        
+        Args:
+            server_name: Name of the server
+            uri: Resource URI
+            
+        Returns:
+            {"value": resource contents, "etag": ETag of the contents, "cached": served without a round trip}
+        """
+        if server_name not in self.sessions:
+            raise ValueError(f"Server {server_name} not connected")
+        entry, hit = await self.resource_cache.get_or_load(
+            (server_name, str(uri)),
+            lambda: self._load_resource(server_name, str(uri))
+        )
+        return {"value": entry.value, "etag": entry.etag, "cached": hit}
+    
+    async def _load_resource(self, server_name: str, uri: str) -> Tuple[Any, bool]:
+        """Read a resource for the cache, subscribing first when the server supports it."""
+        # Subscribing before the read means no update can slip in between
+        notified = await self._subscribe(server_name, uri)
+        result = await self.read_resource(server_name, uri)
+        return to_jsonable(result), notified
+    
+    async def _subscribe(self, server_name: str, uri: str) -> bool:
+        """Subscribe to resource updates; returns whether the cache can rely on notifications."""
+        if not self._supports(server_name, "subscribe"):
+            return False
+        if (server_name, uri) in self.subscriptions:
+            return True
+        try:
+            await self._call_with_deadline(
+                server_name,
+                f"subscribe {uri}",
+                self.get_timeout(server_name),
+                lambda session: session.subscribe_resource(uri)
+            )
+        except (ToolTimeoutError, CircuitOpenError):
+            raise
+        except Exception as e:
+            print(f"Could not subscribe to {uri} on {server_name}, falling back to TTL: {e}")
+            return False
+        self.subscriptions.add((server_name, uri))
+        return True
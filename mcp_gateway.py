@@ -0,0 +1,435 @@
+"""Shared MCP gateway process.
+
+The gateway owns the MCP server sessions (and their ``mcp-remote``
+subprocesses) and exposes them to API workers over a local Unix socket,
+so running several uvicorn workers does not multiply MCP connections.
+
+Start the gateway before the API:
+
+    python mcp_gateway.py --socket /tmp/mcp_gateway.sock
+    MCP_GATEWAY_SOCKET=/tmp/mcp_gateway.sock API_WORKERS=4 python main.py
+
+``kill -HUP <gateway pid>`` re-reads MCP_SERVERS_FILE and reloads the
+servers in place; workers pick up the new tool catalog on their next turn.
+
+Wire format is newline-delimited JSON. Requests look like
+``{"id": 1, "op": "call_tool", "params": {...}}`` and responses like
+``{"id": 1, "result": ...}`` or ``{"id": 1, "error": {"type": ..., "message": ...}}``.
+A worker that gives up on a request sends ``{"op": "cancel", "params": {"id": 1}}``;
+the gateway cancels the request (freeing its MCP server slot) and sends no response.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+from typing import Any, Dict, List, Optional
+
+from circuit_breaker import CircuitOpenError
+from config import Config, load_servers_file
+from mcp_client import MCPClient, ToolTimeoutError, to_jsonable
+from tool_scheduler import call_context, current_call
+
+try:
+    from mcp.types import CallToolResult, ReadResourceResult
+except ImportError:
+    CallToolResult = None
+    ReadResourceResult = None
+
+# Tool results can be large; the asyncio default line limit is 64 KiB
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class MCPGateway:
+    """Serve one shared MCPClient to many API workers over a Unix socket."""
+
+    def __init__(self, server_configs: Dict[str, Dict[str, Any]], socket_path: str):
+        """
+        Initialize the gateway.
+
+        Args:
+            server_configs: Dictionary of server name -> server config
+            socket_path: Path of the Unix socket to listen on
+        """
+        self.mcp_client = MCPClient(
+            server_configs,
+            default_timeout=Config.MCP_DEFAULT_TIMEOUT,
+            circuit_failure_threshold=Config.MCP_CIRCUIT_FAILURE_THRESHOLD,
+            circuit_reset_timeout=Config.MCP_CIRCUIT_RESET_TIMEOUT,
+            resource_cache_ttl=Config.MCP_RESOURCE_CACHE_TTL,
+            http_max_connections=Config.MCP_HTTP_MAX_CONNECTIONS,
+            http_keepalive_expiry=Config.MCP_HTTP_KEEPALIVE_EXPIRY,
+            max_outstanding=Config.MCP_MAX_OUTSTANDING,
+            scheduler_weights={
+                "interactive": Config.MCP_WEIGHT_INTERACTIVE,
+                "batch": Config.MCP_WEIGHT_BATCH
+            }
+        )
+        self.socket_path = socket_path
+        self.tools_cache: Optional[List[Dict[str, Any]]] = None
+        # Bumped on every reload so workers know when to reload their catalog
+        self.catalog_version = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Connect to MCP servers, load the tool catalog and start listening."""
+        await self.mcp_client.connect()
+        await self.refresh_tools()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path, limit=STREAM_LIMIT
+        )
+        print(f"✓ MCP gateway listening on {self.socket_path}")
+
+    async def stop(self):
+        """Stop listening and disconnect from MCP servers."""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        await self.mcp_client.disconnect()
+
+    async def refresh_tools(self) -> List[Dict[str, Any]]:
+        """Reload the shared tool catalog from the MCP servers."""
+        self.tools_cache = to_jsonable(await self.mcp_client.list_tools())
+        return self.tools_cache
+
+    async def reload(self, server_configs: Dict[str, Dict[str, Any]], drain_timeout: float) -> Dict[str, Any]:
+        """Reload the MCP servers in place and publish the new tool catalog."""
+        changes = await self.mcp_client.reload(server_configs, drain_timeout)
+        await self.refresh_tools()
+        self.catalog_version += 1
+        return {**changes, "catalog_version": self.catalog_version}
+
+    async def _dispatch(self, op: str, params: Dict[str, Any]) -> Any:
+        """Run a single gateway operation."""
+        if op == "list_tools":
+            if self.tools_cache is None:
+                await self.refresh_tools()
+            return self.tools_cache
+        if op == "refresh_tools":
+            return await self.refresh_tools()
+        if op == "catalog_version":
+            return self.catalog_version
+        if op == "reload":
+            return await self.reload(params["servers"], params.get("drain_timeout", Config.MCP_DRAIN_TIMEOUT))
+        if op == "call_tool":
+            # Workers' sessions share the gateway's fair queues
+            with call_context(params.get("session_id") or "default", params.get("priority") or "interactive"):
+                return to_jsonable(await self.mcp_client.call_tool(
+                    params["server_name"], params["tool_name"], params.get("arguments") or {}
+                ))
+        if op == "list_resources":
+            return to_jsonable(await self.mcp_client.list_resources())
+        if op == "read_resource":
+            return to_jsonable(await self.mcp_client.read_resource(
+                params["server_name"], params["uri"]
+            ))
+        if op == "get_resources":
+            return await self.mcp_client.get_resources()
+        if op == "get_resource":
+            return await self.mcp_client.get_resource(params["server_name"], params["uri"])
+        raise ValueError(f"Unknown gateway operation: {op}")
+
+    async def _handle_request(self, request: Dict[str, Any], writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        """Execute a request and write its response."""
+        try:
+            result = await self._dispatch(request.get("op", ""), request.get("params") or {})
+            response = {"id": request.get("id"), "result": result}
+        except Exception as e:
+            error = {"type": type(e).__name__, "message": str(e)}
+            if isinstance(e, (ToolTimeoutError, CircuitOpenError)):
+                error["details"] = e.to_result()
+            response = {"id": request.get("id"), "error": error}
+
+        async with lock:
+            writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one worker connection; requests on it run concurrently."""
+        write_lock = asyncio.Lock()
+        # Running requests by id, so a worker can cancel them
+        tasks: Dict[Any, asyncio.Task] = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Gateway received invalid JSON: {e}")
+                    continue
+                if request.get("op") == "cancel":
+                    task = tasks.get((request.get("params") or {}).get("id"))
+                    if task is not None:
+                        task.cancel()
+                    continue
+                task = asyncio.create_task(self._handle_request(request, writer, write_lock))
+                tasks[request.get("id")] = task
+                task.add_done_callback(lambda _, request_id=request.get("id"): tasks.pop(request_id, None))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in list(tasks.values()):
+                task.cancel()
+            writer.close()
+
+
+class GatewayClient:
+    """MCPClient-compatible client that forwards calls to an MCPGateway."""
+
+    def __init__(self, socket_path: str):
+        """
+        Initialize the gateway client.
+
+        Args:
+            socket_path: Path of the gateway's Unix socket
+        """
+        self.socket_path = socket_path
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.ids = itertools.count(1)
+        self.reader_task: Optional[asyncio.Task] = None
+        self.connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """Open the connection to the gateway."""
+        async with self.connect_lock:
+            if self.writer is not None and not self.writer.is_closing():
+                return
+            self.reader, self.writer = await asyncio.open_unix_connection(
+                self.socket_path, limit=STREAM_LIMIT
+            )
+            self.reader_task = asyncio.create_task(self._read_responses())
+            print(f"✓ Connected to MCP gateway: {self.socket_path}")
+
+    async def disconnect(self):
+        """Close the connection to the gateway."""
+        if self.reader_task:
+            self.reader_task.cancel()
+            self.reader_task = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        self._fail_pending(ConnectionError("Gateway connection closed"))
+
+    def _fail_pending(self, error: Exception):
+        """Fail all requests that are waiting for a response."""
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
+
+    @staticmethod
+    def _to_exception(error: Dict[str, Any]) -> Exception:
+        """Rebuild the exception raised inside the gateway."""
+        details = error.get("details") or {}
+        if error.get("type") == "ToolTimeoutError":
+            return ToolTimeoutError(details.get("server", ""), details.get("tool", ""), details.get("timeout_seconds", 0))
+        if error.get("type") == "CircuitOpenError":
+            return CircuitOpenError(details.get("server", ""), details.get("retry_after_seconds", 0))
+        if error.get("type") == "ValueError":
+            return ValueError(error.get("message", "Gateway error"))
+        return Exception(error.get("message", "Gateway error"))
+
+    async def _read_responses(self):
+        """Route gateway responses to the waiting requests."""
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.pending.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(self._to_exception(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Gateway connection error: {e}")
+        finally:
+            if self.writer:
+                self.writer.close()
+            self._fail_pending(ConnectionError("Gateway connection lost"))
+
+    async def _request(self, op: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a request to the gateway and wait for its result."""
+        if self.writer is None or self.writer.is_closing():
+            await self.connect()
+
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        payload = {"id": request_id, "op": op, "params": params or {}}
+        self.writer.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        await self.writer.drain()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Stop the call in the gateway too, or it keeps holding a server slot
+            if future.cancelled() and self.writer is not None and not self.writer.is_closing():
+                cancel = {"op": "cancel", "params": {"id": request_id}}
+                self.writer.write((json.dumps(cancel) + "\n").encode("utf-8"))
+            raise
+        finally:
+            self.pending.pop(request_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return local connection state (server-side stats live in the gateway)."""
+        return {
+            "gateway": self.socket_path,
+            "connected": self.writer is not None and not self.writer.is_closing(),
+            "pending_requests": len(self.pending)
+        }
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """List all available tools from the gateway's shared catalog."""
+        try:
+            return await self._request("list_tools")
+        except Exception as e:
+            print(f"Error listing tools from gateway: {e}")
+            return []
+
+    async def catalog_version(self) -> int:
+        """Version of the gateway's tool catalog (changes on every reload)."""
+        return await self._request("catalog_version")
+
+    async def reload(self, server_configs: Dict[str, Dict[str, Any]], drain_timeout: float = 120.0) -> Dict[str, Any]:
+        """
+        Reload the gateway's MCP servers (see MCPClient.reload).
+
+        Args:
+            server_configs: Complete new configuration (server name -> config)
+            drain_timeout: Seconds to wait for in-flight calls before closing a connection anyway
+
+        Returns:
+            Server names by outcome and the new catalog version
+        """
+        return await self._request("reload", {"servers": server_configs, "drain_timeout": drain_timeout})
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """
+        Call a tool through the gateway.
+
+        Args:
+            server_name: Name of the server
+            tool_name: Name of the tool to call
+            arguments: Tool arguments
+
+        Returns:
+            Tool result
+        """
+        session_id, priority = current_call()
+        result = await self._request("call_tool", {
+            "server_name": server_name,
+            "tool_name": tool_name,
+            "arguments": arguments,
+            "session_id": session_id,
+            "priority": priority
+        })
+        if CallToolResult is not None and isinstance(result, dict):
+            return CallToolResult.model_validate(result)
+        return result
+
+    async def list_resources(self) -> List[Dict[str, Any]]:
+        """List all available resources through the gateway."""
+        try:
+            return await self._request("list_resources")
+        except Exception as e:
+            print(f"Error listing resources from gateway: {e}")
+            return []
+
+    async def read_resource(self, server_name: str, uri: str) -> Any:
+        """
+        Read a resource through the gateway.
+
+        Args:
+            server_name: Name of the server
+            uri: Resource URI
+
+        Returns:
+            Resource contents
+        """
+        result = await self._request("read_resource", {"server_name": server_name, "uri": str(uri)})
+        if ReadResourceResult is not None and isinstance(result, dict):
+            return ReadResourceResult.model_validate(result)
+        return result
+
+
+    async def get_resources(self) -> Dict[str, Any]:
+        """List resources through the gateway's resource cache."""
+        return await self._request("get_resources")
+
+    async def get_resource(self, server_name: str, uri: str) -> Dict[str, Any]:
+        """
+        Read a resource through the gateway's resource cache.
+
+        Args:
+            server_name: Name of the server
+            uri: Resource URI
+
+        Returns:
+            {"value": resource contents, "etag": ETag of the contents, "cached": served without a round trip}
+        """
+        return await self._request("get_resource", {"server_name": server_name, "uri": str(uri)})
+
+
+async def run_gateway(socket_path: str):
+    """Run the gateway until SIGINT/SIGTERM."""
+    gateway = MCPGateway(Config.MCP_SERVERS, socket_path)
+    await gateway.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    reloads = set()
+
+    def start_reload():
+        task = asyncio.create_task(reload_from_file(gateway))
+        reloads.add(task)
+        task.add_done_callback(reloads.discard)
+
+    if Config.MCP_SERVERS_FILE:
+        loop.add_signal_handler(signal.SIGHUP, start_reload)
+
+    await stop_event.wait()
+    print("\nShutting down MCP gateway...")
+    await gateway.stop()
+
+
+async def reload_from_file(gateway: MCPGateway):
+    """Reload the gateway's servers from MCP_SERVERS_FILE (SIGHUP)."""
+    try:
+        server_configs = load_servers_file(Config.MCP_SERVERS_FILE)
+        changes = await gateway.reload(server_configs, Config.MCP_DRAIN_TIMEOUT)
+        print(f"✓ MCP servers reloaded: {changes}")
+    except Exception as e:
+        print(f"✗ MCP server reload failed: {e}")
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Shared MCP gateway process")
+    parser.add_argument(
+        "--socket",
+        default=Config.MCP_GATEWAY_SOCKET or "/tmp/mcp_gateway.sock",
+        help="Unix socket path to listen on"
+    )
+    args = parser.parse_args()
+    asyncio.run(run_gateway(args.socket))
+
+
+if __name__ == "__main__":
+    main()
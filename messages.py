@@ -0,0 +1,263 @@
+"""Compact, immutable representation of conversation messages.
+
+History entries used to be a mix of dicts and SDK content-block objects
+(Pydantic models), which are heavy to keep around and had to be walked
+again by the logger on every prompt. Messages are now converted once
+into immutable ``__slots__`` records with an interned role. Block content
+is serialized to JSON a single time and that string is the only copy kept
+in memory; the conversation store writes it as-is and the prompt logger
+splices it into log lines without walking the content again. The API
+``messages`` parameter is memoized per turn (see ``to_api_messages``), so
+the agent's iterations only decode the messages added since the last one.
+"""
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+ROLE_USER = sys.intern("user")
+ROLE_ASSISTANT = sys.intern("assistant")
+TYPE_TEXT = sys.intern("text")
+TYPE_TOOL_USE = sys.intern("tool_use")
+TYPE_TOOL_RESULT = sys.intern("tool_result")
+
+
+def _dumps(value: Any) -> str:
+    """Serialize to JSON the same way the store and logs always have."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+class _Record:
+    """Base class for immutable slotted records."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if not name.startswith("_"))
+        return f"{type(self).__name__}({fields})"
+
+
+class TextPart(_Record):
+    """Plain text content block."""
+
+    __slots__ = ("text",)
+    type = TYPE_TEXT
+
+    def __init__(self, text: str):
+        object.__setattr__(self, "text", text)
+
+    def to_api(self) -> Dict[str, Any]:
+        return {"type": TYPE_TEXT, "text": self.text}
+
+
+class ToolUsePart(_Record):
+    """Tool call requested by the model."""
+
+    __slots__ = ("id", "name", "input")
+    type = TYPE_TOOL_USE
+
+    def __init__(self, id: str, name: str, input: Dict[str, Any]):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "name", sys.intern(name))
+        object.__setattr__(self, "input", input)
+
+    def to_api(self) -> Dict[str, Any]:
+        return {"type": TYPE_TOOL_USE, "id": self.id, "name": self.name, "input": self.input}
+
+
+class ToolResultPart(_Record):
+    """Result of a tool call, sent back to the model."""
+
+    __slots__ = ("tool_use_id", "content", "is_error")
+    type = TYPE_TOOL_RESULT
+
+    def __init__(self, tool_use_id: str, content: Any, is_error: bool = False):
+        object.__setattr__(self, "tool_use_id", tool_use_id)
+        object.__setattr__(self, "content", content)
+        object.__setattr__(self, "is_error", is_error)
+
+    def to_api(self) -> Dict[str, Any]:
+        block = {"type": TYPE_TOOL_RESULT, "tool_use_id": self.tool_use_id, "content": self.content}
+        if self.is_error:
+            block["is_error"] = True
+        return block
+
+
+class RawPart(_Record):
+    """Any other block type, kept verbatim as its API dict."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        object.__setattr__(self, "data", data)
+
+    @property
+    def type(self) -> str:
+        return self.data.get("type", "")
+
+    def to_api(self) -> Dict[str, Any]:
+        return self.data
+
+
+Part = Union[TextPart, ToolUsePart, ToolResultPart, RawPart]
+
+
+def part_from_api(block: Dict[str, Any]) -> Part:
+    """Build a part from an API-format content block dict."""
+    block_type = block.get("type")
+    keys = set(block)
+    if block_type == TYPE_TEXT and keys <= {"type", "text"}:
+        return TextPart(block["text"])
+    if block_type == TYPE_TOOL_USE and keys <= {"type", "id", "name", "input"}:
+        return ToolUsePart(block["id"], block["name"], block.get("input") or {})
+    if block_type == TYPE_TOOL_RESULT and keys <= {"type", "tool_use_id", "content", "is_error"}:
+        return ToolResultPart(block["tool_use_id"], block.get("content", ""), bool(block.get("is_error")))
+    return RawPart(block)
+
+
+def part_from_sdk(block: Any) -> Part:
+    """Build a part from an SDK content-block object without a full model dump."""
+    block_type = getattr(block, "type", None)
+    if block_type == TYPE_TEXT and not getattr(block, "citations", None):
+        return TextPart(block.text)
+    if block_type == TYPE_TOOL_USE:
+        return ToolUsePart(block.id, block.name, block.input)
+    if hasattr(block, "model_dump"):
+        return part_from_api(block.model_dump(exclude_none=True))
+    return part_from_api(dict(block))
+
+
+class Message(_Record):
+    """
+    One conversation message: an interned role plus its content.
+
+    Plain-text content is kept as the string itself. Block content is
+    serialized to JSON once, when the message is created, and only that
+    string is retained; parts and API dicts are rebuilt from it on demand.
+    """
+
+    __slots__ = ("role", "_text", "_blocks_json")
+
+    def __init__(self, role: str, content: Union[str, Iterable[Part]], content_json: Optional[str] = None):
+        """
+        Initialize the message.
+
+        Args:
+            role: "user" or "assistant"
+            content: Text or an iterable of parts
+            content_json: Already serialized block content (e.g. loaded from a store)
+        """
+        object.__setattr__(self, "role", sys.intern(role))
+        if isinstance(content, str):
+            object.__setattr__(self, "_text", content)
+            object.__setattr__(self, "_blocks_json", None)
+        else:
+            if content_json is None:
+                content_json = _dumps([part.to_api() for part in content])
+            object.__setattr__(self, "_text", None)
+            object.__setattr__(self, "_blocks_json", content_json)
+
+    @classmethod
+    def text(cls, role: str, text: str) -> "Message":
+        """Create a plain-text message."""
+        return cls(role, text)
+
+    @classmethod
+    def from_sdk_content(cls, role: str, blocks: Iterable[Any]) -> "Message":
+        """Create a message from SDK response content blocks."""
+        return cls(role, [part_from_sdk(block) for block in blocks])
+
+    @classmethod
+    def from_api(cls, message: Dict[str, Any]) -> "Message":
+        """Create a message from an API-format dict."""
+        content = message.get("content", "")
+        if isinstance(content, str):
+            return cls(message["role"], content)
+        return cls(message["role"], (), content_json=_dumps(list(content)))
+
+    @classmethod
+    def from_json(cls, role: str, content_json: str) -> "Message":
+        """Create a message from serialized content without re-serializing it."""
+        if content_json.startswith("["):
+            return cls(role, (), content_json=content_json)
+        return cls(role, json.loads(content_json))
+
+    @property
+    def is_text(self) -> bool:
+        """Whether the content is plain text."""
+        return self._text is not None
+
+    @property
+    def is_turn_start(self) -> bool:
+        """Whether this message opens a new turn (a user message with plain text)."""
+        return self.role == ROLE_USER and self._text is not None
+
+    @property
+    def content(self) -> Union[str, Tuple[Part, ...]]:
+        """Text, or the content blocks decoded into parts."""
+        if self._text is not None:
+            return self._text
+        return tuple(part_from_api(block) for block in json.loads(self._blocks_json))
+
+    @property
+    def tool_uses(self) -> List[ToolUsePart]:
+        """Tool calls contained in the message."""
+        if self._text is not None:
+            return []
+        return [part for part in self.content if isinstance(part, ToolUsePart)]
+
+    def content_to_api(self) -> Union[str, List[Dict[str, Any]]]:
+        """Content in API format (fresh containers, nothing is retained)."""
+        if self._text is not None:
+            return self._text
+        return json.loads(self._blocks_json)
+
+    def to_api(self) -> Dict[str, Any]:
+        """Message in the format expected by ``messages.create``."""
+        return {"role": self.role, "content": self.content_to_api()}
+
+    def content_json(self) -> str:
+        """Serialized content (memoized for block content, cheap for text)."""
+        if self._blocks_json is not None:
+            return self._blocks_json
+        return _dumps(self._text)
+
+    def to_json(self) -> str:
+        """Serialized message, built from the serialized content."""
+        return '{"role": ' + _dumps(self.role) + ', "content": ' + self.content_json() + "}"
+
+    def __repr__(self) -> str:
+        content = self._text if self._text is not None else self._blocks_json
+        return f"Message(role={self.role!r}, content={content[:60]!r})"
+
+
+def to_api_messages(
+    messages: Iterable[Message],
+    memo: Optional[Dict[Message, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convert a history to the ``messages`` parameter of the API.
+
+    Args:
+        messages: The history
+        memo: Converted messages of the current turn; pass the same dict for
+            every request of a turn so only new messages are decoded. The
+            converted dicts are shared and must not be modified.
+
+    Returns:
+        The messages in API format
+    """
+    if memo is None:
+        return [message.to_api() for message in messages]
+    converted = []
+    for message in messages:
+        api_message = memo.get(message)
+        if api_message is None:
+            api_message = memo[message] = message.to_api()
+        converted.append(api_message)
+    return converted
@@ -0,0 +1,56 @@
+"""Small in-process metric helpers."""
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a collection of values.
+
+    Args:
+        values: Samples
+        q: Percentile in the range 0-100
+
+    Returns:
+        The percentile value, or None if there are no samples
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyWindow:
+    """Rolling window of latency samples (in seconds)."""
+
+    def __init__(self, maxlen: int = 500):
+        """
+        Initialize the window.
+
+        Args:
+            maxlen: Number of most recent samples to keep
+        """
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def record(self, seconds: float):
+        """Add a sample."""
+        self.samples.append(seconds)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile of the samples in the window."""
+        return percentile(self.samples, q)
+
+    def summary(self, quantiles: List[float] = (50, 95, 99)) -> Dict[str, Optional[float]]:
+        """Sample count and percentiles in milliseconds."""
+        result: Dict[str, Optional[float]] = {"count": self.count}
+        for q in quantiles:
+            value = self.percentile(q)
+            result[f"p{q:g}_ms"] = round(value * 1000, 1) if value is not None else None
+        return result
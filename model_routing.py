@@ -0,0 +1,95 @@
+"""Routing of agent-loop iterations between a fast and a main model.
+
+Most iterations of the agent loop only decide which tool to call next.
+Those go to a faster, cheaper model; the main model is used for the
+final answer (a fast-model ``end_turn`` is discarded and re-asked) and
+whenever the fast model fails. Per-model latency and token usage are
+recorded so the end-to-end gain can be read from ``/metrics``.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from metrics import LatencyWindow
+
+
+class ModelRouter:
+    """Pick the model for each agent-loop iteration and keep per-model stats."""
+
+    def __init__(self, main_model: str, fast_model: Optional[str] = None):
+        """
+        Initialize the router.
+
+        Args:
+            main_model: Model used for final answers and escalations
+            fast_model: Model used for tool-planning iterations (None disables routing)
+        """
+        self.main_model = main_model
+        self.fast_model = fast_model if fast_model and fast_model != main_model else None
+        self.latency: Dict[str, LatencyWindow] = defaultdict(LatencyWindow)
+        self.usage: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0}
+        )
+        self.stats = {"fast_routed": 0, "fast_kept": 0, "escalations": defaultdict(int)}
+
+    @classmethod
+    def from_config(cls, config) -> "ModelRouter":
+        """Create a router from the Config class."""
+        return cls(config.MODEL_NAME, config.FAST_MODEL_NAME)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a fast model is configured."""
+        return self.fast_model is not None
+
+    def planning_model(self, has_tools: bool) -> str:
+        """Model for the next iteration; without tools there is nothing to plan."""
+        if self.enabled and has_tools:
+            self.stats["fast_routed"] += 1
+            return self.fast_model
+        return self.main_model
+
+    def escalation_reason(self, model: str, response: Any) -> Optional[str]:
+        """
+        Decide whether a response must be re-asked from the main model.
+
+        Returns:
+            The reason ("end_turn", "max_tokens", ...) or None to keep the response
+        """
+        if model == self.main_model:
+            return None
+        if response.stop_reason == "tool_use":
+            self.stats["fast_kept"] += 1
+            return None
+        return response.stop_reason or "unknown"
+
+    def record(self, model: str, seconds: float, response: Optional[Any] = None):
+        """Record the latency and token usage of one call (no response means it failed)."""
+        self.latency[model].record(seconds)
+        usage = self.usage[model]
+        usage["calls"] += 1
+        if response is None:
+            usage["errors"] += 1
+        else:
+            usage["input_tokens"] += response.usage.input_tokens
+            usage["output_tokens"] += response.usage.output_tokens
+
+    def record_escalation(self, reason: str):
+        """Count an escalation to the main model."""
+        self.stats["escalations"][reason] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return routing and escalation counters with per-model usage and latency percentiles."""
+        routed = self.stats["fast_routed"]
+        escalated = sum(self.stats["escalations"].values())
+        return {
+            "main_model": self.main_model,
+            "fast_model": self.fast_model,
+            "fast_routed": routed,
+            "fast_kept": self.stats["fast_kept"],
+            "escalations": dict(self.stats["escalations"]),
+            "escalation_rate": round(escalated / routed, 3) if routed else None,
+            "models": {
+                model: {**usage, "latency": self.latency[model].summary()}
+                for model, usage in self.usage.items()
+            }
+        }
@@ -0,0 +1,392 @@
+"""Deterministic replay of recorded sessions.
+
+Reads a ``logs/session_*.jsonl`` file written by PromptLogger and replays
+each conversation in it (grouped by session_id) through MCPAgent against a fake LLM and a fake MCP
+client that return the recorded outputs. No network access is needed, so
+real production traffic becomes an offline performance regression test:
+the time the agent spends in its own code is compared with the recorded
+wall-clock time of every turn.
+
+Usage:
+
+    python replay.py logs/session_20251015_101500.jsonl
+    python replay.py logs/session_*.jsonl --json --max-overhead-ms 50
+    python replay.py logs/session_x.jsonl --simulate-latency
+    python replay.py logs/session_x.jsonl --session 3f2a9c
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from rich.console import Console
+
+from agent import MCPAgent
+from config import Config
+from logger import PromptLogger
+
+
+class ReplayDivergence(Exception):
+    """Raised when the agent asks for something the recording does not contain."""
+
+
+@dataclass
+class RecordedTurn:
+    """One user turn of a recorded session."""
+    user_message: str
+    started_at: datetime
+    ended_at: datetime
+    responses: List[Dict[str, Any]] = field(default_factory=list)
+    tool_executions: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def recorded_ms(self) -> float:
+        return (self.ended_at - self.started_at).total_seconds() * 1000
+
+
+# Sessions of logs written before entries carried a session_id
+UNLABELLED_SESSION = "replay"
+
+
+def load_sessions(path: str) -> Dict[str, List[RecordedTurn]]:
+    """
+    Split a log into sessions and each session into turns.
+
+    Concurrent sessions interleave in one log file, so entries are grouped
+    by their session_id first. Within a session, a turn starts with a
+    prompt whose last message is a plain-text user message and contains
+    every response and tool execution until the next one.
+
+    Returns:
+        Turns by session id, in order of first appearance
+    """
+    sessions: Dict[str, List[RecordedTurn]] = {}
+    previous_ts: Dict[str, datetime] = {}
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["type"] not in ("prompt", "response", "tool_execution"):
+                continue
+            session_id = entry.get("session_id") or UNLABELLED_SESSION
+            turns = sessions.setdefault(session_id, [])
+            ts = datetime.fromisoformat(entry["timestamp"])
+            previous = previous_ts.get(session_id)
+
+            if entry["type"] == "prompt":
+                messages = entry.get("messages") or []
+                last = messages[-1] if messages else {}
+                # Follow-up prompts inside a turn end with tool results, not text
+                if last.get("role") == "user" and isinstance(last.get("content"), str):
+                    turns.append(RecordedTurn(last["content"], ts, ts))
+            elif turns and entry["type"] == "response":
+                entry["latency"] = (ts - previous).total_seconds() if previous else 0.0
+                turns[-1].responses.append(entry)
+            elif turns and entry["type"] == "tool_execution":
+                entry["latency"] = (ts - previous).total_seconds() if previous else 0.0
+                turns[-1].tool_executions.append(entry)
+
+            if turns:
+                turns[-1].ended_at = ts
+            previous_ts[session_id] = ts
+
+    return {session_id: turns for session_id, turns in sessions.items() if turns}
+
+
+def load_session(path: str, session_id: Optional[str] = None) -> List[RecordedTurn]:
+    """
+    Turns of one session of a log.
+
+    Args:
+        path: session_*.jsonl file
+        session_id: Session to load (may be omitted if the log holds only one)
+
+    Raises:
+        ValueError: If the session is not in the log, or none was given for a multi-session log
+    """
+    sessions = load_sessions(path)
+    if session_id is None:
+        if len(sessions) > 1:
+            raise ValueError(f"{path} holds {len(sessions)} sessions; choose one of: {', '.join(sessions)}")
+        return next(iter(sessions.values()), [])
+    if session_id not in sessions:
+        raise ValueError(f"Session {session_id} is not in {path}")
+    return sessions[session_id]
+
+
+class _Block:
+    """Minimal stand-in for an SDK content block."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.type = data["type"]
+        if self.type == "text":
+            self.text = data["text"]
+            self.citations = None
+        else:
+            self.id = data.get("id")
+            self.name = data.get("name")
+            self.input = data.get("input") or {}
+
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        return {k: v for k, v in vars(self).items() if v is not None}
+
+
+class _Usage:
+    def __init__(self, usage: Dict[str, int]):
+        self.input_tokens = usage.get("input_tokens", 0)
+        self.output_tokens = usage.get("output_tokens", 0)
+
+
+class _Response:
+    def __init__(self, entry: Dict[str, Any]):
+        self.content = [_Block(block) for block in entry.get("content", [])]
+        self.stop_reason = entry.get("stop_reason")
+        self.usage = _Usage(entry.get("usage") or {})
+        self.model = entry.get("model")
+
+
+class FakeMessages:
+    """``client.messages`` replacement returning recorded responses in order."""
+
+    def __init__(self, simulate_latency: bool):
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.simulate_latency = simulate_latency
+        self.calls = 0
+
+    async def create(self, **params) -> _Response:
+        if not self.queue:
+            raise ReplayDivergence("Agent made more LLM calls than were recorded")
+        entry = self.queue.popleft()
+        self.calls += 1
+        if self.simulate_latency:
+            await asyncio.sleep(entry.get("latency", 0.0))
+        return _Response(entry)
+
+
+class FakeAnthropic:
+    """AsyncAnthropic replacement."""
+
+    def __init__(self, simulate_latency: bool = False):
+        self.messages = FakeMessages(simulate_latency)
+
+
+class FakeMCPClient:
+    """MCPClient replacement returning recorded tool results per tool."""
+
+    def __init__(self, turns: List[RecordedTurn], simulate_latency: bool = False):
+        self.simulate_latency = simulate_latency
+        self.results: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.tool_names = sorted({
+            execution["tool_name"] for turn in turns for execution in turn.tool_executions
+        })
+        self.calls = 0
+        # The agent turns tool exceptions into error results, so divergences are collected here
+        self.divergences: List[str] = []
+
+    def load_turn(self, turn: RecordedTurn):
+        self.results.clear()
+        self.divergences.clear()
+        for execution in turn.tool_executions:
+            self.results[execution["tool_name"]].append(execution)
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        tools = []
+        for full_name in self.tool_names:
+            parts = full_name.split("_", 1)
+            if len(parts) != 2:
+                continue
+            tools.append({
+                "server": parts[0],
+                "name": parts[1],
+                "description": "Replayed tool",
+                "inputSchema": {"type": "object"}
+            })
+        return tools
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        queue = self.results.get(f"{server_name}_{tool_name}")
+        if not queue:
+            message = f"No recorded result left for {server_name}_{tool_name}"
+            self.divergences.append(message)
+            raise ReplayDivergence(message)
+        execution = queue.popleft()
+        self.calls += 1
+        if self.simulate_latency:
+            await asyncio.sleep(execution.get("latency", 0.0))
+        # A tool-reported error came back as a result, not as a failed call
+        if not execution.get("success", True) and execution.get("error_code") != "tool_error":
+            raise Exception(execution["result"])
+        return execution["result"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"replayed_calls": self.calls}
+
+
+class ReplayConfig(Config):
+    """Config overrides that keep a replay self-contained."""
+    ANTHROPIC_API_KEY = Config.ANTHROPIC_API_KEY or "replay"
+    MCP_GATEWAY_SOCKET = None
+    CONVERSATION_STORE = "memory"
+    LLM_HEDGE_ENABLED = False
+    # No network: the fake client never uses the HTTP transport
+    LLM_WARMUP_CONNECTIONS = 0
+    LLM_REWARM_AFTER_IDLE = 0.0
+
+
+async def replay_session(
+    path: str,
+    simulate_latency: bool = False,
+    session_id: Optional[str] = None,
+    turns: Optional[List[RecordedTurn]] = None
+) -> Dict[str, Any]:
+    """
+    Replay a recorded session and measure the agent's local overhead.
+
+    Args:
+        path: session_*.jsonl file
+        simulate_latency: Sleep for the recorded LLM and tool latencies
+        session_id: Session of the log to replay (may be omitted if the log holds only one)
+        turns: Already loaded turns of that session
+
+    Returns:
+        Report with per-turn recorded and replayed timings
+    """
+    if turns is None:
+        turns = load_session(path, session_id)
+    session_id = session_id or UNLABELLED_SESSION
+    quiet = Console(quiet=True)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger = PromptLogger(log_dir)
+        logger.console = quiet
+        agent = MCPAgent(ReplayConfig, logger=logger)
+        agent.console = quiet
+        agent.client = FakeAnthropic(simulate_latency)
+        # Route between models only if the recording was made that way, so calls line up
+        recorded_models = {r.get("model") for turn in turns for r in turn.responses} - {None}
+        if len(recorded_models) < 2:
+            agent.router.fast_model = None
+        agent.mcp_client = FakeMCPClient(turns, simulate_latency)
+        await agent.initialize()
+
+        report_turns = []
+        for index, turn in enumerate(turns):
+            agent.client.messages.queue = deque(turn.responses)
+            agent.mcp_client.load_turn(turn)
+            llm_calls_before = agent.client.messages.calls
+            tool_calls_before = agent.mcp_client.calls
+
+            error = None
+            started = time.perf_counter()
+            try:
+                await agent.chat(turn.user_message, session_id=session_id)
+            except ReplayDivergence as e:
+                error = str(e)
+            replay_ms = (time.perf_counter() - started) * 1000
+
+            leftover = len(agent.client.messages.queue)
+            if error is None and agent.mcp_client.divergences:
+                error = agent.mcp_client.divergences[0]
+            if error is None and leftover:
+                error = f"{leftover} recorded LLM responses were not consumed"
+
+            report_turns.append({
+                "turn": index + 1,
+                "recorded_ms": round(turn.recorded_ms, 1),
+                "replay_ms": round(replay_ms, 1),
+                "llm_calls": agent.client.messages.calls - llm_calls_before,
+                "tool_calls": agent.mcp_client.calls - tool_calls_before,
+                "diverged": error
+            })
+
+        await agent.shutdown()
+
+    recorded_total = sum(t["recorded_ms"] for t in report_turns)
+    replay_total = sum(t["replay_ms"] for t in report_turns)
+    return {
+        "session": path,
+        "session_id": session_id,
+        "simulate_latency": simulate_latency,
+        "turns": report_turns,
+        "recorded_ms": round(recorded_total, 1),
+        "replay_ms": round(replay_total, 1),
+        "overhead_ratio": round(replay_total / recorded_total, 4) if recorded_total else None,
+        "diverged_turns": sum(1 for t in report_turns if t["diverged"])
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Print a human readable replay report."""
+    label = "replay (sim. latency)" if report["simulate_latency"] else "local overhead"
+    print(f"\n{report['session']} ({report['session_id']})")
+    print(f"{'turn':>5}{'recorded ms':>14}{label:>24}{'llm':>6}{'tools':>7}  status")
+    for turn in report["turns"]:
+        status = f"DIVERGED: {turn['diverged']}" if turn["diverged"] else "ok"
+        print(
+            f"{turn['turn']:>5}{turn['recorded_ms']:>14.1f}{turn['replay_ms']:>24.1f}"
+            f"{turn['llm_calls']:>6}{turn['tool_calls']:>7}  {status}"
+        )
+    ratio = report["overhead_ratio"]
+    ratio_text = f"{ratio * 100:.2f}%" if ratio is not None else "n/a"
+    print(f"total: recorded {report['recorded_ms']:.1f} ms, {label} {report['replay_ms']:.1f} ms ({ratio_text})")
+
+
+async def main_async(args) -> int:
+    exit_code = 0
+    reports = []
+    for path in args.sessions:
+        sessions = load_sessions(path)
+        if args.session:
+            sessions = {args.session: sessions[args.session]} if args.session in sessions else {}
+            if not sessions:
+                print(f"✗ {path}: session {args.session} not found", file=sys.stderr)
+                exit_code = 1
+        for session_id, turns in sessions.items():
+            report = await replay_session(path, args.simulate_latency, session_id, turns)
+            reports.append(report)
+            if not args.json:
+                print_report(report)
+            if report["diverged_turns"]:
+                exit_code = 1
+            if args.max_overhead_ms is not None and not args.simulate_latency:
+                worst = max((t["replay_ms"] for t in report["turns"]), default=0.0)
+                if worst > args.max_overhead_ms:
+                    print(
+                        f"✗ {path} ({session_id}): turn overhead {worst:.1f} ms exceeds {args.max_overhead_ms} ms",
+                        file=sys.stderr
+                    )
+                    exit_code = 1
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions offline")
+    parser.add_argument("sessions", nargs="+", help="session_*.jsonl files")
+    parser.add_argument("--simulate-latency", action="store_true",
+                        help="Sleep for the recorded LLM and tool latencies")
+    parser.add_argument("--max-overhead-ms", type=float,
+                        help="Fail if any turn's local overhead exceeds this")
+    parser.add_argument("--session", help="Replay only this session_id (default: every session in the log)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
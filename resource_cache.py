@@ -0,0 +1,150 @@
+"""Cache for MCP resource lists and resource contents.
+
+Entries are JSON-compatible values with a strong ETag computed once when
+they are stored. Servers that support resource subscriptions (or
+list-changed notifications) invalidate their entries through MCP
+notifications, so those entries do not expire; everything else expires
+after a TTL. A per-key version counter keeps a read that raced with an
+invalidation from storing stale data.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# (server name, resource URI); the URI is None for a server's resource list
+CacheKey = Tuple[str, Optional[str]]
+
+
+def compute_etag(value: Any) -> str:
+    """Strong ETag of a JSON-compatible value."""
+    encoded = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return '"' + hashlib.sha256(encoded).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its ETag."""
+    value: Any
+    etag: str
+    stored_at: float
+    expires_at: Optional[float]
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+class ResourceCache:
+    """TTL/notification-invalidated cache with single-flight loading."""
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Lifetime of entries that are not kept fresh by notifications (seconds, 0 disables caching them)
+        """
+        self.ttl = ttl
+        self.entries: Dict[CacheKey, CacheEntry] = {}
+        self.versions: Dict[CacheKey, int] = {}
+        self.loading: Dict[CacheKey, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "notifications": 0}
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Return a fresh entry, or None."""
+        entry = self.entries.get(key)
+        if entry is None or entry.expired:
+            return None
+        return entry
+
+    def put(self, key: CacheKey, value: Any, notified: bool = False, version: Optional[int] = None) -> CacheEntry:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: JSON-compatible value
+            notified: Whether notifications keep this entry fresh (no TTL)
+            version: Key version read before loading; the value is not cached if it changed since
+
+        Returns:
+            The new entry (returned even when it is not cached)
+        """
+        now = time.monotonic()
+        expires_at = None if notified else now + self.ttl
+        entry = CacheEntry(value, compute_etag(value), now, expires_at)
+        stale = version is not None and self.versions.get(key, 0) != version
+        if not stale and (notified or self.ttl > 0):
+            self.entries[key] = entry
+        return entry
+
+    async def get_or_load(
+        self,
+        key: CacheKey,
+        loader: Callable[[], Awaitable[Tuple[Any, bool]]]
+    ) -> Tuple[CacheEntry, bool]:
+        """
+        Return a cached entry, loading it once for all concurrent callers on a miss.
+
+        Args:
+            key: Cache key
+            loader: Coroutine factory returning (value, notified)
+
+        Returns:
+            (entry, whether it came from the cache)
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry, True
+
+        task = self.loading.get(key)
+        if task is not None:
+            self.stats["hits"] += 1
+            return await asyncio.shield(task), True
+
+        self.stats["misses"] += 1
+        version = self.versions.get(key, 0)
+
+        async def load() -> CacheEntry:
+            try:
+                value, notified = await loader()
+                return self.put(key, value, notified, version)
+            finally:
+                if self.loading.get(key) is asyncio.current_task():
+                    del self.loading[key]
+
+        # The load runs in its own task so a cancelled caller does not fail the others
+        task = asyncio.ensure_future(load())
+        self.loading[key] = task
+        return await asyncio.shield(task), False
+
+    def invalidate(self, key: CacheKey, notification: bool = False):
+        """Drop an entry (and make in-flight loads of it uncacheable)."""
+        self.versions[key] = self.versions.get(key, 0) + 1
+        self.loading.pop(key, None)
+        if self.entries.pop(key, None) is not None:
+            self.stats["invalidations"] += 1
+        if notification:
+            self.stats["notifications"] += 1
+
+    def invalidate_server(self, server_name: str):
+        """Drop every entry of a server."""
+        for key in [key for key in {*self.entries, *self.loading} if key[0] == server_name]:
+            self.invalidate(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of cached entries."""
+        return {**self.stats, "entries": len(self.entries), "ttl": self.ttl}
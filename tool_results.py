@@ -0,0 +1,199 @@
+"""Token-efficient normalization of tool results before they enter the history.
+
+Tool outputs used to be added to the conversation as ``str(result)``: the
+Python repr of a ``CallToolResult`` with escaped JSON, indentation and
+metadata, paid for again on every later iteration. This module extracts
+the actual content parts, minifies JSON and renders homogeneous record
+lists (flights, hotels, ...) as compact pipe-separated tables, optionally
+keeping only selected fields per tool.
+"""
+import ast
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Matches text='...' / text="..." inside the repr of a CallToolResult
+_REPR_TEXT = re.compile(r"""text=('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+
+MIN_TABLE_ROWS = 2
+
+
+def minify_json(value: Any) -> str:
+    """Serialize JSON without insignificant whitespace."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _get_path(record: Dict[str, Any], path: str) -> Any:
+    """Read a dotted path ("price.amount") from a record."""
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _cell(value: Any) -> str:
+    """Render a table cell."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return minify_json(value)
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _is_record_list(value: Any) -> bool:
+    """Whether a value is a list of similar dicts worth rendering as a table."""
+    if not isinstance(value, list) or len(value) < MIN_TABLE_ROWS:
+        return False
+    if not all(isinstance(item, dict) for item in value):
+        return False
+    columns = set()
+    for item in value:
+        columns.update(item)
+    average = sum(len(item) for item in value) / len(value)
+    # Very different key sets would produce a sparse table; JSON is smaller then
+    return average > 0 and len(columns) <= 2 * average
+
+
+def render_table(records: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> str:
+    """
+    Render records as a header line plus one pipe-separated line per record.
+
+    Args:
+        records: Homogeneous list of dicts
+        fields: Dotted paths to keep (all top-level keys when omitted)
+    """
+    if fields:
+        columns = list(fields)
+    else:
+        columns = []
+        for record in records:
+            for key in record:
+                if key not in columns:
+                    columns.append(key)
+    lines = ["|".join(columns)]
+    for record in records:
+        lines.append("|".join(_cell(_get_path(record, column)) for column in columns))
+    return "\n".join(lines)
+
+
+def compact_json_value(value: Any, fields: Optional[List[str]] = None) -> str:
+    """Render parsed JSON compactly, turning record lists into tables."""
+    if _is_record_list(value):
+        return render_table(value, fields)
+    if isinstance(value, dict) and any(_is_record_list(v) for v in value.values()):
+        sections = []
+        scalars = {}
+        for key, item in value.items():
+            if _is_record_list(item):
+                sections.append(f"{key} ({len(item)}):\n{render_table(item, fields)}")
+            else:
+                scalars[key] = item
+        if scalars:
+            sections.insert(0, minify_json(scalars))
+        return "\n".join(sections)
+    return minify_json(value)
+
+
+def compact_text(text: str, fields: Optional[List[str]] = None) -> str:
+    """Compact a text part: JSON is minified/tabulated, prose loses redundant whitespace."""
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            return compact_json_value(json.loads(stripped), fields)
+        except ValueError:
+            pass
+    stripped = _TRAILING_SPACE.sub("\n", stripped)
+    return _BLANK_LINES.sub("\n\n", stripped)
+
+
+def _field(result: Any, *names: str) -> Any:
+    """Read a CallToolResult field under either of its SDK spellings."""
+    for name in names:
+        value = getattr(result, name, None)
+        if value is not None:
+            return value
+    return None
+
+
+def is_error_result(result: Any) -> bool:
+    """Whether a tool call failed: an error dict from the agent, or a result the server flagged with isError."""
+    if isinstance(result, dict):
+        return "error" in result
+    return bool(_field(result, "isError", "is_error"))
+
+
+def extract_text_parts(result: Any) -> List[str]:
+    """
+    Pull the real content parts out of a tool result.
+
+    Handles ``CallToolResult`` objects, recorded ``str(CallToolResult)``
+    reprs from the session logs, error dicts and plain strings.
+    """
+    content = getattr(result, "content", None)
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if getattr(item, "type", None) == "text":
+                parts.append(item.text)
+            elif getattr(item, "type", None) == "resource":
+                resource = item.resource
+                parts.append(getattr(resource, "text", None) or f"[resource: {resource.uri}]")
+            else:
+                parts.append(f"[{getattr(item, 'type', 'content')}: {getattr(item, 'mimeType', '')}]")
+        structured = _field(result, "structuredContent", "structured_content")
+        if not parts and structured is not None:
+            parts.append(minify_json(structured))
+        return parts
+
+    if isinstance(result, (dict, list)):
+        return [minify_json(result)]
+
+    text = str(result)
+    if "content=[" in text and "text=" in text:
+        parts = []
+        for match in _REPR_TEXT.finditer(text):
+            try:
+                parts.append(ast.literal_eval(match.group(1)))
+            except (ValueError, SyntaxError):
+                continue
+        if parts:
+            return parts
+    return [text]
+
+
+def normalize_tool_result(result: Any, fields: Optional[List[str]] = None, mode: str = "table") -> str:
+    """
+    Turn a tool result into the compact string stored in the history.
+
+    Args:
+        result: Tool result as returned by the MCP client (or recorded in the logs)
+        fields: Dotted fields to keep when records are rendered as a table
+        mode: "table" (tables + minified JSON), "json" (minified JSON only) or "raw" (str(result))
+
+    Returns:
+        Tool result text for the model
+    """
+    if mode == "raw":
+        return str(result)
+
+    rendered = []
+    for part in extract_text_parts(result):
+        if mode == "json":
+            try:
+                rendered.append(minify_json(json.loads(part)))
+            except ValueError:
+                rendered.append(part.strip())
+        else:
+            rendered.append(compact_text(part, fields))
+
+    text = "\n".join(rendered)
+    is_error = _field(result, "isError", "is_error")
+    if isinstance(result, str):
+        is_error = "isError=True" in result or "is_error=True" in result
+    if is_error:
+        text = f"[tool error] {text}"
+    return text
@@ -0,0 +1,189 @@
+"""Weighted fair scheduling of MCP calls per server.
+
+Every conversation shares one session per MCP server, so a single agent
+loop issuing many searches used to delay everyone else's calls to that
+server. Each server now gets a scheduler that bounds its outstanding
+requests and, when the bound is reached, hands freed slots out by
+deficit round-robin over per-session queues: every active session gets
+its turn, and interactive sessions get more calls per round than batch
+ones (according to their weights).
+
+The session and traffic class of a call are taken from a context variable
+set around each agent turn (see ``call_context``), so they do not have to
+be threaded through every call signature.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from metrics import LatencyWindow
+
+DEFAULT_SESSION = "default"
+DEFAULT_PRIORITY = "interactive"
+
+# (session id, traffic class) of the calls made by the current task
+_current_call: ContextVar[Tuple[str, str]] = ContextVar(
+    "mcp_call_context", default=(DEFAULT_SESSION, DEFAULT_PRIORITY)
+)
+
+
+@contextmanager
+def call_context(session_id: str, priority: str = DEFAULT_PRIORITY) -> Iterator[None]:
+    """Attribute the MCP calls made inside the block to a session and traffic class."""
+    token = _current_call.set((session_id, priority))
+    try:
+        yield
+    finally:
+        _current_call.reset(token)
+
+
+def current_call() -> Tuple[str, str]:
+    """(session id, traffic class) of the calling task."""
+    return _current_call.get()
+
+
+class _Flow:
+    """Waiting calls of one session, with its round-robin credit."""
+
+    __slots__ = ("weight", "waiters", "deficit")
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.deficit = 0.0
+
+
+class FairScheduler:
+    """Outstanding-request bound and deficit round-robin queue for one server."""
+
+    def __init__(self, server_name: str, max_outstanding: int, weights: Dict[str, float]):
+        """
+        Initialize the scheduler.
+
+        Args:
+            server_name: Name of the server (for stats)
+            max_outstanding: Maximum concurrent requests to the server
+            weights: Calls per round-robin round by traffic class, e.g. {"interactive": 4, "batch": 1}
+        """
+        self.server_name = server_name
+        self.max_outstanding = max(1, max_outstanding)
+        # A zero weight would never earn credit and stall the round-robin
+        self.weights = {priority: max(weight, 0.01) for priority, weight in weights.items()}
+        self.outstanding = 0
+        # Sessions with waiting calls, in round-robin order
+        self.flows: "OrderedDict[Tuple[str, str], _Flow]" = OrderedDict()
+        self.queue_wait: Dict[str, LatencyWindow] = {}
+        self.stats = {"immediate": 0, "queued": 0, "cancelled_while_queued": 0}
+
+    @asynccontextmanager
+    async def slot(self, session_id: Optional[str] = None, priority: Optional[str] = None):
+        """
+        Hold one of the server's request slots for the duration of the context.
+
+        Args:
+            session_id: Session the call belongs to (defaults to the current call context)
+            priority: "interactive" or "batch" (defaults to the current call context)
+        """
+        context_session, context_priority = current_call()
+        session_id = session_id or context_session
+        priority = priority or context_priority
+        if priority not in self.weights:
+            priority = DEFAULT_PRIORITY
+
+        enqueued = time.monotonic()
+        if self.outstanding < self.max_outstanding and not self.flows:
+            self.outstanding += 1
+            self.stats["immediate"] += 1
+        else:
+            await self._wait(session_id, priority)
+        self.queue_wait.setdefault(priority, LatencyWindow()).record(time.monotonic() - enqueued)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _wait(self, session_id: str, priority: str):
+        """Queue behind the session's earlier calls until a slot is handed over."""
+        key = (session_id, priority)
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = self.flows[key] = _Flow(self.weights[priority])
+        future = asyncio.get_running_loop().create_future()
+        flow.waiters.append(future)
+        self.stats["queued"] += 1
+        try:
+            # The slot is handed over by _release, so outstanding is already counted
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                self.stats["cancelled_while_queued"] += 1
+                future.cancel()
+                self._discard_cancelled(key)
+            raise
+
+    def _discard_cancelled(self, key: Tuple[str, str]):
+        """Drop cancelled calls of a session (and the session, if nothing is left)."""
+        flow = self.flows.get(key)
+        if flow is None:
+            return
+        flow.waiters = deque(future for future in flow.waiters if not future.done())
+        if not flow.waiters:
+            del self.flows[key]
+
+    def set_max_outstanding(self, max_outstanding: int):
+        """Change the bound, starting queued calls if it grew (a shrink applies as running calls finish)."""
+        self.max_outstanding = max(1, max_outstanding)
+        while self.outstanding < self.max_outstanding:
+            future = self._next_waiter()
+            if future is None:
+                break
+            self.outstanding += 1
+            future.set_result(None)
+
+    def _release(self):
+        """Hand the freed slot to the next call in round-robin order, or free it."""
+        # Above a lowered bound the slot is dropped instead of handed over
+        if self.outstanding <= self.max_outstanding:
+            future = self._next_waiter()
+            if future is not None:
+                future.set_result(None)
+                return
+        self.outstanding -= 1
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Pick the next waiting call by deficit round-robin (each call costs 1)."""
+        while self.flows:
+            key, flow = next(iter(self.flows.items()))
+            while flow.waiters and flow.waiters[0].done():
+                flow.waiters.popleft()
+            if not flow.waiters:
+                # An idle session keeps no credit
+                del self.flows[key]
+                continue
+            if flow.deficit >= 1:
+                flow.deficit -= 1
+                future = flow.waiters.popleft()
+                if not flow.waiters:
+                    del self.flows[key]
+                return future
+            # The session used up this round's credit: top it up and go to the back
+            flow.deficit += flow.weight
+            self.flows.move_to_end(key)
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return load, queue counters and queue-wait percentiles by traffic class."""
+        return {
+            **self.stats,
+            "outstanding": self.outstanding,
+            "max_outstanding": self.max_outstanding,
+            "waiting": sum(len(flow.waiters) for flow in self.flows.values()),
+            "waiting_sessions": len(self.flows),
+            "queue_wait": {priority: window.summary() for priority, window in self.queue_wait.items()}
+        }
@@ -0,0 +1,89 @@
+"""In-process validation of tool arguments against their inputSchema.
+
+Validators are compiled once per tool when the catalog is loaded, so
+malformed arguments produced by the model are rejected locally with
+precise messages instead of travelling to the remote MCP server and
+failing slowly there.
+"""
+from typing import Any, Dict, List, Optional
+
+try:
+    import jsonschema
+except ImportError:
+    print("Warning: jsonschema not installed, tool arguments will not be validated. Install with: pip install jsonschema")
+    jsonschema = None
+
+MAX_REPORTED_ERRORS = 10
+
+
+class ToolValidator:
+    """Cache of compiled JSON Schema validators keyed by full tool name."""
+
+    def __init__(self):
+        """Initialize an empty validator cache."""
+        self.validators: Dict[str, Any] = {}
+        self.stats = {"validated": 0, "rejected": 0}
+
+    def load(self, tools: List[Dict[str, Any]]):
+        """
+        Compile validators for a tool catalog, replacing the previous ones.
+
+        Args:
+            tools: Tool infos as returned by MCPClient.list_tools
+        """
+        validators = {}
+        if jsonschema is not None:
+            for tool in tools:
+                validator = self._compile(tool.get("inputSchema"))
+                if validator is not None:
+                    validators[f"{tool['server']}_{tool['name']}"] = validator
+        self.validators = validators
+
+    @staticmethod
+    def _compile(schema: Optional[Dict[str, Any]]) -> Any:
+        """Compile a schema, or return None if it is missing or invalid."""
+        if not schema:
+            return None
+        try:
+            validator_cls = jsonschema.validators.validator_for(schema)
+            validator_cls.check_schema(schema)
+        except jsonschema.SchemaError as e:
+            print(f"Skipping validation for invalid inputSchema: {e.message}")
+            return None
+        format_checker = getattr(validator_cls, "FORMAT_CHECKER", None)
+        return validator_cls(schema, format_checker=format_checker)
+
+    def validate(self, tool_name: str, arguments: Any) -> List[str]:
+        """
+        Validate arguments for a tool.
+
+        Args:
+            tool_name: Full tool name (server_toolname)
+            arguments: Arguments produced by the model or the caller
+
+        Returns:
+            Error messages (empty if the arguments are valid or no validator exists)
+        """
+        validator = self.validators.get(tool_name)
+        if validator is None:
+            return []
+
+        self.stats["validated"] += 1
+        errors = sorted(validator.iter_errors(arguments), key=lambda e: list(e.absolute_path))
+        if errors:
+            self.stats["rejected"] += 1
+        messages = []
+        for error in errors[:MAX_REPORTED_ERRORS]:
+            location = "/".join(str(part) for part in error.absolute_path) or "<root>"
+            messages.append(f"{location}: {error.message}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            messages.append(f"... and {len(errors) - MAX_REPORTED_ERRORS} more errors")
+        return messages
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return validation counters; every rejection is a remote round trip avoided."""
+        return {
+            **self.stats,
+            "tools_with_validators": len(self.validators),
+            "round_trips_avoided": self.stats["rejected"]
+        }
@@ -0,0 +1,97 @@
+"""Wall-clock budget for one agent turn.
+
+A turn used to be bounded only by its iteration count. The budget tracks
+the remaining time from the moment the request arrives, keeps a reserve
+for a final tool-less answer, tells the loop whether a tool call can
+still finish, and records where the time went (per phase) for the
+response and the logs.
+"""
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class TurnBudget:
+    """Remaining time and per-phase timings of one turn."""
+
+    def __init__(self, total_seconds: Optional[float], final_reserve: float = 15.0):
+        """
+        Initialize the budget; the clock starts now.
+
+        Args:
+            total_seconds: Wall-clock budget of the turn (None or 0 means unlimited)
+            final_reserve: Seconds kept for the final tool-less answer
+        """
+        self.total = total_seconds or None
+        self.final_reserve = final_reserve if self.total else 0.0
+        self.started = time.monotonic()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.events = {"iterations": 0, "skipped_tools": 0, "interrupted_tools": 0}
+        self.final_answer_reason: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config) -> "TurnBudget":
+        """Create a budget from the Config class."""
+        return cls(config.TURN_BUDGET_SECONDS, config.TURN_FINAL_ANSWER_RESERVE)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """Seconds left in the whole turn (infinite without a budget)."""
+        if self.total is None:
+            return math.inf
+        return max(0.0, self.total - self.elapsed())
+
+    def working_time(self) -> float:
+        """Seconds left for planning and tools, after the final-answer reserve."""
+        return max(0.0, self.remaining() - self.final_reserve)
+
+    def deadline(self, final: bool = False) -> Optional[float]:
+        """Deadline for an LLM call (None when unlimited)."""
+        if self.total is None:
+            return None
+        return self.remaining() if final else self.working_time()
+
+    @property
+    def low(self) -> bool:
+        """Whether only the final-answer reserve is left."""
+        return self.total is not None and self.working_time() <= 0
+
+    def can_afford(self, expected_seconds: float) -> bool:
+        """Whether an operation expected to take this long can finish before the reserve."""
+        return self.total is None or expected_seconds < self.working_time()
+
+    def record(self, phase: str, seconds: float):
+        """Add time spent in a phase."""
+        entry = self.phases.setdefault(phase, {"seconds": 0.0, "count": 0})
+        entry["seconds"] += seconds
+        entry["count"] += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block (sync or containing awaits) as a phase."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - started)
+
+    def report(self) -> Dict[str, Any]:
+        """Where the turn spent its time."""
+        elapsed = self.elapsed()
+        accounted = sum(entry["seconds"] for entry in self.phases.values())
+        phases = {
+            name: {"ms": round(entry["seconds"] * 1000, 1), "count": int(entry["count"])}
+            for name, entry in self.phases.items()
+        }
+        phases["other"] = {"ms": round(max(0.0, elapsed - accounted) * 1000, 1), "count": 1}
+        return {
+            "budget_ms": round(self.total * 1000) if self.total else None,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "remaining_ms": round(self.remaining() * 1000, 1) if self.total else None,
+            "phases": phases,
+            **self.events,
+            "final_answer_reason": self.final_answer_reason
+        }